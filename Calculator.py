@@ -4,23 +4,180 @@ BLUE PROTOCOL - PROFIT CALCULATOR (OPTIMIZED)
 """
 
 import json
-import pandas as pd
-import matplotlib.pyplot as plt
+import math
+from functools import partial
 import numpy as np
-from scipy.optimize import minimize_scalar
+
+from CatalogCache import load_catalog
+from FocusKnapsack import solve_focus_knapsack
+from Instrumentation import NULL_STATS, RunStats
+from ItemIndex import DenseTables, ItemIndex, load_item_id_overrides
+from PriceCurves import VolumeMarket, greedy_session_plan, load_price_curves
+from ProductionPlanner import REST, solve_stock_plan
+from RecipeGraph import RecipeGraph
+from YieldSimulation import YieldSimulator
+
+def _plain(value):
+    """Deep copy of nested dicts as plain dicts, detached from any owner"""
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    return value
+
+
+class _VersionedDict(dict):
+    """dict that reports every mutation to its owner so cached results can be invalidated"""
+
+    def __init__(self, data, on_change):
+        self._on_change = on_change
+        super().__init__((key, self._wrap(value)) for key, value in data.items())
+
+    def _wrap(self, value):
+        # Nested dicts are always copied, so one taken from another calculator reports to this owner only
+        if isinstance(value, dict):
+            return _VersionedDict(value, self._on_change)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, self._wrap(value))
+        self._on_change()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._on_change()
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            super().__setitem__(key, self._wrap(value))
+        self._on_change()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        value = super().pop(key, *default)
+        self._on_change()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._on_change()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._on_change()
+
+
+def _versioned_property(name):
+    """Data attribute that bumps the calculator's data version when replaced or mutated"""
+    attr = f"_{name}"
+
+    def getter(self):
+        return getattr(self, attr)
+
+    def setter(self, value):
+        # Price (and price curve) edits keep the recipe/mechanics structure (and its indexes) intact
+        on_change = partial(self.mark_data_changed, name not in ('prices', 'price_curves'))
+        setattr(self, attr, _VersionedDict(value, on_change))
+        on_change()
+
+    return property(getter, setter)
+
+
+class FocusSweep:
+    """Profit cube from ProfitCalculatorOptimized.sweep_daily_focus
+
+    ``profit[s, f, a]`` is the daily profit of strategy ``strategies[s]`` with a
+    daily focus of ``focus_values[f]`` of which ``gather_focus[a]`` is spent on
+    gathering (the rest on crafting). Infeasible cells are NaN.
+    """
+
+    def __init__(self, strategies, strategy_types, focus_values, gather_focus, profit):
+        self.strategies = strategies
+        self.strategy_types = strategy_types
+        self.focus_values = focus_values
+        self.gather_focus = gather_focus
+        self.profit = profit
+
+    def _strategy_index(self, strategy):
+        return strategy if isinstance(strategy, (int, np.integer)) else self.strategies.index(strategy)
+
+    def best_profit(self):
+        """(strategy x focus) best profit over every gather allocation"""
+        has_value = ~np.all(np.isnan(self.profit), axis=2)
+        best = np.full(self.profit.shape[:2], np.nan)
+        best[has_value] = np.nanmax(self.profit[has_value], axis=1)
+        return best
+
+    def best_allocation(self):
+        """(strategy x focus) gather focus of the best allocation (-1 when infeasible)"""
+        has_value = ~np.all(np.isnan(self.profit), axis=2)
+        filled = np.where(np.isnan(self.profit), -np.inf, self.profit)
+        return np.where(has_value, self.gather_focus[filled.argmax(axis=2)], -1)
+
+    def to_frame(self):
+        """Best profit per strategy and focus as a DataFrame (rows: strategies, columns: focus)"""
+        import pandas as pd
+        return pd.DataFrame(self.best_profit(), index=self.strategies, columns=self.focus_values)
+
+    def crossover_focus(self, strategy, other):
+        """Smallest swept daily focus at which ``strategy`` beats ``other`` (None if it never does)"""
+        best = self.best_profit()
+        a = best[self._strategy_index(strategy)]
+        b = best[self._strategy_index(other)]
+        wins = np.nan_to_num(a, nan=-np.inf) > np.nan_to_num(b, nan=-np.inf)
+        if not wins.any():
+            return None
+        return int(self.focus_values[wins.argmax()])
+
 
 class ProfitCalculatorOptimized:
-    def __init__(self, config_path="config", daily_focus=400):
+    prices = _versioned_property('prices')
+    gatherable = _versioned_property('gatherable')
+    craftable = _versioned_property('craftable')
+    recipes = _versioned_property('recipes')
+    price_curves = _versioned_property('price_curves')
+
+    def __init__(self, config_path="config", daily_focus=400, tables=None, derived=False,
+                 assumed_gatherables=False):
         self.config_path = config_path
         self.daily_focus = daily_focus
+        self.derived = derived
+        self.assumed_gatherables = assumed_gatherables
+        self.workers = None
+        self._strategy_pool = None
+        self.data_version = 0
+        self.structure_version = 0
+        self._dependency_index = None
+        self._dense_tables = None
+        self._market = None
+        self.last_results = None
+        self._results_state = None
+        self._baseline_cache = {}
+        self.baseline_cache_hits = 0
+        self.baseline_cache_misses = 0
+        self._recipe_graph = None
+        self.stats = NULL_STATS
         self.prices = {}
         self.gatherable = {}
         self.craftable = {}
         self.recipes = {}
-        self.load_data()
+        self.price_curves = {}
+        if tables is None:
+            self.load_data()
+        else:
+            self.set_tables(tables)
 
     def load_data(self):
-        """Load all data"""
+        """Load all data (mechanics derived from the scraped catalog when ``self.derived``, gatherables
+        with assumed mechanics included only when ``self.assumed_gatherables``)"""
+        if self.derived:
+            from DerivedTables import build_tables
+            self.set_tables(build_tables(self.config_path, assumed_gatherables=self.assumed_gatherables))
+            self.price_curves = load_price_curves(self.config_path)
+            return
         try:
             with open(f"{self.config_path}/market_prices.json") as f:
                 self.prices = json.load(f)
@@ -33,11 +190,174 @@ class ProfitCalculatorOptimized:
 
             with open(f"{self.config_path}/recipes.json") as f:
                 self.recipes = json.load(f)
+
+            self.price_curves = load_price_curves(self.config_path)
         except FileNotFoundError as e:
             print(f"Error loading data file: {e}")
             print("Please ensure the 'config' directory and its JSON files are in the correct location.")
             raise e
 
+    def get_tables(self):
+        """Deep copies of the config tables as plain dicts (the inverse of set_tables)"""
+        return {
+            'prices': _plain(self.prices),
+            'gatherable': _plain(self.gatherable),
+            'craftable': _plain(self.craftable),
+            'recipes': _plain(self.recipes),
+            'price_curves': _plain(self.price_curves)
+        }
+
+    def set_tables(self, tables):
+        """Use already-loaded config tables (as get_tables returns them; price_curves optional)"""
+        self.prices = tables['prices']
+        self.gatherable = tables['gatherable']
+        self.craftable = tables['craftable']
+        self.recipes = tables['recipes']
+        self.price_curves = tables.get('price_curves', {})
+
+    def get_strategy_pool(self, workers):
+        """Process pool for the parallel search, rebuilt when the structure or the price curves changed"""
+        from ParallelSearch import StrategyPool
+        pool = self._strategy_pool
+        if pool is None or pool.key != StrategyPool.key_for(self, workers):
+            self.close_strategy_pool()
+            pool = self._strategy_pool = StrategyPool(self, workers)
+        return pool
+
+    def close_strategy_pool(self):
+        """Shut down the parallel search workers (if any)"""
+        if self._strategy_pool is not None:
+            self._strategy_pool.close()
+            self._strategy_pool = None
+
+    def mark_data_changed(self, structural=True):
+        """Bump the price/config version and drop every cached result"""
+        self.data_version += 1
+        self._market = None
+        if structural:
+            self.structure_version += 1
+            self._dependency_index = None
+            self._dense_tables = None
+        self._baseline_cache.clear()
+
+    def get_dependency_index(self):
+        """Reverse index: item -> gathering rows and craft products whose results depend on its price"""
+        if self._dependency_index is None:
+            index = {}
+            for item in self.gatherable:
+                index.setdefault(item, {'gathering': set(), 'products': set()})['gathering'].add(item)
+            for product, ingredients in self.recipes.items():
+                for item in [product, *ingredients]:
+                    index.setdefault(item, {'gathering': set(), 'products': set()})['products'].add(product)
+            self._dependency_index = index
+        return self._dependency_index
+
+    def get_dense_tables(self):
+        """Prices, mechanics and recipes as arrays over the item index, rebuilt when the structure changes"""
+        tables = self._dense_tables
+        if tables is not None and tables.data_version != self.data_version:
+            # Price edits only refresh the price arrays, unless they introduce a new item
+            if tables.set_prices(self.prices):
+                tables.data_version = self.data_version
+            else:
+                tables = None
+        if tables is None:
+            tables = DenseTables(ItemIndex(self._price_items()), self.gatherable, self.craftable, self.recipes)
+            tables.set_prices(self.prices)
+            tables.data_version = self.data_version
+            self._dense_tables = tables
+        return tables
+
+    def get_market(self):
+        """Volume-aware sell/buy valuation (see PriceCurves), rebuilt when prices or curves change"""
+        if self._market is None:
+            self._market = VolumeMarket(self.prices, self.price_curves)
+        return self._market
+
+    def _curved_rows(self):
+        """Per recipe row, whether its product or an ingredient is priced by a volume curve"""
+        tables = self.get_dense_tables()
+        market = self.get_market()
+        curved = tables.mask([*market.sell_curves, *market.buy_curves])
+        touched = np.bincount(tables.entry_recipe, weights=curved[tables.recipe_item],
+                              minlength=len(tables.recipe_product))
+        return curved[tables.recipe_product] | (touched > 0)
+
+    def get_item_index(self):
+        """Dense integer id of every priced, gathered or recipe item"""
+        return self.get_dense_tables().index
+
+    def link_scraped_ids(self):
+        """Link the item index to the scraped catalog ids; returns the item names left unlinked
+
+        Names are matched exactly, then case/spacing/hyphen-insensitively;
+        config/item_ids.json pins the ones spelled differently in the config.
+        """
+        index = self.get_item_index()
+        try:
+            catalog = load_catalog(self.config_path)
+        except OSError as e:
+            print(f"Warning: compiled catalog unavailable ({e}). Scraped ids not linked.")
+            return list(index.names)
+        scraped_ids = np.concatenate([catalog.item_id, catalog.collectable_id])
+        scraped_names = np.concatenate([catalog.item_name, catalog.collectable_name])
+        return index.link_scraped(scraped_ids, scraped_names, load_item_id_overrides(self.config_path))
+
+    def enable_instrumentation(self, profile=False):
+        """Start collecting stage timings and hot-path counters (and a cProfile if ``profile``)"""
+        self.stats = RunStats(profile=profile)
+        return self.stats
+
+    def disable_instrumentation(self):
+        """Stop collecting and return the collected RunStats"""
+        stats, self.stats = self.stats, NULL_STATS
+        return stats
+
+    def baseline_cache_stats(self):
+        """Return hit/miss counters for the buy-all baseline cache"""
+        return {
+            'hits': self.baseline_cache_hits,
+            'misses': self.baseline_cache_misses,
+            'size': len(self._baseline_cache),
+            'data_version': self.data_version
+        }
+
+    def get_recipe_graph(self):
+        """Build (once) the multi-level recipe graph, from the compiled catalog when possible"""
+        if self._recipe_graph is None:
+            try:
+                self._recipe_graph = RecipeGraph(catalog=load_catalog(self.config_path))
+            except OSError as e:
+                print(f"Warning: compiled catalog unavailable ({e}). Parsing RecipesData.json instead.")
+                self._recipe_graph = RecipeGraph(f"{self.config_path}/RecipesData.json")
+        return self._recipe_graph
+
+    def catalog_prices(self):
+        """The prices plus, for every item linked to the scraped catalog, its price under the scraped id
+
+        The recipe graph resolves ids before names, so items the config
+        spells differently from the catalog (see link_scraped_ids) are priced.
+        """
+        index = self.get_item_index()
+        if index.scraped_ids is None:
+            self.link_scraped_ids()
+        prices = dict(self.prices)
+        if index.scraped_ids is not None:
+            for name, price in self.prices.items():
+                scraped_id = index.scraped_ids[index.lookup(name)]
+                if scraped_id >= 0:
+                    prices[str(scraped_id)] = price
+        return prices
+
+    def price_crafting_trees(self, focus_value=0.0):
+        """Cheapest make-vs-buy cost for every catalog item at the current prices"""
+        return self.get_recipe_graph().cost_table(self.catalog_prices(), focus_value)
+
+    def simulate_yields(self, trials=100_000, seed=None, focus_value=0.0):
+        """Monte Carlo daily profit distribution of every catalog recipe using the scraped yield ranges"""
+        simulator = YieldSimulator(self.get_recipe_graph(), self.catalog_prices(), self.daily_focus, focus_value)
+        return simulator.run(trials=trials, seed=seed)
+
     def get_material_requirements(self, craft_product, quantity):
         """Calculate exact material requirements for crafting"""
         requirements = {}
@@ -47,6 +367,21 @@ class ProfitCalculatorOptimized:
         return requirements
 
     def calculate_profit_buy_all(self, craft_product):
+        """Calculate profit when buying ALL materials (optimal baseline), memoized per data version"""
+        key = (craft_product, self.daily_focus, self.data_version)
+        cached = self._baseline_cache.get(key)
+        if cached is not None:
+            self.baseline_cache_hits += 1
+            self.stats.count('baseline_cache_hits')
+        else:
+            self.baseline_cache_misses += 1
+            self.stats.count('baseline_cache_misses')
+            cached = self._calculate_profit_buy_all_uncached(craft_product)
+            self._baseline_cache[key] = cached
+        profit, details = cached
+        return profit, dict(details)
+
+    def _calculate_profit_buy_all_uncached(self, craft_product):
         """Calculate profit when buying ALL materials (optimal baseline)"""
         if craft_product not in self.craftable or craft_product not in self.prices:
             return -float('inf'), {}
@@ -55,6 +390,9 @@ class ProfitCalculatorOptimized:
         if craft_mechanics['focus_cost'] <= 0:
             return -float('inf'), {}
             
+        if self.get_market().affects([craft_product, *self.recipes[craft_product]]):
+            return self._curve_profit_buy_all(craft_product)
+
         # Maximum crafting with all focus
         max_crafts = (self.daily_focus // craft_mechanics['focus_cost']) * craft_mechanics['yield']
         
@@ -90,33 +428,66 @@ class ProfitCalculatorOptimized:
             'gather_focus_used': 0
         }
 
-    def calculate_only_gathering(self):
-        """Calculate ONLY direct gathering profits and return as DataFrame"""
-        results = []
-        for item, mechanics in self.gatherable.items():
-            if item in self.prices and mechanics['focus_cost'] > 0:
-                revenue_per_unit = self.prices[item]
-                profit_per_unit = revenue_per_unit # Cost is 0
-                luno_per_focus = (profit_per_unit * mechanics['yield']) / mechanics['focus_cost']
-                units_per_day = (self.daily_focus // mechanics['focus_cost']) * mechanics['yield']
-                daily_profit = units_per_day * profit_per_unit
-
-                results.append({
-                    'Method': f"Gather {item}",
-                    'Type': 'Only Gathering',
-                    'Units/Day': units_per_day,
-                    'Revenue/Unit': revenue_per_unit,
-                    'Cost/Unit': 0,
-                    'Profit/Unit': profit_per_unit,
-                    'Luno/Focus': luno_per_focus,
-                    'Daily Profit': daily_profit
-                })
-            elif item not in self.prices:
-                 print(f"Warning: Price for {item} not found. Skipping gathering analysis for this item.")
+    def _craft_effect(self, craft_product):
+        """Units one crafting session of ``craft_product`` adds (product) and consumes (ingredients)"""
+        crafted = self.craftable[craft_product]['yield']
+        effect = {craft_product: crafted}
+        for ingredient, quantity in self.recipes[craft_product].items():
+            effect[ingredient] = effect.get(ingredient, 0) - quantity * crafted
+        return effect
 
+    def _curve_profit_buy_all(self, craft_product):
+        """Buy-all baseline under volume curves: as many crafting sessions as still add profit"""
+        if any(ingredient not in self.prices for ingredient in self.recipes[craft_product]):
+            return -float('inf'), {}
+        market = self.get_market()
+        focus_cost = self.craftable[craft_product]['focus_cost']
+        total_profit, counts, _ = greedy_session_plan([focus_cost], [self._craft_effect(craft_product)],
+                                                      self.daily_focus, market)
+        crafts = int(counts[0]) * self.craftable[craft_product]['yield']
+        materials = self.get_material_requirements(craft_product, crafts)
+        return total_profit, {
+            'method': 'buy_all',
+            'crafted_units': crafts,
+            'material_cost': sum(market.buy_cost(item, qty) for item, qty in materials.items()),
+            'material_breakdown': ', '.join(f"Buy {qty} {item}" for item, qty in materials.items()),
+            'craft_focus_used': int(counts[0]) * focus_cost,
+            'gather_focus_used': 0
+        }
 
-        df = pd.DataFrame(results)
-        if not df.empty:
+    def calculate_only_gathering(self, items=None):
+        """Calculate ONLY direct gathering profits and return as DataFrame (indexed by item)"""
+        import pandas as pd
+        tables = self.get_dense_tables()
+        names = tables.index.names
+        gather = tables.gather_items
+        if items is not None:
+            gather = gather[tables.mask(items)[gather]]
+
+        for item in gather[~tables.priced[gather]]:
+            self.stats.skip('gatherable without price', names[item])
+            print(f"Warning: Price for {names[item]} not found. Skipping gathering analysis for this item.")
+        for item in gather[tables.priced[gather] & (tables.gather_cost[gather] <= 0)]:
+            self.stats.skip('gatherable with zero focus cost', names[item])
+        gather = gather[tables.priced[gather] & (tables.gather_cost[gather] > 0)]
+
+        with self.stats.stage('dataframe'):
+            if not len(gather):
+                return pd.DataFrame()
+            focus_cost = tables.gather_cost[gather]
+            gather_yield = tables.gather_yield[gather]
+            price = tables.price[gather]  # Cost is 0, so profit per unit is the price
+            units_per_day = (self.daily_focus // focus_cost) * gather_yield
+            df = pd.DataFrame({
+                'Method': [f"Gather {names[item]}" for item in gather],
+                'Type': ['Only Gathering'] * len(gather),
+                'Units/Day': units_per_day,
+                'Revenue/Unit': price,
+                'Cost/Unit': np.zeros(len(gather), dtype=np.int64),
+                'Profit/Unit': price,
+                'Luno/Focus': (price * gather_yield) / focus_cost,
+                'Daily Profit': units_per_day * price
+            }, index=[names[item] for item in gather])
             df = df.sort_values(by='Luno/Focus', ascending=False)
         return df
 
@@ -161,7 +532,8 @@ class ProfitCalculatorOptimized:
             craft_sessions = 0
             max_possible_crafts = 0
 
-        # Calculate material requirements and costs
+        # Calculate material requirements and costs (volume curves price the day's totals)
+        market = self.get_market()
         total_material_cost = 0
         material_breakdown_list = []
         materials_available = True
@@ -182,7 +554,7 @@ class ProfitCalculatorOptimized:
             else:
                 bought = total_needed
 
-            cost = bought * self.prices.get(ingredient, 0)
+            cost = market.buy_cost(ingredient, bought)
             total_material_cost += cost
 
             if bought > 0:
@@ -192,8 +564,7 @@ class ProfitCalculatorOptimized:
             return -float('inf'), {}
 
         # Calculate profit
-        revenue_per_unit = self.prices.get(craft_product, 0)
-        total_revenue = max_possible_crafts * revenue_per_unit
+        total_revenue = market.sell_value(craft_product, max_possible_crafts) if craft_product in self.prices else 0
         total_profit = total_revenue - total_material_cost
 
         # ✅ CORRECCIÓN: Compare with "buy all" strategy
@@ -217,221 +588,928 @@ class ProfitCalculatorOptimized:
             'method': 'mixed'
         }
 
-    def find_optimal_strategies(self):
-        """Find truly optimal strategies without duplicates"""
-        results = []
-
-        for craft_product, ingredients in self.recipes.items():
-            if craft_product not in self.craftable:
+    def _skip_items(self, reason, items):
+        """Record a skip for every dense item id in ``items`` (only walked when instrumentation is on)"""
+        if self.stats.enabled:
+            names = self.get_item_index().names
+            for item in items:
+                self.stats.skip(reason, names[item])
+
+    def _allocation_entries(self, products=None):
+        """Recipe entries (CSR positions in the dense tables) of every pair get_allocation_pairs returns"""
+        tables = self.get_dense_tables()
+        product = tables.recipe_product
+        rows = np.ones(len(product), dtype=bool) if products is None else tables.mask(products)[product]
+        _, ingredients_priced = tables.unit_material_cost()
+        for reason, failed in (('product without craft mechanics', ~tables.craftable[product]),
+                               ('product without price', ~tables.priced[product]),
+                               ('product with unpriced ingredient', ~ingredients_priced),
+                               ('product with zero focus cost', tables.craft_cost[product] <= 0)):
+            self._skip_items(reason, product[rows & failed])
+            rows &= ~failed
+
+        item = tables.recipe_item
+        entries = np.flatnonzero(rows[tables.entry_recipe] & (tables.gather_rank[item] >= 0))
+        entries = entries[np.lexsort((tables.gather_rank[item[entries]], tables.entry_recipe[entries]))]
+        for reason, failed in (('pair with unpriced gatherable', ~tables.priced[item[entries]]),
+                               ('pair with zero gather focus cost', tables.gather_cost[item[entries]] <= 0)):
+            if self.stats.enabled:
+                for pair in self._entry_pairs(entries[failed]):
+                    self.stats.skip(reason, pair)
+            entries = entries[~failed]
+        return entries
+
+    def _entry_pairs(self, entries):
+        """(craft product, ingredient) names of recipe entries"""
+        tables = self.get_dense_tables()
+        names = tables.index.names
+        products = tables.recipe_product[tables.entry_recipe[entries]]
+        return [(names[p], names[i]) for p, i in zip(products, tables.recipe_item[entries])]
+
+    def get_allocation_pairs(self, products=None):
+        """Return every (craft product, gathered ingredient) pair that can be optimized"""
+        return self._entry_pairs(self._allocation_entries(products))
+
+    def solve_allocations_exact(self, pairs):
+        """Evaluate every valid gather focus for all pairs at once and take the exact argmax
+
+        Focus is floored to multiples of the gathering focus_cost, so profit is a
+        step function of the split. Instead of a continuous optimizer we build a
+        (pair x step) grid with every feasible multiple and pick the best column.
+        Returns (best_gather_focus, best_profit) arrays aligned with ``pairs``;
+        pairs with no feasible split get a profit of -inf.
+        """
+        tables = self.get_dense_tables()
+        entries = np.array([tables.entry(product, item) for product, item in pairs], dtype=np.int64)
+        return self._solve_allocation_entries(entries)
+
+    def _solve_allocation_entries(self, entries):
+        """solve_allocations_exact over recipe entries of the dense tables"""
+        tables = self.get_dense_tables()
+        n = len(entries)
+        best_focus = np.zeros(n, dtype=np.int64)
+        best_profit = np.full(n, -np.inf)
+        if n == 0:
+            return best_focus, best_profit
+
+        product = tables.recipe_product[tables.entry_recipe[entries]]
+        gather = tables.recipe_item[entries]
+        unit_material_cost, _ = tables.unit_material_cost()
+        gather_cost = tables.gather_cost[gather].astype(float)
+        gather_yield = tables.gather_yield[gather].astype(float)
+        craft_cost = tables.craft_cost[product].astype(float)
+        craft_yield = tables.craft_yield[product].astype(float)
+        sell_price = tables.price[product].astype(float)
+        gather_price = tables.price[gather].astype(float)
+        gather_qty = tables.recipe_qty[entries].astype(float)
+        unit_material_cost = unit_material_cost[tables.entry_recipe[entries]].astype(float)
+
+        # Gather focus ranges over focus_cost, 2*focus_cost, ... leaving room for one craft
+        max_steps = np.floor((self.daily_focus - craft_cost) / gather_cost)
+        width = int(max_steps.max())
+        self.stats.count('allocation_pairs', n)
+        if width < 1:
+            if self.stats.enabled:
+                for pair in self._entry_pairs(entries):
+                    self.stats.skip('pair without a feasible split', pair)
+            return best_focus, best_profit
+
+        steps = np.arange(1, width + 1, dtype=float)[None, :]
+        gather_focus = steps * gather_cost[:, None]
+        valid = steps <= max_steps[:, None]
+        self.stats.count('allocation_grid_cells', valid.size)
+        self.stats.count('allocation_evaluations', np.count_nonzero(valid))
+
+        crafts = np.floor((self.daily_focus - gather_focus) / craft_cost[:, None]) * craft_yield[:, None]
+        gathered = steps * gather_yield[:, None]
+        self_supplied = np.minimum(gather_qty[:, None] * crafts, gathered)
+
+        # Profit = crafts * (price - material cost) + value of the units we did not have to buy
+        profit = crafts * (sell_price - unit_material_cost)[:, None] + self_supplied * gather_price[:, None]
+        profit = np.where(valid, profit, -np.inf)
+
+        rows = np.arange(n)
+        best_step = profit.argmax(axis=1)
+        best_profit = profit[rows, best_step]
+        best_focus = np.where(np.isfinite(best_profit), gather_focus[rows, best_step], 0).astype(np.int64)
+        if self.stats.enabled:
+            for pair in self._entry_pairs(entries[~np.isfinite(best_profit)]):
+                self.stats.skip('pair without a feasible split', pair)
+        return best_focus, best_profit
+
+    def sweep_daily_focus(self, focus_values):
+        """Evaluate every strategy over a range of daily focus values in one vectorized pass
+
+        Strategies are gather-only (per gatherable), buy-all (per craftable
+        product) and mixed (per product/gathered-ingredient pair). The
+        allocation axis covers gather focus 0..max(focus_values) in steps of
+        the gcd of the gathering focus costs. Returns a FocusSweep.
+        """
+        focus_values = np.asarray(sorted(set(int(f) for f in focus_values)), dtype=np.int64)
+        tables = self.get_dense_tables()
+        names = tables.index.names
+        price = tables.price.astype(float)
+        gather = tables.gather_items
+        gather = gather[tables.priced[gather] & (tables.gather_cost[gather] > 0)]
+        unit_material_cost, ingredients_priced = tables.unit_material_cost()
+        product = tables.recipe_product
+        craftable_rows = np.flatnonzero(tables.craftable[product] & tables.priced[product]
+                                        & (tables.craft_cost[product] > 0) & ingredients_priced)
+        margin = price[product] - unit_material_cost.astype(float)
+        entries = self._allocation_entries()
+        pair_product = product[tables.entry_recipe[entries]]
+        pair_gather = tables.recipe_item[entries]
+
+        unit = math.gcd(*tables.gather_cost[gather].tolist()) if len(gather) else 1
+        top = int(focus_values.max()) if len(focus_values) else 0
+        gather_focus = np.arange(0, top + 1, unit, dtype=np.int64)
+
+        f = focus_values.astype(float)[None, :, None]
+        g = gather_focus.astype(float)[None, None, :]
+
+        def column(values):
+            return np.asarray(values, dtype=float)[:, None, None]
+
+        blocks = []
+
+        # Gather only: g focus gathering, the rest unused (best at the largest multiple <= f)
+        if len(gather):
+            cost = column(tables.gather_cost[gather])
+            per_session = column(tables.gather_yield[gather] * tables.price[gather])
+            valid = (g <= f) & (np.mod(g, cost) == 0)
+            blocks.append(np.where(valid, (g // cost) * per_session, np.nan))
+
+        # Buy all: every point of focus crafting, only defined at g = 0
+        if len(craftable_rows):
+            made = product[craftable_rows]
+            crafts = (f // column(tables.craft_cost[made])) * column(tables.craft_yield[made])
+            blocks.append(np.where(g == 0, crafts * column(margin[craftable_rows]), np.nan))
+
+        # Mixed: same formula as solve_allocations_exact, for every (f, g) at once
+        if len(entries):
+            gather_cost = column(tables.gather_cost[pair_gather])
+            craft_cost = column(tables.craft_cost[pair_product])
+            crafts = ((f - g) // craft_cost) * column(tables.craft_yield[pair_product])
+            gathered = (g // gather_cost) * column(tables.gather_yield[pair_gather])
+            self_supplied = np.minimum(column(tables.recipe_qty[entries]) * crafts, gathered)
+            profit = (crafts * column(margin[tables.entry_recipe[entries]])
+                      + self_supplied * column(price[pair_gather]))
+            valid = (g >= gather_cost) & (f - g >= craft_cost) & (np.mod(g, gather_cost) == 0)
+            blocks.append(np.where(valid, profit, np.nan))
+
+        gather_items = [names[item] for item in gather]
+        products = [names[item] for item in product[craftable_rows]]
+        pairs = self._entry_pairs(entries)
+        strategies = ([f"Gather {item}" for item in gather_items]
+                      + [f"Craft {product}" for product in products]
+                      + [f"Gather {item} + Craft {product}" for product, item in pairs])
+        strategy_types = (['Only Gathering'] * len(gather_items) + ['Buy All'] * len(products)
+                          + ['Mixed'] * len(pairs))
+        if blocks:
+            cube = np.concatenate([np.broadcast_to(block, (block.shape[0], len(focus_values), len(gather_focus)))
+                                   for block in blocks])
+        else:
+            cube = np.full((0, len(focus_values), len(gather_focus)), np.nan)
+        return FocusSweep(strategies, strategy_types, focus_values, gather_focus, cube)
+
+    def optimize_focus_allocation(self, budget=None, max_sessions=None):
+        """Split one focus budget across every gathering and crafting activity at once
+
+        Each gathering session is worth yield * price and each crafting session
+        yield * (price - material cost); gathered units that a chosen craft
+        consumes replace purchases at the same price, so the combination is an
+        integer knapsack over sessions. ``max_sessions`` (item -> cap) bounds
+        how many sessions an activity may get; mechanics may also define a
+        'max_sessions' field. When volume curves price any of the items,
+        sessions are no longer worth a constant amount and the split is made
+        by greedy_session_plan instead. Returns (total_profit, plan DataFrame).
+        """
+        import pandas as pd
+        budget = self.daily_focus if budget is None else budget
+        max_sessions = max_sessions or {}
+        activities = []
+
+        for item, mech in self.gatherable.items():
+            if item in self.prices and mech['focus_cost'] > 0:
+                activities.append(('Gather', item, mech, mech['yield'] * self.prices[item]))
+        for product in self.get_available_products():
+            mech = self.craftable[product]
+            if product not in self.prices or mech['focus_cost'] <= 0:
                 continue
-
-            # Calculate profit for buying all (baseline)
-            profit_buy_all, buy_all_details = self.calculate_profit_buy_all(craft_product)
-            if profit_buy_all <= 0:
+            if any(ingredient not in self.prices for ingredient in self.recipes[product]):
                 continue
-
-            best_profit = profit_buy_all
-            best_method = f"Craft {craft_product}"
-            best_type = "Optimal Strategy"
-            best_allocation = "0G/400C"
-            best_focus_allocation = "0G/400C"
-            optimization_method = "Buy All"
-            material_details = buy_all_details
-
-            # Check if mixed strategy is better
-            for gather_item, gather_mechanics in self.gatherable.items():
-                if gather_item not in ingredients:
-                    continue
-
-                # Check if prices exist for all necessary items
-                if craft_product not in self.prices or gather_item not in self.prices:
-                    continue
-                    
-                materials_found = True
-                for ingredient in ingredients:
-                    if ingredient not in self.prices:
-                        materials_found = False
-                        break
-                if not materials_found:
-                    continue
-
-                gather_mech = self.gatherable[gather_item]
-                craft_mech = self.craftable[craft_product]
-
-                if gather_mech['focus_cost'] <= 0 or craft_mech['focus_cost'] <= 0:
-                    continue
-
-                # Define the profit function to optimize
-                def profit_function(gather_focus):
-                    profit, _ = self.calculate_profit_for_allocation(
-                        int(gather_focus), craft_product, gather_item
-                    )
-                    return -profit  # Negative because we're minimizing
-
-                # Use scipy's bounded optimization
-                try:
-                    min_gather_focus = gather_mech['focus_cost']
-                    min_craft_focus = craft_mech['focus_cost']
-                    upper_bound = self.daily_focus - min_craft_focus
-                    lower_bound = min_gather_focus
-
-                    if upper_bound < lower_bound:
-                        continue
-
-                    result = minimize_scalar(
-                        profit_function,
-                        bounds=(lower_bound, upper_bound),
-                        method='bounded',
-                        options={'xatol': 1}
-                    )
-
-                    if result.success:
-                        optimal_gather_focus = int(result.x)
-                        optimal_gather_focus = (optimal_gather_focus // gather_mech['focus_cost']) * gather_mech['focus_cost']
-                        optimal_craft_focus = self.daily_focus - optimal_gather_focus
-                        
-                        optimal_profit, allocation_details = self.calculate_profit_for_allocation(
-                            optimal_gather_focus, craft_product, gather_item
-                        )
-
-                        if optimal_profit > best_profit:
-                            best_profit = optimal_profit
-                            best_method = f"Gather {gather_item} + Craft {craft_product}"
-                            best_type = "Optimal Cross"
-                            best_allocation = f"{optimal_gather_focus}G/{optimal_craft_focus}C"
-                            best_focus_allocation = f"{optimal_gather_focus}G/{optimal_craft_focus}C"
-                            optimization_method = "Mixed"
-                            material_details = allocation_details
-
-                except Exception as e:
-                    continue
-
-            # Add only the BEST strategy (no duplicates)
-            material_requirements = self.get_material_requirements(craft_product, material_details['crafted_units'])
-            materials_needed = ", ".join([f"{qty} {mat}" for mat, qty in material_requirements.items()])
-            
-            # Calculate material breakdown for display
-            if optimization_method == "Mixed" and 'gathered_units' in material_details:
-                gathered_amount = material_details['gathered_units']
-                total_needed = material_requirements.get(gather_item, 0)
-                buy_amount = max(0, total_needed - gathered_amount)
-                
-                other_materials = []
-                for material, quantity in material_requirements.items():
-                    if material != gather_item:
-                        other_materials.append(f"{quantity} {material}")
-                
-                you_gather = f"{gathered_amount} {gather_item}"
-                you_buy = f"{buy_amount} {gather_item}" if buy_amount > 0 else "None"
-                other_mats = ", ".join(other_materials) if other_materials else "None"
+            material_cost = sum(qty * self.prices[i] for i, qty in self.recipes[product].items())
+            activities.append(('Craft', product, mech,
+                               mech['yield'] * (self.prices[product] - material_cost)))
+
+        costs = [mech['focus_cost'] for _, _, mech, _ in activities]
+        caps = [max_sessions.get(name, mech.get('max_sessions')) for _, name, mech, _ in activities]
+        effects = [{name: mech['yield']} if kind == 'Gather' else self._craft_effect(name)
+                   for kind, name, mech, _ in activities]
+        market = self.get_market()
+        if market.affects({item for effect in effects for item in effect}):
+            total_profit, counts, credit = greedy_session_plan(costs, effects, budget, market, caps)
+        else:
+            total_profit, counts = solve_focus_knapsack(costs, [value for _, _, _, value in activities], budget, caps)
+            credit = [value * int(count) for (_, _, _, value), count in zip(activities, counts)]
+
+        # Gathered units are consumed by the chosen crafts first, the rest is sold
+        gathered = {name: int(count) * mech['yield']
+                    for (kind, name, mech, _), count in zip(activities, counts) if kind == 'Gather' and count}
+        needed = {}
+        for (kind, name, mech, _), count in zip(activities, counts):
+            if kind == 'Craft' and count:
+                for ingredient, qty in self.get_material_requirements(name, int(count) * mech['yield']).items():
+                    needed[ingredient] = needed.get(ingredient, 0) + qty
+
+        rows = []
+        for (kind, name, mech, _), count, profit in zip(activities, counts, credit):
+            if not count:
+                continue
+            row = {
+                'Activity': f"{kind} {name}",
+                'Type': 'Gathering' if kind == 'Gather' else 'Crafting',
+                'Sessions': int(count),
+                'Focus Used': int(count) * mech['focus_cost'],
+                'Units': int(count) * mech['yield'],
+                'Daily Profit': profit,
+            }
+            if kind == 'Gather':
+                used = min(gathered[name], needed.get(name, 0))
+                row['Used In Crafting'] = used
+                row['Units To Sell'] = gathered[name] - used
             else:
-                you_gather = "None"
-                you_buy = materials_needed
-                other_mats = "None"
-
-            results.append({
-                'Method': best_method,
-                'Type': best_type,
-                'Crafted Units': material_details['crafted_units'],
-                'Daily Profit': best_profit,
-                'Luno/Focus': best_profit / self.daily_focus,
-                'Focus Allocation': best_focus_allocation,
-                'Total Materials Needed': materials_needed,
-                'You Will Gather': you_gather,
-                'You Need To Buy': you_buy,
-                'Other Materials Needed': other_mats,
-                'Optimization Method': optimization_method
-            })
-
-        df = pd.DataFrame(results)
-        if not df.empty:
-            df = df.sort_values(by='Daily Profit', ascending=False)
+                buy = {i: max(0, qty - gathered.get(i, 0))
+                       for i, qty in self.get_material_requirements(name, int(count) * mech['yield']).items()}
+                row['Materials To Buy'] = ", ".join(f"{qty} {i}" for i, qty in buy.items() if qty > 0) or "None"
+            rows.append(row)
+
+        plan = pd.DataFrame(rows)
+        if not plan.empty:
+            plan = plan.sort_values(by='Daily Profit', ascending=False)
+        return total_profit, plan
+
+    def plan_production(self, days=30, items=None, salvage=0.0, max_stock=None):
+        """Best day-by-day gather/craft schedule with gathered surplus carried over between days
+
+        Single-day strategies lose the gathered units a craft does not consume;
+        here they stay in stock for later crafts. Every priced gatherable that
+        some product needs (or only those in ``items``) is tried as the carried
+        item; each day either gathers it and crafts any product (stock first,
+        the rest bought) or runs the best single-day gather-only/buy-all
+        strategy. See ProductionPlanner.solve_stock_plan. Returns (total_profit,
+        plan DataFrame with one row per day).
+        """
+        import pandas as pd
+        tables = self.get_dense_tables()
+        names = tables.index.names
+        focus = self.daily_focus
+        unit_material_cost, ingredients_priced = tables.unit_material_cost()
+        product = tables.recipe_product
+        rows = np.flatnonzero(tables.craftable[product] & tables.priced[product]
+                              & (tables.craft_cost[product] > 0) & ingredients_priced)
+        made = product[rows]
+        craft_cost = tables.craft_cost[made]
+        craft_yield = tables.craft_yield[made]
+        margin = (tables.price[made] - unit_material_cost[rows]).astype(float)
+        gather = tables.gather_items
+        gather = gather[tables.priced[gather] & (tables.gather_cost[gather] > 0)]
+
+        # Best stateless day: buy-all crafting or gathering to sell (nothing goes into stock)
+        rest_value = 0.0
+        rest_row = {'Activity': "Rest", 'Gather Sessions': 0, 'Gathered Units': 0,
+                    'Craft Sessions': 0, 'Crafted Units': 0}
+        buy_all = (focus // craft_cost) * craft_yield * margin
+        if len(made) and buy_all.max() > rest_value:
+            best = buy_all.argmax()
+            sessions = int(focus // craft_cost[best])
+            rest_value = float(buy_all[best])
+            rest_row.update({'Activity': f"Craft {names[made[best]]}", 'Craft Sessions': sessions,
+                             'Crafted Units': sessions * int(craft_yield[best])})
+        gather_only = (focus // tables.gather_cost[gather]) * tables.gather_yield[gather] * tables.price[gather]
+        if len(gather) and gather_only.max() > rest_value:
+            item = gather[gather_only.argmax()]
+            sessions = int(focus // tables.gather_cost[item])
+            rest_value = float(gather_only.max())
+            rest_row = {'Activity': f"Gather {names[item]}", 'Gather Sessions': sessions,
+                        'Gathered Units': sessions * int(tables.gather_yield[item]),
+                        'Craft Sessions': 0, 'Crafted Units': 0}
+
+        entries, owner = tables.recipe_entries(rows)
+        carried = np.unique(tables.recipe_item[entries][np.isin(tables.recipe_item[entries], gather)])
+        if items is not None:
+            carried = carried[tables.mask(items)[carried]]
+
+        # Bound per item: every day spends all its focus at the best rate with
+        # the carried item free (surplus sold at salvage); items are solved
+        # best bound first and skipped once the bound cannot beat the best plan
+        usages = []
+        bounds = np.zeros(len(carried))
+        most_crafted = focus * craft_yield / craft_cost
+        for position, item in enumerate(carried):
+            usage = np.zeros(len(rows), dtype=np.int64)
+            uses = tables.recipe_item[entries] == item
+            usage[owner[uses]] = tables.recipe_qty[entries[uses]]
+            usages.append(usage)
+            day_bound = max(rest_value, float(np.max(most_crafted * (margin + usage * float(tables.price[item])))),
+                            salvage * focus * tables.gather_yield[item] / tables.gather_cost[item]
+                            * float(tables.price[item]))
+            bounds[position] = days * day_bound
+
+        best_profit, best_item, best_schedule, best_usage = days * rest_value, None, [], None
+        order = np.argsort(-bounds, kind='stable')
+        solved = 0
+        for position in order:
+            if bounds[position] <= best_profit:
+                break
+            solved += 1
+            item, usage = carried[position], usages[position]
+            with self.stats.stage('production_plan'):
+                profit, schedule = solve_stock_plan(
+                    days, focus, int(tables.gather_cost[item]), int(tables.gather_yield[item]),
+                    float(tables.price[item]), craft_cost, craft_yield, margin, usage,
+                    rest_value, salvage, max_stock)
+            if profit > best_profit:
+                best_profit, best_item, best_schedule, best_usage = profit, item, schedule, usage
+        self.stats.count('production_items_solved', solved)
+        self.stats.count('production_items_pruned', len(order) - solved)
+
+        plan = []
+        stock = 0
+        for day in range(days):
+            row = {'Day': day + 1, **rest_row, 'Used From Stock': 0, 'Stock End': stock,
+                   'Daily Profit': rest_value}
+            if best_item is not None and best_schedule[day][1] != REST:
+                g, p, c = best_schedule[day]
+                gathered = g * int(tables.gather_yield[best_item])
+                crafted = c * int(craft_yield[p])
+                used = min(crafted * int(best_usage[p]), stock + gathered)
+                stock += gathered - used
+                if max_stock is not None:
+                    stock = min(stock, max_stock)
+                activity = [f"Gather {names[best_item]}"] if g else []
+                activity += [f"Craft {names[made[p]]}"] if c else []
+                row.update({
+                    'Activity': " + ".join(activity) or "Rest",
+                    'Gather Sessions': g, 'Gathered Units': gathered,
+                    'Craft Sessions': c, 'Crafted Units': crafted,
+                    'Used From Stock': used, 'Stock End': stock,
+                    'Daily Profit': crafted * float(margin[p]) + used * float(tables.price[best_item])
+                })
+            plan.append(row)
+        return best_profit, pd.DataFrame(plan)
+
+    def strategy_records(self, products=None):
+        """Numeric core of find_optimal_strategies: the best plan of every profitable product
+
+        Returns (records, product_names, gather_names). ``records`` is a NumPy
+        record array in recipe order; its ``product`` and ``gather`` fields
+        index the name lists (gather is -1 for buy-all plans). No text is
+        built here, see format_strategy_details.
+        """
+        tables = self.get_dense_tables()
+        product_names = list(self.recipes)
+        gather_names = list(self.gatherable)
+        if products is not None:
+            products = set(products)
+        # Rows touched by a volume curve are planned session by session (see _curve_strategy_records)
+        curved = self._curved_rows()
+        money = np.float64 if curved.any() else tables.price.dtype
+        dtype = np.dtype([
+            ('product', np.int32), ('gather', np.int32),
+            ('gather_focus', np.int64), ('craft_focus', np.int64),
+            ('gathered_units', np.int64), ('crafted_units', np.int64),
+            ('material_cost', money), ('daily_profit', money)
+        ])
+
+        # Solve every (product, gatherable) allocation in one vectorized pass
+        with self.stats.stage('allocation_pairs'):
+            entries = self._allocation_entries(products)
+        with self.stats.stage('solve_allocations'):
+            pair_focus, pair_profit = self._solve_allocation_entries(entries)
+
+        with self.stats.stage('strategy_rows'):
+            product = tables.recipe_product
+            price = tables.price
+            rows = np.ones(len(product), dtype=bool) if products is None else tables.mask(products)[product]
+            self._skip_items('product without craft mechanics', product[rows & ~tables.craftable[product]])
+            rows &= tables.craftable[product]
+
+            # Buy-all baseline of every recipe: all focus on crafting, every ingredient bought
+            _, ingredients_priced = tables.unit_material_cost()
+            craft_cost = tables.craft_cost[product]
+            feasible = tables.priced[product] & ingredients_priced & (craft_cost > 0)
+            sessions = np.where(feasible, self.daily_focus // np.maximum(craft_cost, 1), 0)
+            max_crafts = sessions * tables.craft_yield[product]
+            owner = tables.entry_recipe
+            buy_cost = np.zeros(len(product), dtype=price.dtype)
+            np.add.at(buy_cost, owner, tables.recipe_qty * max_crafts[owner] * price[tables.recipe_item])
+            buy_profit = max_crafts * price[product] - buy_cost
+            profitable = rows & feasible & ~curved & (buy_profit > 0)
+            self._skip_items('buy-all baseline not profitable', product[rows & ~curved & ~profitable])
+
+            # Best pair per recipe: the first one with the highest profit
+            pair_row = tables.entry_recipe[entries]
+            order = np.lexsort((-pair_profit, pair_row))
+            first = order[np.r_[True, pair_row[order][1:] != pair_row[order][:-1]]] if len(order) else order
+            best_profit = np.full(len(product), -np.inf)
+            best_profit[pair_row[first]] = pair_profit[first]
+            best_entry = np.zeros(len(product), dtype=np.int64)
+            best_entry[pair_row[first]] = entries[first]
+            best_focus = np.zeros(len(product), dtype=np.int64)
+            best_focus[pair_row[first]] = pair_focus[first]
+
+            keep = np.flatnonzero(profitable)
+            records = np.zeros(len(keep), dtype=dtype)
+            records['product'] = keep
+            records['gather'] = -1
+            records['craft_focus'] = self.daily_focus
+            records['crafted_units'] = max_crafts[keep]
+            records['material_cost'] = buy_cost[keep]
+            records['daily_profit'] = buy_profit[keep]
+
+            # Same arithmetic as calculate_profit_for_allocation, without the text
+            mixed = np.flatnonzero(best_profit[keep] > buy_profit[keep])
+            self.stats.count('mixed_strategies', len(mixed))
+            if len(mixed):
+                row = keep[mixed]
+                made = product[row]
+                gather = tables.recipe_item[best_entry[row]]
+                gather_focus = best_focus[row]
+                craft_focus = self.daily_focus - gather_focus
+                gathered = gather_focus // tables.gather_cost[gather] * tables.gather_yield[gather]
+                crafted = craft_focus // tables.craft_cost[made] * tables.craft_yield[made]
+                ingredient_entries, owner = tables.recipe_entries(row)
+                cost = np.zeros(len(row), dtype=price.dtype)
+                np.add.at(cost, owner, tables.recipe_qty[ingredient_entries] * crafted[owner]
+                          * price[tables.recipe_item[ingredient_entries]])
+                cost -= np.minimum(tables.recipe_qty[best_entry[row]] * crafted, gathered) * price[gather]
+                records['gather'][mixed] = tables.gather_rank[gather]
+                records['gather_focus'][mixed] = gather_focus
+                records['craft_focus'][mixed] = craft_focus
+                records['gathered_units'][mixed] = gathered
+                records['crafted_units'][mixed] = crafted
+                records['material_cost'][mixed] = cost
+                records['daily_profit'][mixed] = crafted * price[made] - cost
+
+        curve_rows = np.flatnonzero(rows & feasible & curved)
+        if len(curve_rows):
+            with self.stats.stage('curve_strategies'):
+                records = np.concatenate([records, self._curve_strategy_records(curve_rows, dtype)])
+            records = records[np.argsort(records['product'], kind='stable')]
+
+        return records, product_names, gather_names
+
+    def _curve_strategy_records(self, rows, dtype):
+        """strategy_records rows for recipes whose prices move with volume
+
+        Buy-all and every gathered-ingredient split are planned with
+        greedy_session_plan (craft sessions, plus gathering sessions whose
+        units only replace purchases), so a plan stops adding sessions once
+        the curves make the next one unprofitable.
+        """
+        tables = self.get_dense_tables()
+        names = tables.index.names
+        market = self.get_market()
+        found = []
+        for row in rows:
+            product = names[tables.recipe_product[row]]
+            craft = self.craftable[product]
+            effect = self._craft_effect(product)
+            profit, counts, _ = greedy_session_plan([craft['focus_cost']], [effect], self.daily_focus, market)
+            if profit <= 0:
+                self._skip_items('buy-all baseline not profitable', [tables.recipe_product[row]])
+                continue
+            best = (profit, None, 0, int(counts[0]))
+
+            items = tables.recipe_item[tables.recipe_offsets[row]:tables.recipe_offsets[row + 1]]
+            items = items[(tables.gather_rank[items] >= 0) & tables.priced[items] & (tables.gather_cost[items] > 0)]
+            for item in items[np.argsort(tables.gather_rank[items], kind='stable')]:
+                gather = self.gatherable[names[item]]
+                profit, counts, _ = greedy_session_plan(
+                    [craft['focus_cost'], gather['focus_cost']], [effect, {names[item]: gather['yield']}],
+                    self.daily_focus, market, unsold=[names[item]])
+                if counts.all() and profit > best[0]:
+                    best = (profit, item, int(counts[1]), int(counts[0]))
+
+            profit, item, gather_sessions, craft_sessions = best
+            crafted = craft_sessions * craft['yield']
+            gathered = gather_sessions * tables.gather_yield[item] if item is not None else 0
+            needed = self.get_material_requirements(product, crafted)
+            if item is not None:
+                needed[names[item]] = max(0, needed[names[item]] - gathered)
+            found.append((row, -1 if item is None else tables.gather_rank[item],
+                          gather_sessions * tables.gather_cost[item] if item is not None else 0,
+                          craft_sessions * craft['focus_cost'], gathered, crafted,
+                          sum(market.buy_cost(name, qty) for name, qty in needed.items()), profit))
+        return np.array(found, dtype=dtype)
+
+    def find_optimal_strategies(self, products=None, workers=None):
+        """Find truly optimal strategies without duplicates (indexed by product)
+
+        Only the numeric columns and labels are built; add the material text
+        columns for the rows you display with format_strategy_details.
+        ``workers`` (default: self.workers) > 1 spreads the products over a
+        process pool; the result is identical to the serial search.
+        """
+        workers = self.workers if workers is None else workers
+        if workers and workers > 1:
+            from ParallelSearch import parallel_strategy_records
+            with self.stats.stage('parallel_search'):
+                records, product_names, gather_names = parallel_strategy_records(self, products, workers)
+        else:
+            records, product_names, gather_names = self.strategy_records(products)
+
+        return self._strategy_frame(records, product_names, gather_names)
+
+    def _strategy_frame(self, records, product_names, gather_names):
+        """find_optimal_strategies DataFrame of strategy_records output, sorted by daily profit"""
+        import pandas as pd
+        with self.stats.stage('dataframe'):
+            names = np.array(product_names, dtype=object)[records['product']]
+            # gather == -1 picks the trailing None
+            gather_items = np.array(gather_names + [None], dtype=object)[records['gather']]
+            mixed = records['gather'] >= 0
+            df = pd.DataFrame({
+                'Method': [f"Gather {g} + Craft {p}" if g is not None else f"Craft {p}"
+                           for p, g in zip(names, gather_items)],
+                'Type': np.where(mixed, "Optimal Cross", "Optimal Strategy"),
+                'Crafted Units': records['crafted_units'],
+                'Daily Profit': records['daily_profit'],
+                'Luno/Focus': records['daily_profit'] / self.daily_focus,
+                'Gather Focus': records['gather_focus'],
+                'Craft Focus': records['craft_focus'],
+                'Material Cost': records['material_cost'],
+                'Optimization Method': np.where(mixed, "Mixed", "Buy All"),
+                'Gather Item': gather_items,
+                'Gathered Units': records['gathered_units']
+            }, index=names.tolist())
+            if not df.empty:
+                df = df.sort_values(by='Daily Profit', ascending=False)
         
         return df
 
-    def calculate_sensitivity(self, optimal_result, focus_change=20):
-        """Calculate sensitivity for a given optimal result"""
-        method = optimal_result.get('Method', '')
-        optimal_profit = optimal_result.get('Daily Profit', 0)
-
-        if optimal_profit <= 0:
-            return 0, "N/A"
-
-        # For "buy all" strategies, sensitivity is typically low
-        if "Gather" not in method:
-            return 1.0, "High"  # Buying all is very stable
-
-        # For mixed strategies, calculate basic sensitivity
-        craft_product = None
-        for product in self.recipes:
-            if product in method:
-                craft_product = product
-                break
+    def _profit_upper_bounds(self):
+        """Per recipe row, a daily profit no plan of that product can exceed (-inf when it cannot be crafted)
+
+        Crafting with all of the focus, where gathering at best makes the most
+        valuable gatherable ingredient free:
+        crafts * (price - material cost + max gatherable ingredient cost).
+        """
+        tables = self.get_dense_tables()
+        product = tables.recipe_product
+        unit_material_cost, ingredients_priced = tables.unit_material_cost()
+        craft_cost = tables.craft_cost[product]
+        feasible = tables.craftable[product] & tables.priced[product] & ingredients_priced & (craft_cost > 0)
+        sessions = np.where(feasible, self.daily_focus // np.maximum(craft_cost, 1), 0)
+        max_crafts = sessions * tables.craft_yield[product]
+
+        item = tables.recipe_item
+        gatherable = (tables.gather_rank[item] >= 0) & tables.priced[item] & (tables.gather_cost[item] > 0)
+        gathered = np.flatnonzero(gatherable)
+        saving = np.zeros(len(product), dtype=tables.price.dtype)
+        np.maximum.at(saving, tables.entry_recipe[gathered], tables.recipe_qty[gathered] * tables.price[item[gathered]])
+        margin = tables.price[product] - unit_material_cost + saving
+        # Flat prices say nothing about a volume curve, so curved rows are never pruned
+        return np.where(feasible, np.where(self._curved_rows(), np.inf, max_crafts * margin), -np.inf)
+
+    def top_k_strategies(self, k=10):
+        """The ``k`` most profitable optimal strategies, without optimizing every product
+
+        Products are visited in order of an upper bound on their daily profit
+        (see _profit_upper_bounds) in growing batches; once the k-th best
+        profit found so far is at least the next bound, no remaining product
+        can enter the top k and the search stops. Same rows as
+        find_optimal_strategies().head(k), up to the order of equal profits.
+        """
+        product_names = list(self.recipes)
+        gather_names = list(self.gatherable)
+        with self.stats.stage('upper_bounds'):
+            bound = self._profit_upper_bounds()
+            order = np.argsort(-bound, kind='stable')
+            order = order[bound[order] > 0]
+
+        found = []
+        profits = np.zeros(0)
+        kth = -np.inf
+        position = 0
+        batch = max(k, 16)
+        while position < len(order) and k > 0:
+            if len(profits) >= k:
+                # Bounds are sorted descending: only the prefix above the k-th best can still enter
+                end = position + np.count_nonzero(bound[order[position:]] > kth)
+                if end == position:
+                    break
+            else:
+                end = len(order)
+            chunk = order[position:min(end, position + batch)]
+            position += len(chunk)
+            batch *= 2
+            records, _, _ = self.strategy_records([product_names[row] for row in chunk])
+            found.append(records)
+            profits = np.concatenate([profits, records['daily_profit'].astype(float)])
+            if len(profits) >= k:
+                kth = np.partition(profits, len(profits) - k)[len(profits) - k]
+
+        self.stats.count('top_k_products_evaluated', position)
+        self.stats.count('top_k_products_pruned', len(order) - position)
+        records = np.concatenate(found) if found else self.strategy_records([])[0]
+        records = records[np.argsort(records['product'], kind='stable')]
+        return self._strategy_frame(records, product_names, gather_names).head(k)
+
+    def format_strategy_details(self, optimal_df):
+        """Copy of ``optimal_df`` with the human-readable allocation and material columns
+
+        Pass only the rows you are going to show (e.g. ``df.head(10)``): the
+        text is rendered per row on demand.
+        """
+        df = optimal_df.copy()
+        columns = {name: [] for name in ('Focus Allocation', 'Total Materials Needed', 'You Will Gather',
+                                          'You Need To Buy', 'Other Materials Needed')}
+        rows = zip(df.index, df['Gather Item'], df['Crafted Units'], df['Gathered Units'],
+                   df['Gather Focus'], df['Craft Focus'])
+        for product, gather_item, crafted, gathered_amount, gather_focus, craft_focus in rows:
+            material_requirements = self.get_material_requirements(product, crafted)
+            materials_needed = ", ".join([f"{qty} {mat}" for mat, qty in material_requirements.items()])
+            columns['Focus Allocation'].append(f"{gather_focus}G/{craft_focus}C")
+            columns['Total Materials Needed'].append(materials_needed)
+
+            if isinstance(gather_item, str):
+                buy_amount = max(0, material_requirements.get(gather_item, 0) - gathered_amount)
+                other_materials = [f"{quantity} {material}" for material, quantity in material_requirements.items()
+                                   if material != gather_item]
+                columns['You Will Gather'].append(f"{gathered_amount} {gather_item}")
+                columns['You Need To Buy'].append(f"{buy_amount} {gather_item}" if buy_amount > 0 else "None")
+                columns['Other Materials Needed'].append(", ".join(other_materials) if other_materials else "None")
+            else:
+                columns['You Will Gather'].append("None")
+                columns['You Need To Buy'].append(materials_needed)
+                columns['Other Materials Needed'].append("None")
 
-        if not craft_product:
-            return 0, "N/A"
+        position = df.columns.get_loc('Luno/Focus') + 1
+        for offset, (name, values) in enumerate(columns.items()):
+            df.insert(position + offset, name, values)
+        return df
 
-        profit_buy_all, _ = self.calculate_profit_buy_all(craft_product)
-        
-        if optimal_profit > 0:
-            sensitivity = abs(optimal_profit - profit_buy_all) / optimal_profit * 100
-        else:
-            sensitivity = float('inf')
+    def _price_items(self):
+        """Every item that has a price or appears in a recipe/mechanics table, in a stable order"""
+        items = dict.fromkeys(self.prices)
+        items.update(dict.fromkeys(self.gatherable))
+        for product, ingredients in self.recipes.items():
+            items.update(dict.fromkeys([product, *ingredients]))
+        return list(items)
+
+    def price_gradients(self, optimal_df=None, gathering_df=None):
+        """Partial derivative of every strategy's daily profit with respect to every item price
+
+        For a fixed plan profit is linear in prices, so the gradient is the net
+        quantity traded per day: + units sold, - units bought. Rows are the
+        strategies of ``gathering_df`` and ``optimal_df`` (defaults: the last
+        run_analysis results), columns are items.
+        """
+        import pandas as pd
+        if optimal_df is None or gathering_df is None:
+            results = self.last_results or {}
+            optimal_df = results.get('optimal_strategies', pd.DataFrame()) if optimal_df is None else optimal_df
+            gathering_df = results.get('gathering', pd.DataFrame()) if gathering_df is None else gathering_df
+
+        tables = self.get_dense_tables()
+        items = tables.index.names
+        blocks = []
+        labels = []
+
+        if not gathering_df.empty:
+            block = np.zeros((len(gathering_df), len(items)))
+            block[np.arange(len(gathering_df)), tables.index.lookup_many(gathering_df.index)] = \
+                gathering_df['Units/Day'].to_numpy(dtype=float)
+            blocks.append(block)
+            labels.extend(gathering_df['Method'])
+
+        if not optimal_df.empty:
+            product_ids = tables.index.lookup_many(optimal_df.index)
+            recipe_rows = tables.recipe_row[product_ids]
+            has_recipe = np.flatnonzero(recipe_rows >= 0)
+            entries, owner = tables.recipe_entries(recipe_rows[has_recipe])
+            recipe_matrix = np.zeros((len(product_ids), len(items)))
+            recipe_matrix[has_recipe[owner], tables.recipe_item[entries]] = tables.recipe_qty[entries]
+
+            rows = np.arange(len(product_ids))
+            crafted = optimal_df['Crafted Units'].to_numpy(dtype=float)
+            block = np.zeros((len(product_ids), len(items)))
+            block -= crafted[:, None] * recipe_matrix
+            block[rows, product_ids] += crafted
+
+            # Gathered units displace purchases of that ingredient
+            gathered = optimal_df['Gathered Units'].to_numpy(dtype=float)
+            mixed = np.flatnonzero(gathered > 0)
+            if len(mixed):
+                gather_columns = tables.index.lookup_many(optimal_df['Gather Item'].iloc[mixed])
+                needed = -block[mixed, gather_columns]
+                block[mixed, gather_columns] += np.minimum(needed, gathered[mixed])
+            blocks.append(block)
+            labels.extend(optimal_df['Method'])
+
+        matrix = np.vstack(blocks) if blocks else np.zeros((0, len(items)))
+        return pd.DataFrame(matrix, index=labels, columns=items)
+
+    def _sensitivity_arrays(self, gradients, profits):
+        """% of daily profit lost when every price moves 1% against the strategy, and its robustness label"""
+        # price_gradients columns are the item index, so unpriced items are the zeros of the price array
+        price_vector = self.get_dense_tables().price.astype(float)
+        exposure = np.abs(gradients.to_numpy()) @ price_vector / 100.0
+        profits = np.asarray(profits, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sensitivity = np.where(profits > 0, exposure / profits * 100, 0.0)
+        robustness = np.select(
+            [profits <= 0, sensitivity < 5, sensitivity < 15],
+            ["N/A", "High", "Medium"],
+            default="Low"
+        )
+        return sensitivity, robustness
 
-        if sensitivity < 5:
-            robustness = "High"
-        elif sensitivity < 15:
-            robustness = "Medium"
+    def rank_by_robustness(self, results=None):
+        """Rank every strategy by how large a uniform adverse price shock it survives"""
+        import pandas as pd
+        results = results or self.last_results or {}
+        gradients = self.price_gradients(results.get('optimal_strategies', pd.DataFrame()),
+                                         results.get('gathering', pd.DataFrame()))
+        profits = np.concatenate([
+            frame['Daily Profit'].to_numpy(dtype=float)
+            for frame in (results.get('gathering', pd.DataFrame()), results.get('optimal_strategies', pd.DataFrame()))
+            if not frame.empty
+        ] or [np.zeros(0)])
+        sensitivity, robustness = self._sensitivity_arrays(gradients, profits)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            break_even = np.where(sensitivity > 0, 100.0 / sensitivity, np.inf)
+        ranking = pd.DataFrame({
+            'Method': gradients.index,
+            'Daily Profit': profits,
+            'Sensitivity': sensitivity,
+            'Break-even Shock %': np.where(profits > 0, break_even, 0.0),
+            'Robustness': robustness
+        })
+        return ranking.sort_values(by=['Break-even Shock %', 'Daily Profit'], ascending=False)
+
+    def calculate_sensitivity(self, optimal_result, product=None):
+        """Calculate sensitivity for a given optimal result
+
+        ``optimal_result`` is a find_optimal_strategies row (a Series named
+        after its product) or a plain mapping with the same columns, in which
+        case ``product`` names the crafted product.
+        """
+        import pandas as pd
+        product = getattr(optimal_result, 'name', None) if product is None else product
+        if product is None:
+            raise ValueError("calculate_sensitivity needs the product of a mapping row")
+        row = {'Gathered Units': 0, 'Gather Item': None, **optimal_result}
+        frame = pd.DataFrame([row], index=[product])
+        gradients = self.price_gradients(frame, pd.DataFrame())
+        sensitivity, robustness = self._sensitivity_arrays(gradients, frame['Daily Profit'])
+        return float(sensitivity[0]), str(robustness[0])
+
+    def build_comprehensive(self, results):
+        """Combine gathering and optimal strategies into one ranked comparison (run_analysis's 'comprehensive')"""
+        comparison_cols = ['Method', 'Type', 'Daily Profit', 'Luno/Focus']
+        comprehensive_dfs = []
+
+        # Add gathering strategies
+        if not results['gathering'].empty:
+            gathering_compare = results['gathering'][comparison_cols].copy()
+            comprehensive_dfs.append(gathering_compare)
+
+        # Add optimal strategies
+        if not results['optimal_strategies'].empty:
+            optimal_compare = results['optimal_strategies'][comparison_cols].copy()
+            comprehensive_dfs.append(optimal_compare)
+
+        # Combine and remove duplicates
+        with self.stats.stage('dataframe'):
+            return self._combine_comprehensive(comprehensive_dfs, comparison_cols)
+
+    @staticmethod
+    def _combine_comprehensive(comprehensive_dfs, comparison_cols):
+        import pandas as pd
+        if comprehensive_dfs:
+            comprehensive_df = pd.concat(comprehensive_dfs, ignore_index=True)
+            # Remove exact duplicates based on key metrics
+            comprehensive_df = comprehensive_df.drop_duplicates(subset=['Method', 'Daily Profit', 'Luno/Focus'])
+            return comprehensive_df.sort_values(by='Daily Profit', ascending=False)
+        return pd.DataFrame(columns=comparison_cols)
+
+    def add_sensitivity(self, optimal_df):
+        """Add Sensitivity/Robustness columns to an optimal strategies DataFrame, in place"""
+        import pandas as pd
+        if optimal_df.empty:
+            # Same columns as a non-empty result, so patched and fresh results line up
+            sensitivity, robustness = np.zeros(0), np.zeros(0, dtype=object)
         else:
-            robustness = "Low"
+            gradients = self.price_gradients(optimal_df, pd.DataFrame())
+            sensitivity, robustness = self._sensitivity_arrays(gradients, optimal_df['Daily Profit'])
+        optimal_df['Sensitivity'] = sensitivity
+        optimal_df['Robustness'] = robustness
+
+    def _analysis_state(self):
+        return (self.daily_focus, self.data_version)
+
+    @staticmethod
+    def _patch_rows(df, keys, patch, sort_by):
+        """Replace the rows of ``df`` indexed by ``keys`` with the rows of ``patch``"""
+        import pandas as pd
+        frames = [frame for frame in (df[~df.index.isin(list(keys))], patch) if not frame.empty]
+        if not frames:
+            return df.iloc[0:0]
+        return pd.concat(frames).sort_values(by=sort_by, ascending=False)
+
+    def update_prices(self, delta):
+        """Apply price changes and recompute only the results that depend on them
+
+        ``delta`` maps item -> new price (None removes the price). The cached
+        run_analysis results are patched in place and returned; when there are
+        no up-to-date cached results this falls back to a full run_analysis.
+        """
+        results = self.last_results
+        cached_is_current = results is not None and self._results_state == self._analysis_state()
+
+        for item, price in delta.items():
+            if price is None:
+                self.prices.pop(item, None)
+            else:
+                self.prices[item] = price
+
+        if not cached_is_current:
+            return self.run_analysis()
+
+        index = self.get_dependency_index()
+        gather_items = set()
+        products = set()
+        for item in delta:
+            dependents = index.get(item)
+            if dependents:
+                gather_items |= dependents['gathering']
+                products |= dependents['products']
+
+        if gather_items:
+            results['gathering'] = self._patch_rows(
+                results['gathering'], gather_items, self.calculate_only_gathering(gather_items), 'Luno/Focus'
+            )
+        if products:
+            patch = self.find_optimal_strategies(products)
+            self.add_sensitivity(patch)
+            results['optimal_strategies'] = self._patch_rows(
+                results['optimal_strategies'], products, patch, 'Daily Profit'
+            )
+        if gather_items or products:
+            results['comprehensive'] = self.build_comprehensive(results)
+
+        self._results_state = self._analysis_state()
+        return results
+
+    def run_analysis_with_prices(self, prices):
+        """Run the full analysis against another price set, leaving live prices and cached results untouched"""
+        live_prices = dict(self.prices)
+        live_results = self.last_results
+        live_is_current = live_results is not None and self._results_state == self._analysis_state()
+        self.prices = {**live_prices, **prices}
+        try:
+            return self.run_analysis()
+        finally:
+            self.prices = live_prices
+            self.last_results = live_results
+            self._results_state = self._analysis_state() if live_is_current else None
 
-        return sensitivity, robustness
+    def analyze_historical(self, history, at=None, window=None):
+        """Run the full analysis against a PriceHistory snapshot (``at``) or its rolling mean (``window``)"""
+        prices = history.smoothed(window) if window else history.snapshot(at)
+        return self.run_analysis_with_prices(prices)
 
     def run_analysis(self):
         """Run the full profit analysis and return results as a dictionary of DataFrames"""
+        stats = self.stats
         try:
             results = {}
+            with stats.profiling(), stats.stage('run_analysis'):
+                # 1. ONLY GATHERING
+                with stats.stage('gathering'):
+                    results['gathering'] = self.calculate_only_gathering()
 
-            # 1. ONLY GATHERING
-            results['gathering'] = self.calculate_only_gathering()
-
-            # 2. OPTIMAL STRATEGIES (sin duplicados)
-            results['optimal_strategies'] = self.find_optimal_strategies()
-
-            # 3. COMPREHENSIVE COMPARISON (combinar gathering + optimal strategies)
-            comparison_cols = ['Method', 'Type', 'Daily Profit', 'Luno/Focus']
-            comprehensive_dfs = []
+                # 2. OPTIMAL STRATEGIES (sin duplicados)
+                with stats.stage('optimal_strategies'):
+                    results['optimal_strategies'] = self.find_optimal_strategies()
 
-            # Add gathering strategies
-            if not results['gathering'].empty:
-                gathering_compare = results['gathering'][comparison_cols].copy()
-                comprehensive_dfs.append(gathering_compare)
+                # 3. COMPREHENSIVE COMPARISON (combinar gathering + optimal strategies)
+                with stats.stage('comprehensive'):
+                    results['comprehensive'] = self.build_comprehensive(results)
 
-            # Add optimal strategies
-            if not results['optimal_strategies'].empty:
-                optimal_compare = results['optimal_strategies'][comparison_cols].copy()
-                comprehensive_dfs.append(optimal_compare)
-
-            # Combine and remove duplicates
-            if comprehensive_dfs:
-                comprehensive_df = pd.concat(comprehensive_dfs, ignore_index=True)
-                # Remove exact duplicates based on key metrics
-                comprehensive_df = comprehensive_df.drop_duplicates(subset=['Method', 'Daily Profit', 'Luno/Focus'])
-                results['comprehensive'] = comprehensive_df.sort_values(by='Daily Profit', ascending=False)
-            else:
-                results['comprehensive'] = pd.DataFrame(columns=comparison_cols)
-
-            # Calculate sensitivity for optimal strategies
-            if not results['optimal_strategies'].empty:
-                results['optimal_strategies'][['Sensitivity', 'Robustness']] = results['optimal_strategies'].apply(
-                    lambda row: self.calculate_sensitivity(row),
-                    axis=1,
-                    result_type='expand'
-                )
+                # Calculate sensitivity for optimal strategies
+                with stats.stage('sensitivity'):
+                    self.add_sensitivity(results['optimal_strategies'])
 
+            self.last_results = results
+            self._results_state = self._analysis_state()
             return results
 
         except Exception as e:
+            stats.error('run_analysis', e)
             print(f"An error occurred during analysis: {e}")
             import traceback
             traceback.print_exc()
@@ -520,6 +1598,7 @@ if __name__ == "__main__":
             
             if key == 'optimal_strategies':
                 # Show ALL optimal strategies (no limit)
+                df = calculator.format_strategy_details(df)
                 important_cols = ['Method', 'Crafted Units', 'Daily Profit', 'Luno/Focus', 
                                 'Focus Allocation', 'Total Materials Needed', 'You Will Gather', 
                                 'You Need To Buy', 'Other Materials Needed', 'Optimization Method']
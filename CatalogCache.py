@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+BLUE PROTOCOL - COMPILED CATALOG CACHE
+
+Converts RecipesData.json, all_recipes.csv and all_collectable.csv into a
+columnar binary form (one .npy file per column, dense integer IDs, inputs
+and outputs stored as CSR offset arrays). The compiled catalog is keyed by
+the size/mtime/hash of each source and memory-mapped on load, so only the
+first start after a source changes pays the JSON/CSV parsing cost.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+CATALOG_FORMAT_VERSION = 1
+CATALOG_SOURCES = ('RecipesData.json', 'all_recipes.csv', 'all_collectable.csv')
+DEFAULT_CACHE_DIR = ".catalog"
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fingerprint(path, previous=None):
+    """Size/mtime stamp of a source, plus its hash (reused when the stamp is unchanged)"""
+    stat = os.stat(path)
+    stamp = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if previous and previous.get('size') == stamp['size'] and previous.get('mtime_ns') == stamp['mtime_ns']:
+        stamp['sha256'] = previous['sha256']
+    else:
+        stamp['sha256'] = _file_hash(path)
+    return stamp
+
+
+def _read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def _to_int(value, default=-1):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _to_float(value):
+    return np.nan if value is None else float(value)
+
+
+def _strings(values):
+    """Fixed-width unicode array (memory-mappable, unlike object arrays)"""
+    values = ['' if value is None else str(value) for value in values]
+    return np.array(values, dtype=f"U{max([1] + [len(v) for v in values])}")
+
+
+def _build_columns(config_path):
+    """Parse the sources and return a dict of column name -> NumPy array"""
+    with open(os.path.join(config_path, 'RecipesData.json'), encoding='utf-8') as f:
+        records = json.load(f)
+
+    item_index = {}
+    item_ids = []
+    item_names = []
+
+    def intern(raw_id, name):
+        key = str(raw_id)
+        if key not in item_index:
+            item_index[key] = len(item_ids)
+            item_ids.append(_to_int(key))
+            item_names.append(name)
+        return item_index[key]
+
+    recipe_ids, recipe_names, recipe_focus, recipe_category, recipe_grade = [], [], [], [], []
+    input_offsets, input_item, input_amount, input_variable = [0], [], [], []
+    output_offsets, output_item, output_rate, output_min, output_max, output_amount = [0], [], [], [], [], []
+
+    for record in records:
+        recipe_ids.append(_to_int(record.get('id')))
+        recipe_names.append(record.get('name'))
+        recipe_focus.append(_to_float(record.get('FocusCost')))
+        recipe_category.append(record.get('mainCategory'))
+        recipe_grade.append(_to_int(record.get('grade')))
+
+        for entry in record.get('input_data') or []:
+            input_item.append(intern(entry['input_id'], entry.get('item_name')))
+            input_amount.append(_to_float(entry.get('amount')))
+            input_variable.append(bool(entry.get('isVariable')))
+        input_offsets.append(len(input_item))
+
+        for entry in record.get('output_data') or []:
+            output_item.append(intern(entry['output_id'], entry.get('item_name')))
+            output_rate.append(_to_float(entry.get('rate')))
+            output_min.append(_to_float(entry.get('minAmount')))
+            output_max.append(_to_float(entry.get('maxAmount')))
+            output_amount.append(_to_float(entry.get('amount')))
+        output_offsets.append(len(output_item))
+
+    listing = _read_csv(os.path.join(config_path, 'all_recipes.csv'))
+    collectables = _read_csv(os.path.join(config_path, 'all_collectable.csv'))
+
+    return {
+        'item_id': np.array(item_ids, dtype=np.int64),
+        'item_name': _strings(item_names),
+
+        'recipe_id': np.array(recipe_ids, dtype=np.int64),
+        'recipe_name': _strings(recipe_names),
+        'recipe_focus_cost': np.array(recipe_focus, dtype=np.float64),
+        'recipe_category': _strings(recipe_category),
+        'recipe_grade': np.array(recipe_grade, dtype=np.int16),
+
+        'input_offsets': np.array(input_offsets, dtype=np.int32),
+        'input_item': np.array(input_item, dtype=np.int32),
+        'input_amount': np.array(input_amount, dtype=np.float64),
+        'input_variable': np.array(input_variable, dtype=bool),
+
+        'output_offsets': np.array(output_offsets, dtype=np.int32),
+        'output_item': np.array(output_item, dtype=np.int32),
+        'output_rate': np.array(output_rate, dtype=np.float64),
+        'output_min': np.array(output_min, dtype=np.float64),
+        'output_max': np.array(output_max, dtype=np.float64),
+        'output_amount': np.array(output_amount, dtype=np.float64),
+
+        'listing_id': np.array([_to_int(row.get('id')) for row in listing], dtype=np.int64),
+        'listing_name': _strings(row.get('name') for row in listing),
+        'listing_category': _strings(row.get('mainCategory') for row in listing),
+        'listing_created_at': _strings(row.get('createdAt') for row in listing),
+        'listing_disabled': np.array([row.get('isDisabled') == 'True' for row in listing], dtype=bool),
+
+        'collectable_id': np.array([_to_int(row.get('id')) for row in collectables], dtype=np.int64),
+        'collectable_name': _strings(row.get('name') for row in collectables),
+        'collectable_grade': np.array([_to_int(row.get('grade')) for row in collectables], dtype=np.int16),
+        'collectable_category': _strings(row.get('mainCategory') for row in collectables),
+    }
+
+
+class Catalog:
+    """Memory-mapped compiled catalog; every column is exposed as a read-only array attribute"""
+
+    def __init__(self, cache_dir, columns):
+        self.cache_dir = cache_dir
+        self.columns = columns
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get('columns', {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    @property
+    def n_items(self):
+        return len(self.columns['item_id'])
+
+    @property
+    def n_recipes(self):
+        return len(self.columns['recipe_id'])
+
+    def recipe_inputs(self, recipe_index):
+        """Slice of (dense item ids, amounts, variable flags) for one recipe"""
+        start, end = self.input_offsets[recipe_index], self.input_offsets[recipe_index + 1]
+        return self.input_item[start:end], self.input_amount[start:end], self.input_variable[start:end]
+
+    def recipe_outputs(self, recipe_index):
+        """Slice of (dense item ids, rates, min, max, amounts) for one recipe"""
+        start, end = self.output_offsets[recipe_index], self.output_offsets[recipe_index + 1]
+        return (self.output_item[start:end], self.output_rate[start:end], self.output_min[start:end],
+                self.output_max[start:end], self.output_amount[start:end])
+
+
+def _cache_dir(config_path, cache_dir):
+    return cache_dir or os.path.join(config_path, DEFAULT_CACHE_DIR)
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'manifest.json')) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _sources_changed(config_path, manifest):
+    """Compare current source fingerprints against the manifest; returns (changed, fingerprints)"""
+    previous = (manifest or {}).get('sources', {})
+    fingerprints = {name: _fingerprint(os.path.join(config_path, name), previous.get(name))
+                    for name in CATALOG_SOURCES}
+    if not manifest or manifest.get('format_version') != CATALOG_FORMAT_VERSION:
+        return True, fingerprints
+    changed = any(fingerprints[name]['sha256'] != previous.get(name, {}).get('sha256')
+                  for name in CATALOG_SOURCES)
+    return changed, fingerprints
+
+
+def _write_manifest(cache_dir, fingerprints, columns):
+    manifest = {
+        'format_version': CATALOG_FORMAT_VERSION,
+        'sources': fingerprints,
+        'columns': sorted(columns)
+    }
+    tmp_path = os.path.join(cache_dir, 'manifest.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(cache_dir, 'manifest.json'))
+
+
+def compile_catalog(config_path="config", cache_dir=None, force=False):
+    """Compile the catalog sources into the binary cache if any source changed; returns the cache dir"""
+    cache_dir = _cache_dir(config_path, cache_dir)
+    manifest = _read_manifest(cache_dir)
+    changed, fingerprints = _sources_changed(config_path, manifest)
+
+    if not changed and not force:
+        if fingerprints != manifest['sources']:
+            # Touched but identical content: refresh the stamps so the next check skips hashing
+            _write_manifest(cache_dir, fingerprints, manifest['columns'])
+        return cache_dir
+
+    columns = _build_columns(config_path)
+
+    # Write into a sibling directory and swap it in, so readers never see a half-built cache
+    staging_dir = cache_dir + ".tmp"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+    for name, array in columns.items():
+        np.save(os.path.join(staging_dir, f"{name}.npy"), array, allow_pickle=False)
+    _write_manifest(staging_dir, fingerprints, columns)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(staging_dir, cache_dir)
+    return cache_dir
+
+
+def load_catalog(config_path="config", cache_dir=None, rebuild=True):
+    """Load the compiled catalog as memory-mapped arrays, compiling it first when stale"""
+    cache_dir = _cache_dir(config_path, cache_dir)
+    if rebuild:
+        compile_catalog(config_path, cache_dir)
+
+    manifest = _read_manifest(cache_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No compiled catalog found in {cache_dir}")
+
+    columns = {name: np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode='r', allow_pickle=False)
+               for name in manifest['columns']}
+    return Catalog(cache_dir, columns)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    config_path = args[0] if args else "config"
+    start = time.perf_counter()
+    compile_catalog(config_path, force='--force' in sys.argv)
+    catalog = load_catalog(config_path, rebuild=False)
+    elapsed = time.perf_counter() - start
+    print(f"Catalog ready in {catalog.cache_dir}: {catalog.n_recipes} recipes, "
+          f"{catalog.n_items} items, {len(catalog.collectable_id)} collectables ({elapsed * 1000:.1f} ms)")
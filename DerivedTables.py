@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+BLUE PROTOCOL - DERIVED MECHANICS TABLES
+
+Builds the calculator's gatherable, craftable and recipes tables from the
+scraped catalog (RecipesData.json FocusCost/inputs/outputs and
+all_collectable.csv) instead of the hand-written JSON files. The hand-written
+tables are layered on top: any entry they define replaces the derived one,
+and their item spellings (linked through item_ids.json, see ItemIndex) are
+used for the scraped items they refer to. The catalog has no gathering
+mechanics, so derived gatherables borrow those of the hand-written nodes
+(flagged ``'assumed': True``); as those numbers are invented they are only
+offered as gathering strategies on request (``assumed_gatherables``), and
+otherwise stay plain bought ingredients. The merged tables are cached next to
+the compiled catalog and rebuilt when a source or an override changes;
+derived entries the current prices cannot value are left out of the returned
+tables.
+"""
+
+import hashlib
+import json
+import os
+
+from CatalogCache import load_catalog
+from ItemIndex import ITEM_IDS_FILE, ItemIndex, load_item_id_overrides
+
+DERIVED_TABLES_FILE = 'derived_tables.json'
+DERIVED_FORMAT_VERSION = 2
+OVERRIDE_SOURCES = ('gatherable.json', 'craftable.json', 'recipes.json', ITEM_IDS_FILE)
+
+# The scraped collectables carry no gathering mechanics; used when gatherable.json has no node to copy
+DEFAULT_GATHER_FOCUS_COST = 20
+DEFAULT_GATHER_YIELD = 10
+
+
+def _load_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def _quantity(amount):
+    """Recipe amounts are floats in the catalog; keep whole numbers as int like the hand tables"""
+    return int(amount) if float(amount).is_integer() else float(amount)
+
+
+def gather_defaults(hand_gatherable):
+    """Job -> assumed {'focus_cost', 'yield'} of a gathering node: the most common among the hand-written ones
+
+    The None key holds the most common over every job, for jobs the
+    hand-written table does not cover.
+    """
+    counts = {}
+    for mech in hand_gatherable.values():
+        mechanics = (mech['focus_cost'], mech['yield'])
+        for job in (str(mech.get('Job', '')).title(), None):
+            job_counts = counts.setdefault(job, {})
+            job_counts[mechanics] = job_counts.get(mechanics, 0) + 1
+    defaults = {job: max(job_counts, key=job_counts.get) for job, job_counts in counts.items()}
+    defaults.setdefault(None, (DEFAULT_GATHER_FOCUS_COST, DEFAULT_GATHER_YIELD))
+    return {job: {'focus_cost': cost, 'yield': amount} for job, (cost, amount) in defaults.items()}
+
+
+def derive_tables(catalog, defaults=None):
+    """(gatherable, craftable, recipes) keyed by scraped item name
+
+    A recipe is used when it has a focus cost, an output and at least one
+    input. Its product is the first output and its yield the guaranteed
+    (minimum) amount of it; of the interchangeable (variable) inputs the first
+    one is taken. When several recipes make an item of the same name, the
+    first one wins. Gatherables get the mechanics of ``defaults`` (see
+    gather_defaults) for their job, marked ``'assumed': True``.
+    """
+    defaults = defaults or gather_defaults({})
+    names = catalog.item_name.tolist()
+    input_offsets = catalog.input_offsets.tolist()
+    input_item = catalog.input_item.tolist()
+    input_amount = catalog.input_amount.tolist()
+    input_variable = catalog.input_variable.tolist()
+    output_offsets = catalog.output_offsets.tolist()
+    output_item = catalog.output_item.tolist()
+    output_min = catalog.output_min.tolist()
+    output_amount = catalog.output_amount.tolist()
+
+    craftable = {}
+    recipes = {}
+    for index, (focus_cost, category) in enumerate(zip(catalog.recipe_focus_cost.tolist(),
+                                                       catalog.recipe_category.tolist())):
+        first_output = output_offsets[index]
+        inputs = range(input_offsets[index], input_offsets[index + 1])
+        if focus_cost != focus_cost or focus_cost <= 0 or first_output == output_offsets[index + 1] or not inputs:
+            continue
+        product = names[output_item[first_output]]
+        amount = output_min[first_output]
+        amount = output_amount[first_output] if amount != amount else amount
+        if product in craftable or amount != amount or int(amount) < 1:
+            continue
+
+        ingredients = {}
+        variable_taken = False
+        for position in inputs:
+            if input_variable[position]:
+                if variable_taken:
+                    continue
+                variable_taken = True
+            name = names[input_item[position]]
+            ingredients[name] = ingredients.get(name, 0) + _quantity(input_amount[position])
+
+        craftable[product] = {'focus_cost': int(focus_cost), 'yield': int(amount), 'Job': category.title()}
+        recipes[product] = ingredients
+
+    gatherable = {}
+    for name, category in zip(catalog.collectable_name.tolist(), catalog.collectable_category.tolist()):
+        job = category.title()
+        gatherable.setdefault(name, {**defaults.get(job, defaults[None]), 'Job': job, 'assumed': True})
+    return gatherable, craftable, recipes
+
+
+def _hand_names(hand, overrides):
+    names = dict.fromkeys(overrides)
+    for table in ('gatherable', 'craftable', 'recipes'):
+        names.update(dict.fromkeys(hand[table]))
+    for ingredients in hand['recipes'].values():
+        names.update(dict.fromkeys(ingredients))
+    return list(names)
+
+
+def _aliases(catalog, hand, overrides):
+    """Scraped name -> hand-written name for every hand-written item spelled differently in the catalog"""
+    index = ItemIndex(_hand_names(hand, overrides))
+    index.link_scraped(catalog.item_id, catalog.item_name, overrides)
+    scraped_names = dict(zip(catalog.item_id.tolist(), catalog.item_name.tolist()))
+    aliases = {}
+    for name, scraped_id in zip(index.names, index.scraped_ids.tolist()):
+        scraped_name = scraped_names.get(scraped_id)
+        if scraped_name is not None and scraped_name != name:
+            aliases.setdefault(scraped_name, name)
+    return aliases
+
+
+def merge_tables(derived, hand, aliases):
+    """Rename derived items to their hand-written spelling and put the hand-written entries on top"""
+    gatherable, craftable, recipes = derived
+
+    def rename(name):
+        return aliases.get(name, name)
+
+    derived = {
+        'gatherable': {rename(item): mech for item, mech in gatherable.items()},
+        'craftable': {rename(item): mech for item, mech in craftable.items()},
+        'recipes': {rename(product): {rename(item): qty for item, qty in ingredients.items()}
+                    for product, ingredients in recipes.items()}
+    }
+    return {table: {**hand[table], **{key: value for key, value in derived[table].items() if key not in hand[table]}}
+            for table in derived}
+
+
+def drop_unpriced(tables, prices, hand):
+    """Leave out the derived gatherables without a price and the derived recipes whose product or an
+    ingredient has none: the analysis could only skip them (with a warning each). Hand-written entries stay."""
+    gatherable = {item: mech for item, mech in tables['gatherable'].items()
+                  if item in prices or item in hand['gatherable']}
+    recipes = {product: ingredients for product, ingredients in tables['recipes'].items()
+               if product in hand['recipes'] or all(item in prices for item in [product, *ingredients])}
+    craftable = {item: mech for item, mech in tables['craftable'].items()
+                 if item in recipes or item in hand['craftable']}
+    return {'gatherable': gatherable, 'craftable': craftable, 'recipes': recipes}
+
+
+def drop_assumed(tables):
+    """Leave out the gatherables whose mechanics were assumed rather than hand-written"""
+    gatherable = {item: mech for item, mech in tables['gatherable'].items() if not mech.get('assumed')}
+    return {**tables, 'gatherable': gatherable}
+
+
+def _overrides_hash(config_path):
+    digest = hashlib.sha256()
+    for name in OVERRIDE_SOURCES:
+        path = os.path.join(config_path, name)
+        digest.update(name.encode())
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def build_tables(config_path="config", cache_dir=None, force=False, assumed_gatherables=False):
+    """Prices plus derived-and-overridden mechanics tables, in the shape ProfitCalculatorOptimized(tables=) takes
+
+    The merged mechanics are cached in the compiled catalog directory; a
+    change to the catalog sources recompiles (and so empties) that directory
+    and a change to a hand-written table changes the cache key. Gatherables
+    with assumed mechanics are only included with ``assumed_gatherables``.
+    """
+    catalog = load_catalog(config_path, cache_dir)
+    cache_path = os.path.join(catalog.cache_dir, DERIVED_TABLES_FILE)
+    key = _overrides_hash(config_path)
+
+    hand = {table: _load_json(os.path.join(config_path, f"{table}.json"), {})
+            for table in ('gatherable', 'craftable', 'recipes')}
+    cached = None if force else _load_json(cache_path, None)
+    if cached and cached.get('format_version') == DERIVED_FORMAT_VERSION and cached.get('overrides') == key:
+        tables = cached['tables']
+    else:
+        overrides = load_item_id_overrides(config_path)
+        derived = derive_tables(catalog, gather_defaults(hand['gatherable']))
+        tables = merge_tables(derived, hand, _aliases(catalog, hand, overrides))
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'format_version': DERIVED_FORMAT_VERSION, 'overrides': key, 'tables': tables}, f)
+        os.replace(tmp_path, cache_path)
+
+    with open(os.path.join(config_path, "market_prices.json")) as f:
+        prices = json.load(f)
+    tables = drop_unpriced(tables, prices, hand)
+    if not assumed_gatherables:
+        tables = drop_assumed(tables)
+    return {'prices': prices, **tables}
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    config_path = args[0] if args else "config"
+    start = time.perf_counter()
+    tables = build_tables(config_path, force='--force' in sys.argv,
+                          assumed_gatherables='--assumed-gatherables' in sys.argv)
+    elapsed = time.perf_counter() - start
+    print(f"Derived {len(tables['craftable'])} craftable products, {len(tables['recipes'])} recipes and "
+          f"{len(tables['gatherable'])} gatherables from {config_path} ({elapsed * 1000:.1f} ms)")
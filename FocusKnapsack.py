@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+BLUE PROTOCOL - GLOBAL FOCUS ALLOCATION (INTEGER KNAPSACK)
+"""
+
+import math
+
+import numpy as np
+
+
+def _binary_chunks(count):
+    """Split ``count`` copies into chunks 1, 2, 4, ..., rest (any 0..count is a subset sum)"""
+    chunks = []
+    size = 1
+    while count > 0:
+        take = min(size, count)
+        chunks.append(take)
+        count -= take
+        size *= 2
+    return chunks
+
+
+def solve_focus_knapsack(costs, values, budget, max_counts=None):
+    """Pick session counts per activity maximizing total value under a shared focus budget
+
+    ``costs`` are focus costs per session, ``values`` profits per session and
+    ``max_counts`` optional per-activity session caps (None = unbounded).
+    Bounded knapsack by binary splitting, with a dynamic program over focus
+    units (the gcd of the costs) vectorized over the whole budget axis.
+    Returns (best_value, counts); ValueError for a fractional cost.
+    """
+    costs = list(costs)
+    if any(isinstance(c, bool) or float(c) != int(c) for c in costs):
+        raise ValueError(f"focus costs must be whole numbers, got {costs!r}")
+    costs = [int(c) for c in costs]
+    n = len(costs)
+    counts = np.zeros(n, dtype=np.int64)
+    if n == 0 or budget <= 0:
+        return 0.0, counts
+
+    unit = math.gcd(*costs)
+    capacity = int(budget) // unit
+    unit_costs = [c // unit for c in costs]
+
+    chunk_activity = []
+    chunk_size = []
+    for activity, (cost, value) in enumerate(zip(unit_costs, values)):
+        if value <= 0 or cost <= 0 or cost > capacity:
+            continue
+        limit = capacity // cost
+        if max_counts is not None and max_counts[activity] is not None:
+            limit = min(limit, int(max_counts[activity]))
+        for size in _binary_chunks(limit):
+            chunk_activity.append(activity)
+            chunk_size.append(size)
+
+    # 0/1 knapsack over the chunks; take[k, b] records whether chunk k improved budget b
+    dp = np.zeros(capacity + 1)
+    take = np.zeros((len(chunk_activity), capacity + 1), dtype=bool)
+    for k, (activity, size) in enumerate(zip(chunk_activity, chunk_size)):
+        weight = unit_costs[activity] * size
+        if weight > capacity:
+            continue
+        candidate = dp[:capacity + 1 - weight] + values[activity] * size
+        improved = candidate > dp[weight:]
+        take[k, weight:] = improved
+        dp[weight:] = np.where(improved, candidate, dp[weight:])
+
+    b = capacity
+    for k in range(len(chunk_activity) - 1, -1, -1):
+        if take[k, b]:
+            activity = chunk_activity[k]
+            counts[activity] += chunk_size[k]
+            b -= unit_costs[activity] * chunk_size[k]
+
+    return float(dp[capacity]), counts
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+BLUE PROTOCOL - RUN INSTRUMENTATION
+
+Stage timings, hot-path counters and skip reasons for one or more analysis
+runs. The calculator holds NULL_STATS unless instrumentation is enabled, so
+when it is off every hook is a no-op method call.
+"""
+
+import cProfile
+import time
+from contextlib import contextmanager
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullStats:
+    """Instrumentation switched off: every hook does nothing"""
+
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name):
+        return self._stage
+
+    def count(self, name, n=1):
+        pass
+
+    def skip(self, reason, key=None):
+        pass
+
+    def error(self, where, exc):
+        pass
+
+    def profiling(self):
+        return self._stage
+
+
+NULL_STATS = NullStats()
+
+
+class RunStats:
+    """Per-stage wall time, counters and skipped work collected while instrumentation is on
+
+    Stages nest: a stage opened inside another is recorded as
+    ``outer/inner``. ``examples`` keeps the first few keys per skip reason.
+    """
+
+    enabled = True
+
+    def __init__(self, profile=False, examples=5):
+        self.stages = {}
+        self.counters = {}
+        self.skipped = {}
+        self.skip_examples = {}
+        self.errors = []
+        self.examples = examples
+        self.profiler = cProfile.Profile() if profile else None
+        self._path = []
+
+    @contextmanager
+    def stage(self, name):
+        self._path.append(name)
+        key = "/".join(self._path)
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            entry = self.stages.setdefault(key, {'calls': 0, 'seconds': 0.0})
+            entry['calls'] += 1
+            entry['seconds'] += time.perf_counter() - start
+            self._path.pop()
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def skip(self, reason, key=None):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+        examples = self.skip_examples.setdefault(reason, [])
+        if key is not None and len(examples) < self.examples:
+            examples.append(key)
+
+    def error(self, where, exc):
+        self.errors.append({'where': where, 'error': f"{type(exc).__name__}: {exc}"})
+
+    @contextmanager
+    def profiling(self):
+        """Run the block under cProfile when profiling was requested"""
+        if self.profiler is None:
+            yield self
+            return
+        self.profiler.enable()
+        try:
+            yield self
+        finally:
+            self.profiler.disable()
+
+    def dump_profile(self, path):
+        """Write the collected cProfile data (readable with pstats / snakeviz)"""
+        if self.profiler is None:
+            print("No profile collected: enable instrumentation with profile=True")
+            return False
+        self.profiler.dump_stats(path)
+        return True
+
+    def to_dict(self):
+        return {
+            'stages': self.stages,
+            'counters': self.counters,
+            'skipped': self.skipped,
+            'skip_examples': {reason: [list(k) if isinstance(k, tuple) else k for k in keys]
+                              for reason, keys in self.skip_examples.items()},
+            'errors': self.errors
+        }
+
+    def report(self):
+        """Human-readable summary of the collected stats"""
+        lines = [f"{'Stage':<50}{'Calls':>7}{'Total ms':>12}"]
+        lines.append("-" * 69)
+        for key, entry in self.stages.items():
+            lines.append(f"{key:<50}{entry['calls']:>7}{entry['seconds'] * 1000:>12.2f}")
+        if self.counters:
+            lines.append("")
+            lines.extend(f"{name:<50}{value:>19,}" for name, value in self.counters.items())
+        if self.skipped:
+            lines.append("")
+            for reason, count in self.skipped.items():
+                examples = ", ".join(str(k) for k in self.skip_examples.get(reason, []))
+                lines.append(f"skipped: {reason:<41}{count:>19,}" + (f"  e.g. {examples}" if examples else ""))
+        for error in self.errors:
+            lines.append(f"error in {error['where']}: {error['error']}")
+        return "\n".join(lines)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+BLUE PROTOCOL - ITEM INTERNING AND DENSE TABLES
+
+ItemIndex gives every item name used by the config tables a dense integer
+id and links it to the numeric id of the scraped catalog (all_recipes.csv,
+all_collectable.csv, input_id/output_id in RecipesData.json). DenseTables
+holds prices, gathering/crafting mechanics and the recipe matrix as arrays
+indexed by those dense ids, so the hot paths index arrays instead of
+looking names up in dicts.
+"""
+
+import json
+import os
+import re
+
+import numpy as np
+
+ITEM_IDS_FILE = 'item_ids.json'
+
+
+def normalize_name(name):
+    """Case-, hyphen- and spacing-insensitive form of an item name"""
+    return re.sub(r'[\s\-_]+', ' ', str(name)).strip().lower()
+
+
+def load_item_id_overrides(config_path="config"):
+    """Explicit item name -> scraped id links from config/item_ids.json (empty when absent)"""
+    try:
+        with open(os.path.join(config_path, ITEM_IDS_FILE)) as f:
+            return {name: int(item_id) for name, item_id in json.load(f).items()}
+    except FileNotFoundError:
+        return {}
+
+
+def integer_mechanic(mech, field, item):
+    """``mech[field]`` as an int; ValueError when it is not a whole number (never truncated)"""
+    value = mech[field]
+    if isinstance(value, bool) or not isinstance(value, (int, float, np.integer, np.floating)) \
+            or not float(value).is_integer():
+        raise ValueError(f"{field} of '{item}' must be a whole number, got {value!r}")
+    return int(value)
+
+
+class ItemIndex:
+    """Append-only interning of item names as dense integers 0..n-1"""
+
+    def __init__(self, names=()):
+        self.names = []
+        self.ids = {}
+        self.scraped_ids = None
+        self._by_scraped = {}
+        for name in names:
+            self.intern(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def intern(self, name):
+        """Dense id of ``name``, assigning the next free one on first sight"""
+        item = self.ids.get(name)
+        if item is None:
+            item = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return item
+
+    def lookup(self, name):
+        """Dense id of an already interned name (KeyError otherwise)"""
+        return self.ids[name]
+
+    def lookup_many(self, names):
+        return np.fromiter((self.ids[name] for name in names), dtype=np.int64)
+
+    def link_scraped(self, scraped_ids, scraped_names, overrides=None):
+        """Attach the scraped numeric id of every item; returns the names that could not be linked
+
+        An explicit override wins, then an exact name match, then a match on
+        the normalized name. The first catalog entry wins for names that
+        appear under several ids (e.g. Master and Pro variants of an ore).
+        """
+        overrides = overrides or {}
+        exact = {}
+        normalized = {}
+        for scraped_id, name in zip(scraped_ids, scraped_names):
+            exact.setdefault(str(name), int(scraped_id))
+            normalized.setdefault(normalize_name(name), int(scraped_id))
+
+        linked = np.full(len(self.names), -1, dtype=np.int64)
+        for item, name in enumerate(self.names):
+            if name in overrides:
+                linked[item] = overrides[name]
+            elif name in exact:
+                linked[item] = exact[name]
+            else:
+                linked[item] = normalized.get(normalize_name(name), -1)
+        self.scraped_ids = linked
+        self._by_scraped = {int(scraped): item for item, scraped in enumerate(linked) if scraped >= 0}
+        return [name for name, scraped in zip(self.names, linked) if scraped < 0]
+
+    def from_scraped(self, scraped_id):
+        """Dense id of the item linked to a scraped numeric id (KeyError when unlinked)"""
+        return self._by_scraped[int(scraped_id)]
+
+
+class DenseTables:
+    """Config tables as arrays over an ItemIndex
+
+    Mechanics and the recipe matrix (CSR: ``recipe_offsets`` into
+    ``recipe_item``/``recipe_qty``, one row per recipe in recipes.json order)
+    only change with the structure; prices are refreshed with set_prices.
+    """
+
+    def __init__(self, index, gatherable, craftable, recipes):
+        self.index = index
+        n = len(index)
+        self.gather_cost = np.zeros(n, dtype=np.int64)
+        self.gather_yield = np.zeros(n, dtype=np.int64)
+        self.gather_rank = np.full(n, -1, dtype=np.int64)
+        self.gather_items = index.lookup_many(gatherable)
+        for rank, (name, mech) in enumerate(gatherable.items()):
+            item = index.lookup(name)
+            self.gather_cost[item] = integer_mechanic(mech, 'focus_cost', name)
+            self.gather_yield[item] = integer_mechanic(mech, 'yield', name)
+            self.gather_rank[item] = rank
+
+        self.craft_cost = np.zeros(n, dtype=np.int64)
+        self.craft_yield = np.zeros(n, dtype=np.int64)
+        self.craftable = np.zeros(n, dtype=bool)
+        for name, mech in craftable.items():
+            if name not in index:
+                continue  # mechanics without a recipe never enter a calculation
+            item = index.lookup(name)
+            self.craft_cost[item] = integer_mechanic(mech, 'focus_cost', name)
+            self.craft_yield[item] = integer_mechanic(mech, 'yield', name)
+            self.craftable[item] = True
+
+        self.recipe_product = index.lookup_many(recipes)
+        self.recipe_row = np.full(n, -1, dtype=np.int64)
+        self.recipe_row[self.recipe_product] = np.arange(len(recipes))
+        self.recipe_offsets = np.zeros(len(recipes) + 1, dtype=np.int64)
+        self.recipe_offsets[1:] = np.cumsum([len(ingredients) for ingredients in recipes.values()])
+        self.recipe_item = index.lookup_many(item for ingredients in recipes.values() for item in ingredients)
+        quantities = [qty for ingredients in recipes.values() for qty in ingredients.values()]
+        self.recipe_qty = np.array(quantities, dtype=np.asarray(quantities or [0]).dtype)
+        # Recipe row of every entry, for segment sums over the CSR arrays
+        self.entry_recipe = np.repeat(np.arange(len(recipes)), np.diff(self.recipe_offsets))
+
+        self.price = np.zeros(n, dtype=np.int64)
+        self.priced = np.zeros(n, dtype=bool)
+        self.data_version = None
+
+    def set_prices(self, prices):
+        """Load a price dict; returns False when it names an item the index does not know"""
+        if any(name not in self.index for name in prices):
+            return False
+        values = list(prices.values())
+        dtype = np.asarray(values or [0]).dtype
+        self.price = np.zeros(len(self.index), dtype=dtype if dtype.kind in 'iu' else np.float64)
+        self.priced = np.zeros(len(self.index), dtype=bool)
+        ids = self.index.lookup_many(prices)
+        if values:
+            self.price[ids] = values
+        self.priced[ids] = True
+        return True
+
+    def mask(self, names):
+        """Boolean mask over the index of the given names (unknown names are ignored)"""
+        mask = np.zeros(len(self.index), dtype=bool)
+        mask[[self.index.ids[name] for name in names if name in self.index]] = True
+        return mask
+
+    def recipe_entries(self, rows):
+        """CSR entries of the given recipe rows, and the position in ``rows`` each entry belongs to"""
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.recipe_offsets[rows]
+        lengths = self.recipe_offsets[rows + 1] - starts
+        owner = np.repeat(np.arange(len(rows)), lengths)
+        entries = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths - starts, lengths)
+        return entries, owner
+
+    def entry(self, product, item):
+        """CSR entry of ``item`` in the recipe of ``product`` (KeyError when it is not an ingredient)"""
+        row = self.recipe_row[self.index.lookup(product)]
+        if row >= 0:
+            start, end = self.recipe_offsets[row], self.recipe_offsets[row + 1]
+            found = np.flatnonzero(self.recipe_item[start:end] == self.index.lookup(item))
+            if len(found):
+                return start + found[0]
+        raise KeyError((product, item))
+
+    def unit_material_cost(self):
+        """Cost of one craft's ingredients per recipe row, and whether every ingredient is priced"""
+        cost = np.zeros(len(self.recipe_product), dtype=self.price.dtype)
+        np.add.at(cost, self.entry_recipe, self.recipe_qty * self.price[self.recipe_item])
+        unpriced = np.zeros(len(self.recipe_product), dtype=np.int64)
+        np.add.at(unpriced, self.entry_recipe, ~self.priced[self.recipe_item])
+        return cost, unpriced == 0
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+BLUE PROTOCOL - PARALLEL STRATEGY SEARCH
+
+Spreads ProfitCalculatorOptimized.strategy_records over a process pool. The
+config tables are serialized once into a shared memory block; every worker
+attaches to it in its initializer and keeps its own calculator for the life
+of the pool. Prices and the daily focus live in a second shared block, a
+float64 array over the pool's item names (NaN = no price) behind a small
+header, which the parent rewrites in place once per data version. A task
+only carries product names; a worker reloads the prices when the header's
+version moved, and returns a small numeric record array. Price and focus
+edits therefore reuse the pool; a recipe/mechanics change, a price curve
+edit or a price for an item the pool does not know starts a new one. Chunks
+are contiguous in recipe order and merged by product id, so the result is
+identical to the serial search.
+"""
+
+import json
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Header of the shared price block: write counter, daily focus
+_HEADER = 2
+
+_worker_calculator = None
+_worker_names = None
+_worker_state = None
+_worker_version = None
+
+
+def _init_worker(block_name, size, state_name, names):
+    global _worker_calculator, _worker_names, _worker_state, _worker_version
+    from Calculator import ProfitCalculatorOptimized
+
+    block = shared_memory.SharedMemory(name=block_name)
+    try:
+        tables = json.loads(bytes(block.buf[:size]))
+    finally:
+        block.close()
+    _worker_calculator = ProfitCalculatorOptimized(tables=tables)
+    _worker_names = names
+    # Kept attached for the life of the worker
+    _worker_state = shared_memory.SharedMemory(name=state_name)
+    _worker_version = None
+
+
+def _price(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def _search_chunk(products):
+    global _worker_version
+    state = np.ndarray((_HEADER + len(_worker_names),), dtype=np.float64, buffer=_worker_state.buf)
+    if state[0] != _worker_version:
+        prices = state[_HEADER:]
+        priced = np.flatnonzero(~np.isnan(prices))
+        _worker_calculator.prices = {_worker_names[i]: _price(prices[i]) for i in priced}
+        _worker_calculator.daily_focus = int(state[1])
+        _worker_version = float(state[0])
+    records, _, _ = _worker_calculator.strategy_records(products)
+    return records
+
+
+def _chunks(items, count):
+    """Split ``items`` into ``count`` contiguous, nearly equal chunks (empty ones dropped)"""
+    bounds = np.linspace(0, len(items), count + 1).astype(int)
+    return [items[start:end] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def _release(executor, *blocks):
+    executor.shutdown()
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+class StrategyPool:
+    """Process pool whose workers hold one snapshot of the config tables
+
+    The pool is reused for as long as its key (structure version, item
+    count, price curves, workers) matches the calculator, so repeated
+    searches, price edits and daily focus changes skip the worker start-up
+    and the table transfer.
+    """
+
+    def __init__(self, calculator, workers):
+        self.key = self.key_for(calculator, workers)
+        payload = json.dumps(calculator.get_tables()).encode('utf-8')
+        self.block = shared_memory.SharedMemory(create=True, size=len(payload))
+        self.block.buf[:len(payload)] = payload
+
+        self.names = list(calculator.get_item_index().names)
+        self.position = {name: i for i, name in enumerate(self.names)}
+        self.state_block = shared_memory.SharedMemory(create=True, size=8 * (_HEADER + len(self.names)))
+        self.state = np.ndarray((_HEADER + len(self.names),), dtype=np.float64, buffer=self.state_block.buf)
+        self.state[0] = 0
+        self.written = None
+
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                            initargs=(self.block.name, len(payload), self.state_block.name,
+                                                      self.names))
+        self._finalizer = weakref.finalize(self, _release, self.executor, self.block, self.state_block)
+
+    @staticmethod
+    def key_for(calculator, workers):
+        curves = json.dumps(calculator.price_curves, sort_keys=True)
+        return (calculator.structure_version, len(calculator.get_item_index()), curves, workers)
+
+    def publish(self, calculator):
+        """Write the calculator's prices and daily focus to the shared block (once per data version)"""
+        written = (calculator.data_version, calculator.daily_focus)
+        if written == self.written:
+            return
+        prices = np.full(len(self.names), np.nan)
+        for name, price in calculator.prices.items():
+            prices[self.position[name]] = price
+        self.state[_HEADER:] = prices
+        self.state[1] = calculator.daily_focus
+        # The counter goes last: a worker only reloads once everything else is in place
+        self.state[0] += 1
+        self.written = written
+
+    def map(self, calculator, chunks):
+        self.publish(calculator)
+        return list(self.executor.map(_search_chunk, chunks))
+
+    def close(self):
+        self._finalizer()
+
+
+def parallel_strategy_records(calculator, products=None, workers=None, chunks_per_worker=4):
+    """strategy_records of ``calculator`` computed by a pool of ``workers`` processes"""
+    workers = workers or os.cpu_count() or 1
+    product_names = list(calculator.recipes)
+    gather_names = list(calculator.gatherable)
+    wanted = None if products is None else set(products)
+    candidates = [product for product in product_names
+                  if (wanted is None or product in wanted) and product in calculator.craftable]
+    if not candidates:
+        return calculator.strategy_records([])
+
+    pool = calculator.get_strategy_pool(workers)
+    parts = pool.map(calculator, _chunks(candidates, workers * chunks_per_worker))
+    records = np.concatenate(parts)
+    records = records[np.argsort(records['product'], kind='stable')]
+    return records, product_names, gather_names
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+BLUE PROTOCOL - VOLUME-AWARE PRICE CURVES
+
+config/price_curves.json (optional) gives items a unit price that moves with
+the volume traded in a day, as piecewise-linear curves over the quantity:
+
+    {"Luna Ore": {"sell": [[0, 120], [500, 90]], "buy": [[0, 150], [300, 210]]}}
+
+Each point is [units already traded, unit price]; the price is interpolated
+between points and flat outside them. Items (or sides) without a curve keep
+their flat market_prices.json price. greedy_session_plan splits a focus
+budget over gathering/crafting sessions valued with these curves.
+"""
+
+import bisect
+import heapq
+import json
+import os
+
+import numpy as np
+
+PRICE_CURVES_FILE = 'price_curves.json'
+
+
+def load_price_curves(config_path="config"):
+    """Curves from config/price_curves.json (empty when absent)"""
+    try:
+        with open(os.path.join(config_path, PRICE_CURVES_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+class PriceCurve:
+    """Unit price as a piecewise-linear function of the quantity already traded"""
+
+    def __init__(self, points):
+        points = sorted((float(quantity), float(price)) for quantity, price in points)
+        if not points:
+            raise ValueError("a price curve needs at least one point")
+        if points[0][0] > 0:
+            points.insert(0, (0.0, points[0][1]))
+        self.quantity = np.array([quantity for quantity, _ in points])
+        self.price = np.array([price for _, price in points])
+        # Value of trading up to each point: trapezoids between consecutive points
+        self.area = np.concatenate([[0.0], np.cumsum(np.diff(self.quantity) * (self.price[1:] + self.price[:-1]) / 2)])
+        # Plain lists for the scalar lookups the greedy makes one session at a time
+        self._points = (self.quantity.tolist(), self.price.tolist(), self.area.tolist())
+
+    def unit_price(self, quantity):
+        return np.interp(quantity, self.quantity, self.price)
+
+    def total(self, quantity):
+        """Value of trading ``quantity`` units (the integral of the unit price), vectorized"""
+        if np.ndim(quantity) == 0:
+            quantities, prices, areas = self._points
+            point = max(bisect.bisect_right(quantities, quantity) - 1, 0)
+            if point == len(quantities) - 1:
+                end_price = prices[point]
+            else:
+                share = (quantity - quantities[point]) / (quantities[point + 1] - quantities[point])
+                end_price = prices[point] + share * (prices[point + 1] - prices[point])
+            return areas[point] + (quantity - quantities[point]) * (prices[point] + end_price) / 2
+        quantity = np.asarray(quantity, dtype=float)
+        point = np.clip(np.searchsorted(self.quantity, quantity, side='right') - 1, 0, len(self.quantity) - 1)
+        start = self.quantity[point]
+        return self.area[point] + (quantity - start) * (self.price[point] + self.unit_price(quantity)) / 2
+
+
+class VolumeMarket:
+    """Sell revenue and buy cost of a day's volume per item, from curves or the flat price"""
+
+    def __init__(self, prices, curves):
+        self.prices = prices
+        self.sell_curves = {item: PriceCurve(curve['sell']) for item, curve in curves.items() if curve.get('sell')}
+        self.buy_curves = {item: PriceCurve(curve['buy']) for item, curve in curves.items() if curve.get('buy')}
+
+    def affects(self, items):
+        """Whether any of ``items`` is priced by a curve"""
+        return any(item in self.sell_curves or item in self.buy_curves for item in items)
+
+    def sell_value(self, item, quantity):
+        curve = self.sell_curves.get(item)
+        return self.prices[item] * quantity if curve is None else curve.total(quantity)
+
+    def buy_cost(self, item, quantity):
+        curve = self.buy_curves.get(item)
+        return self.prices[item] * quantity if curve is None else curve.total(quantity)
+
+    def net_value(self, item, net, sellable=True):
+        """Value of ending the day ``net`` units long (sold, when sellable) or short (bought)"""
+        if net < 0:
+            return -self.buy_cost(item, -net)
+        return self.sell_value(item, net) if sellable and net > 0 else 0
+
+
+def greedy_session_plan(costs, effects, budget, market, max_counts=None, unsold=()):
+    """Split ``budget`` focus over sessions of several activities, one best session at a time
+
+    ``effects[a]`` maps items to the units one session of activity ``a``
+    adds (gathered/crafted, positive) or consumes (ingredients, negative);
+    the day is worth the market net value of every item's balance, with
+    ``unsold`` items (e.g. gathered units only meant for crafting) worth
+    nothing when left over. Each step takes the session with the highest
+    gain per focus point while it is positive. A heap keeps the gains; after
+    a session only the activities sharing an item with it are re-evaluated,
+    and entries stamped with an older version are skipped. With volume
+    curves the gains shrink as a plan grows, which is what makes greedy
+    marginal allocation a good fit. Returns (value, counts, credit), where
+    ``credit`` is the gain each activity's sessions added (it sums to value).
+    """
+    n = len(costs)
+    counts = np.zeros(n, dtype=np.int64)
+    credit = np.zeros(n)
+    net = {item: 0 for effect in effects for item in effect}
+    unsold = set(unsold)
+    sharing = {}
+    for activity, effect in enumerate(effects):
+        for item in effect:
+            sharing.setdefault(item, set()).add(activity)
+
+    def gain(activity):
+        return sum(market.net_value(item, net[item] + units, item not in unsold)
+                   - market.net_value(item, net[item], item not in unsold)
+                   for item, units in effects[activity].items())
+
+    version = [0] * n
+    heap = []
+
+    def push(activity):
+        version[activity] += 1
+        limit = None if max_counts is None else max_counts[activity]
+        if costs[activity] <= budget and (limit is None or counts[activity] < limit):
+            heapq.heappush(heap, (-gain(activity) / costs[activity], activity, version[activity]))
+
+    for activity in range(n):
+        if costs[activity] > 0:
+            push(activity)
+
+    while heap:
+        negative_rate, activity, stamp = heapq.heappop(heap)
+        if stamp != version[activity]:
+            continue
+        if negative_rate >= 0:
+            break
+        if costs[activity] > budget:
+            continue
+        counts[activity] += 1
+        credit[activity] -= negative_rate * costs[activity]
+        budget -= costs[activity]
+        for item, units in effects[activity].items():
+            net[item] += units
+        for other in set().union(*(sharing[item] for item in effects[activity])):
+            push(other)
+
+    return float(credit.sum()), counts, credit
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+BLUE PROTOCOL - PRICE HISTORY STORE
+
+Append-only, memory-mapped columnar store of price snapshots:
+
+    timestamps.bin  int64 epoch seconds, one per snapshot
+    prices.bin      float64 rows of ``width`` columns (NaN = no price)
+    meta.json       item names (column order) and row width
+
+An append writes the price row first and the timestamp last; the
+timestamp count is the snapshot count, so a snapshot only exists once both
+are complete, and whatever an interrupted append left past that count is
+truncated when the store is opened.
+
+Rolling mean/volatility are maintained incrementally (Welford updates) as
+snapshots are appended; min/max only read the rows inside the window, so no
+query ever rescans the whole history.
+"""
+
+import json
+import os
+import time
+import warnings
+
+import numpy as np
+
+
+class RunningMoments:
+    """Per-column count, mean and sum of squared deviations (Welford), with removal"""
+
+    def __init__(self, width):
+        self.count = np.zeros(width)
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros(width)
+
+    def resize(self, width):
+        for name in ('count', 'mean', 'm2'):
+            values = getattr(self, name)
+            setattr(self, name, np.concatenate([values, np.zeros(width - len(values))]))
+
+    def add(self, values):
+        valid = np.isfinite(values)
+        self.count += valid
+        delta = np.where(valid, values - self.mean, 0)
+        self.mean += np.where(valid, delta / np.maximum(self.count, 1), 0)
+        self.m2 += np.where(valid, delta * (values - self.mean), 0)
+
+    def remove(self, values):
+        valid = np.isfinite(values)
+        self.count -= valid
+        delta = np.where(valid, values - self.mean, 0)
+        self.mean -= np.where(valid, delta / np.maximum(self.count, 1), 0)
+        self.m2 -= np.where(valid, delta * (values - self.mean), 0)
+        empty = self.count == 0
+        self.mean[empty] = 0
+        self.m2[empty] = 0
+
+    def std(self):
+        """Sample standard deviation (NaN below two values)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+
+class RollingWindow:
+    """Running moments of the prices and log returns in the last ``window`` snapshots
+
+    Updates use Welford's recurrences rather than sums of squares, and
+    PriceHistory rebuilds a window from its rows after every ``window``
+    updates, so removal rounding never accumulates over a long history.
+    """
+
+    def __init__(self, window, width):
+        self.window = window
+        self.updates = 0
+        self.prices = RunningMoments(width)
+        self.returns = RunningMoments(width)
+
+    @property
+    def count(self):
+        return self.prices.count
+
+    def resize(self, width):
+        self.prices.resize(width)
+        self.returns.resize(width)
+
+    @staticmethod
+    def _log_return(current, previous):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.log(current / previous)
+
+    def push(self, row, previous, leaving=None, leaving_next=None):
+        """Add the newest row and drop the one falling out of the window
+
+        The newest return (previous -> row) enters the window; the return
+        into the row that leaves stops counting, because the first row of the
+        window has no return inside the window.
+        """
+        self.prices.add(row)
+        if previous is not None:
+            self.returns.add(self._log_return(row, previous))
+        if leaving is not None:
+            self.prices.remove(leaving)
+            if leaving_next is not None:
+                self.returns.remove(self._log_return(leaving_next, leaving))
+            self.updates += 1
+
+    def mean(self):
+        return np.where(self.prices.count > 0, self.prices.mean, np.nan)
+
+    def volatility(self):
+        """Sample standard deviation of log returns inside the window"""
+        return self.returns.std()
+
+
+class PriceHistory:
+    def __init__(self, path="config/price_history"):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._meta_path = os.path.join(path, 'meta.json')
+        self._timestamps_path = os.path.join(path, 'timestamps.bin')
+        self._prices_path = os.path.join(path, 'prices.bin')
+        self.items = []
+        self.width = 0
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            self.items = meta['items']
+            self.width = meta['width']
+        self.item_index = {item: i for i, item in enumerate(self.items)}
+        self._windows = {}
+        self._drop_partial_append()
+
+    # ------------------------------------------------------------------ storage
+
+    def __len__(self):
+        if not os.path.exists(self._timestamps_path):
+            return 0
+        return os.path.getsize(self._timestamps_path) // 8
+
+    def _drop_partial_append(self):
+        """Truncate a price row (or a timestamp) an interrupted append left without its timestamp"""
+        n = len(self)
+        for path, size in ((self._timestamps_path, n * 8), (self._prices_path, n * self.width * 8)):
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+    def timestamps(self):
+        """Memory-mapped snapshot timestamps (epoch seconds)"""
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.memmap(self._timestamps_path, dtype=np.int64, mode='r')
+
+    def matrix(self):
+        """Memory-mapped (snapshot x item) price matrix"""
+        n = len(self)
+        if n == 0:
+            return np.zeros((0, self.width))
+        return np.memmap(self._prices_path, dtype=np.float64, mode='r', shape=(n, self.width))
+
+    def _write_meta(self):
+        tmp_path = self._meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'items': self.items, 'width': self.width}, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def _grow(self, needed):
+        """Widen every stored row (rare: only when the item count outgrows the width)"""
+        width = max(needed, self.width * 2, 16)
+        old = np.array(self.matrix())
+        grown = np.full((len(old), width), np.nan)
+        grown[:, :self.width] = old
+        tmp_path = self._prices_path + '.tmp'
+        grown.tofile(tmp_path)
+        os.replace(tmp_path, self._prices_path)
+        self.width = width
+        for rolling in self._windows.values():
+            rolling.resize(width)
+
+    def append(self, prices, timestamp=None, carry_forward=True):
+        """Append one snapshot (item -> price); unlisted items keep their last price if carry_forward"""
+        n = len(self)
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        if n and timestamp < int(self.timestamps()[-1]):
+            raise ValueError("Snapshots must be appended in time order")
+
+        for item in prices:
+            if item not in self.item_index:
+                self.item_index[item] = len(self.items)
+                self.items.append(item)
+        if len(self.items) > self.width:
+            self._grow(len(self.items))
+        self._write_meta()
+
+        previous = np.array(self.matrix()[n - 1]) if n else None
+        row = previous.copy() if (carry_forward and previous is not None) else np.full(self.width, np.nan)
+        for item, price in prices.items():
+            row[self.item_index[item]] = np.nan if price is None else float(price)
+
+        # The timestamp goes last: it is what makes the row part of the history
+        with open(self._prices_path, 'ab') as f:
+            row.tofile(f)
+        with open(self._timestamps_path, 'ab') as f:
+            np.array([timestamp], dtype=np.int64).tofile(f)
+
+        for window, rolling in self._windows.items():
+            matrix = self.matrix()
+            leaving = leaving_next = None
+            if n + 1 > window:
+                leaving = np.array(matrix[n - window])
+                leaving_next = np.array(matrix[n - window + 1])
+            rolling.push(row, previous, leaving, leaving_next)
+        # Rebuild windows that have slid a full length, so they stay exact over any history
+        for window in [window for window, rolling in self._windows.items() if rolling.updates >= window]:
+            del self._windows[window]
+
+    # ------------------------------------------------------------------ queries
+
+    def _rolling(self, window):
+        """Rolling moments for ``window``; built from the last rows, then kept up to date on append"""
+        if window not in self._windows:
+            rolling = RollingWindow(window, self.width)
+            rows = np.array(self.matrix()[-window:]) if len(self) else np.zeros((0, self.width))
+            for position, row in enumerate(rows):
+                rolling.push(row, rows[position - 1] if position else None)
+            self._windows[window] = rolling
+        return self._windows[window]
+
+    def _row_to_prices(self, row):
+        return {item: float(row[i]) for item, i in self.item_index.items() if np.isfinite(row[i])}
+
+    def snapshot(self, at=None):
+        """Prices of the last snapshot taken at or before ``at`` (epoch seconds; latest if None)"""
+        n = len(self)
+        if n == 0:
+            return {}
+        position = n - 1 if at is None else int(np.searchsorted(self.timestamps(), at, side='right')) - 1
+        if position < 0:
+            return {}
+        return self._row_to_prices(self.matrix()[position])
+
+    def smoothed(self, window=24):
+        """Rolling mean price of every item over the last ``window`` snapshots"""
+        return self._row_to_prices(self._rolling(window).mean())
+
+    def rolling_stats(self, window=24):
+        """Mean, volatility (std of log returns), min, max and last price per item"""
+        import pandas as pd
+        rolling = self._rolling(window)
+        recent = np.array(self.matrix()[-window:])
+        n_items = len(self.items)
+        if len(recent):
+            with warnings.catch_warnings():
+                # Items without any price in the window simply report NaN
+                warnings.simplefilter('ignore', RuntimeWarning)
+                low = np.nanmin(recent, axis=0)
+                high = np.nanmax(recent, axis=0)
+            last = recent[-1]
+        else:
+            low = high = last = np.full(self.width, np.nan)
+        return pd.DataFrame({
+            'Item': self.items,
+            'Last': last[:n_items],
+            'Mean': rolling.mean()[:n_items],
+            'Volatility': rolling.volatility()[:n_items],
+            'Min': low[:n_items],
+            'Max': high[:n_items],
+            'Samples': rolling.count[:n_items].astype(int)
+        })
+
+    def series(self, item):
+        """Full price series of one item as a pandas Series indexed by timestamp"""
+        import pandas as pd
+        column = self.item_index[item]
+        index = pd.to_datetime(np.array(self.timestamps()), unit='s')
+        return pd.Series(np.array(self.matrix()[:, column]), index=index, name=item)
+
+
+if __name__ == "__main__":
+    import sys
+
+    history = PriceHistory()
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    if command == 'record':
+        source = sys.argv[2] if len(sys.argv) > 2 else "config/market_prices.json"
+        with open(source) as f:
+            history.append(json.load(f))
+        print(f"Recorded snapshot #{len(history)} ({len(history.items)} items)")
+    else:
+        window = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+        print(history.rolling_stats(window).to_string(index=False))
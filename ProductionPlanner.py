@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+BLUE PROTOCOL - MULTI-DAY PRODUCTION PLANNER
+"""
+
+import numpy as np
+
+REST = -1   # product index of a day spent on the best stateless strategy
+
+
+def _craft_table(available, kept, used, session_margin, unit_price):
+    """Worth of a day crafting one product that uses the carried item, per stock after gathering
+
+    ``kept`` is the value of the stock left for the next day (per amount)
+    and ``used`` the stock one craft session consumes. Returns three arrays
+    over ``available``: crafting the sessions the stock covers (all from
+    stock), using the stock up (to be completed with the sessions crafted,
+    whose margin depends on the focus left) and the better of the first and
+    using it up with one session more. The day is linear in the sessions
+    beyond the covered ones, so only one more or the most the focus allows
+    are candidates there.
+    """
+    covered = available // used
+    within = covered * (session_margin + used * unit_price) + kept[available - covered * used]
+    emptied = available * unit_price + kept[0]
+    return within, emptied, np.maximum(within, emptied + (covered + 1) * session_margin)
+
+
+def solve_stock_plan(days, focus, gather_cost, gather_yield, gather_price, craft_cost, craft_yield,
+                     margin, usage, rest_value=0.0, salvage=0.0, max_stock=None):
+    """Best gather/craft schedule over ``days`` when one gathered item is carried in stock
+
+    Each day the ``focus`` budget is split into g gathering sessions of the
+    carried item (g * gather_yield units into stock) and c crafting sessions
+    of one product p. A crafted unit of p consumes ``usage[p]`` units of the
+    carried item, taken from stock first and bought for the rest, so a day is
+    worth crafted * margin[p] + units taken from stock * gather_price, where
+    ``margin`` is the sell price minus the cost of buying every material. The
+    alternative is a stateless day worth ``rest_value`` (e.g. gather and sell
+    another item) that leaves the stock alone. Stock left after the last day
+    is worth ``salvage`` * gather_price per unit.
+
+    Dynamic program over (day, stock units), backwards, vectorized over every
+    stock level. What a day is worth depends on the stock after gathering, so
+    it is tabulated once per day over that amount and every gather split
+    reads a shifted slice of the table; the split only decides the focus left
+    for crafting, i.e. where the most sessions cap the crafts. Products that
+    do not use the carried item leave the stock alone, so only the best of
+    them per split is kept. The value of a day is concave piecewise linear in
+    c (a steeper slope while the stock covers the crafts), so only c = 0, the
+    sessions the stock covers and one or the most the remaining focus allows
+    beyond them are candidates. Stock only moves in multiples of the gcd of the gathered
+    yield, the units a craft session uses and ``max_stock``, so it is counted
+    in those (an exact, coarser grid). Only stock levels that can be reached
+    and (without salvage) still be consumed are tracked; stock above
+    ``max_stock`` is discarded.
+
+    Returns (best_value, schedule) with one (gather_sessions, product,
+    craft_sessions) tuple per day; product is REST for a stateless day.
+    """
+    craft_cost = np.asarray(craft_cost, dtype=np.int64)
+    craft_yield = np.asarray(craft_yield, dtype=np.int64)
+    margin = np.asarray(margin, dtype=float)
+    usage = np.asarray(usage, dtype=np.int64)
+    related = np.flatnonzero(usage > 0)
+    others = np.flatnonzero(usage == 0)
+    max_gather = focus // gather_cost
+    gathers = np.arange(max_gather + 1)
+    craft_focus = focus - gathers * gather_cost
+
+    steps = [gather_yield, *(usage * craft_yield)[related], *([] if max_stock is None else [max_stock])]
+    unit = int(np.gcd.reduce(np.array(steps, dtype=np.int64))) or 1
+    gathered = gather_yield // unit
+    used_per_session = usage * craft_yield // unit
+    unit_price = gather_price * unit
+    most_gathered = max_gather * gathered
+    most_used = int(np.max(used_per_session * (focus // craft_cost), initial=0))
+
+    def stock_levels(day):
+        """Stock levels (in units of ``unit``) worth tracking at the start of ``day``: what could be gathered
+        so far, and (without salvage) what the remaining days could still consume"""
+        top = day * most_gathered
+        if salvage <= 0:
+            top = min(top, (days - day) * most_used)
+        if max_stock is not None:
+            top = min(top, max_stock // unit)
+        return np.arange(int(top) + 1, dtype=np.int64)
+
+    # Products that do not use the carried item ignore the stock: per gather split only the best one matters
+    other_value = np.zeros(len(gathers))
+    other_product = np.zeros(len(gathers), dtype=np.int64)
+    other_sessions = np.zeros(len(gathers), dtype=np.int64)
+    if len(others):
+        sessions = craft_focus[:, None] // craft_cost[others]
+        worth = sessions * craft_yield[others] * margin[others]
+        pick = worth.argmax(axis=1)
+        profitable = worth[gathers, pick] > 0
+        other_value[profitable] = worth[gathers, pick][profitable]
+        other_product[profitable] = others[pick][profitable]
+        other_sessions[profitable] = sessions[gathers, pick][profitable]
+
+    value = salvage * unit_price * stock_levels(days).astype(float)
+    policy = []
+    session_margin = craft_yield * margin
+    for day in range(days - 1, -1, -1):
+        stock = stock_levels(day)
+        size = len(stock)
+        available = np.arange(size + max_gather * gathered)
+        kept = value[np.minimum(available, len(value) - 1)]
+        tables = [_craft_table(available, kept, used_per_session[p], session_margin[p], unit_price) for p in related]
+
+        best = np.full(size, -np.inf)
+        split = np.zeros(size, dtype=np.int64)
+        for g in range(max_gather + 1):
+            start = g * gathered
+            total = other_value[g] + kept[start:start + size]
+            for p, (within, emptied, used_up) in zip(related, tables):
+                used = int(used_per_session[p])
+                most = int(craft_focus[g] // craft_cost[p])
+                # Below the cut the stock does not cover the most sessions the focus allows, above it it does
+                cut = min(max(most * used - start, 0), size)
+                if session_margin[p] > 0:
+                    crafted = np.maximum(within[start:start + cut],
+                                         emptied[start:start + cut] + most * session_margin[p])
+                else:
+                    crafted = used_up[start:start + cut]
+                np.maximum(total[:cut], crafted, out=total[:cut])
+                shifted = start + cut - most * used
+                capped = most * (session_margin[p] + used * unit_price) + kept[shifted:shifted + size - cut]
+                np.maximum(total[cut:], capped, out=total[cut:])
+            better = total > best
+            best[better] = total[better]
+            split[better] = g
+        rest = rest_value + kept[:size]
+        better = best > rest
+        policy.append((np.where(better, split, REST), value))
+        value = np.where(better, best, rest)
+    policy.reverse()
+
+    # Walk forward, redoing each day's craft choice for the gather split the policy picked
+    schedule = []
+    level = 0
+    for split, following in policy:
+        level = min(level, len(split) - 1)
+        g = int(split[level])
+        if g == REST:
+            schedule.append((0, REST, 0))
+            continue
+        available = level + g * gathered
+        top_next = len(following) - 1
+        options = [(other_value[g] + following[min(available, top_next)], int(other_product[g]),
+                    int(other_sessions[g]))]
+        for p in related:
+            most = int(craft_focus[g] // craft_cost[p])
+            covered = available // int(used_per_session[p])
+            for c in sorted({min(covered, most), min(covered + 1, most), most}):
+                from_stock = min(c * int(used_per_session[p]), available)
+                worth = c * craft_yield[p] * margin[p] + from_stock * unit_price
+                options.append((worth + following[min(available - from_stock, top_next)], int(p), c))
+        _, product, c = max(options, key=lambda option: option[0])
+        schedule.append((g, product, c))
+        level = available - min(c * int(used_per_session[product]), available)
+    return float(value[0]), schedule
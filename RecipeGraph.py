@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+BLUE PROTOCOL - RECIPE GRAPH (MULTI-LEVEL MAKE VS BUY)
+"""
+
+import json
+from collections import defaultdict, deque
+
+
+class RecipeGraph:
+    def __init__(self, recipes_path="config/RecipesData.json", records=None, catalog=None):
+        self.recipes_path = recipes_path
+        self.item_names = {}        # item id -> item name
+        self.name_to_ids = defaultdict(list)
+        self.recipes = []           # normalized recipes, see _normalize_recipe
+        self.producers = defaultdict(list)  # item id -> indexes of recipes producing it
+        self.order = []             # item ids in topological order (inputs before outputs)
+        self.cyclic_items = set()
+        self._cost_cache = {}
+
+        if catalog is not None:
+            self.build_from_catalog(catalog)
+        else:
+            if records is None:
+                records = self.load_records(recipes_path)
+            self.build(records)
+
+    @staticmethod
+    def load_records(recipes_path):
+        """Load the scraped recipe records"""
+        try:
+            with open(recipes_path) as f:
+                return json.load(f)
+        except FileNotFoundError as e:
+            print(f"Error loading recipe data: {e}")
+            raise e
+
+    def _register_item(self, item_id, name):
+        if item_id not in self.item_names:
+            self.item_names[item_id] = name
+            self.name_to_ids[name].append(item_id)
+
+    @staticmethod
+    def output_range(output):
+        """(rate, min amount, max amount) of one output entry"""
+        low = output.get('minAmount')
+        high = output.get('maxAmount')
+        if low is None or high is None:
+            low = high = output.get('amount') or 0
+        rate = output.get('rate')
+        return (1 if rate is None else rate), low, high
+
+    @staticmethod
+    def expected_amount(output):
+        """Expected units of one output entry per craft (rate * mean of min/max amount)"""
+        low = output.get('minAmount')
+        high = output.get('maxAmount')
+        if low is not None and high is not None:
+            amount = (low + high) / 2
+        else:
+            amount = output.get('amount') or 0
+        rate = output.get('rate')
+        return (1 if rate is None else rate) * amount
+
+    def _normalize_recipe(self, record):
+        """Turn one scraped record into fixed inputs, one any-of input slot and expected outputs"""
+        fixed_inputs = []
+        variable_inputs = []
+        for entry in record.get('input_data') or []:
+            item_id = str(entry['input_id'])
+            self._register_item(item_id, entry.get('item_name'))
+            if entry.get('isVariable'):
+                # Variable inputs are alternatives: any one of them fills the slot
+                variable_inputs.append((item_id, entry.get('amount') or 0))
+            else:
+                fixed_inputs.append((item_id, entry.get('amount') or 0))
+
+        outputs = defaultdict(float)
+        output_entries = []
+        for entry in record.get('output_data') or []:
+            item_id = str(entry['output_id'])
+            self._register_item(item_id, entry.get('item_name'))
+            outputs[item_id] += self.expected_amount(entry)
+            output_entries.append((item_id, *self.output_range(entry)))
+
+        return {
+            'id': str(record.get('id')),
+            'name': record.get('name'),
+            'focus_cost': record.get('FocusCost') or 0,
+            'fixed_inputs': fixed_inputs,
+            'variable_inputs': variable_inputs,
+            'outputs': dict(outputs),
+            'output_entries': output_entries
+        }
+
+    def _add_recipe(self, recipe):
+        if not recipe['outputs']:
+            return
+        index = len(self.recipes)
+        self.recipes.append(recipe)
+        for item_id in recipe['outputs']:
+            self.producers[item_id].append(index)
+
+    def build(self, records):
+        """Build the graph from scraped JSON records"""
+        for record in records:
+            self._add_recipe(self._normalize_recipe(record))
+        self._order_items()
+
+    def build_from_catalog(self, catalog):
+        """Build the graph from a compiled catalog (see CatalogCache) without parsing JSON"""
+        item_ids = [str(item_id) for item_id in catalog.item_id.tolist()]
+        for item_id, name in zip(item_ids, catalog.item_name.tolist()):
+            self._register_item(item_id, name)
+
+        input_offsets = catalog.input_offsets.tolist()
+        input_item = catalog.input_item.tolist()
+        input_amount = catalog.input_amount.tolist()
+        input_variable = catalog.input_variable.tolist()
+        output_offsets = catalog.output_offsets.tolist()
+        output_item = catalog.output_item.tolist()
+        output_records = [{
+            'rate': None if rate != rate else rate,
+            'minAmount': None if low != low else low,
+            'maxAmount': None if high != high else high,
+            'amount': None if amount != amount else amount
+        } for rate, low, high, amount in zip(catalog.output_rate.tolist(), catalog.output_min.tolist(),
+                                             catalog.output_max.tolist(), catalog.output_amount.tolist())]
+        output_expected = [self.expected_amount(entry) for entry in output_records]
+        focus_costs = catalog.recipe_focus_cost.tolist()
+
+        for index, (recipe_id, name) in enumerate(zip(catalog.recipe_id.tolist(), catalog.recipe_name.tolist())):
+            fixed_inputs = []
+            variable_inputs = []
+            for position in range(input_offsets[index], input_offsets[index + 1]):
+                entry = (item_ids[input_item[position]], input_amount[position])
+                (variable_inputs if input_variable[position] else fixed_inputs).append(entry)
+
+            outputs = defaultdict(float)
+            output_entries = []
+            for position in range(output_offsets[index], output_offsets[index + 1]):
+                item_id = item_ids[output_item[position]]
+                outputs[item_id] += output_expected[position]
+                output_entries.append((item_id, *self.output_range(output_records[position])))
+
+            focus_cost = focus_costs[index]
+            self._add_recipe({
+                'id': str(recipe_id),
+                'name': name,
+                'focus_cost': 0 if focus_cost != focus_cost else focus_cost,
+                'fixed_inputs': fixed_inputs,
+                'variable_inputs': variable_inputs,
+                'outputs': dict(outputs),
+                'output_entries': output_entries
+            })
+        self._order_items()
+
+    def _order_items(self):
+        """Order the item dependency graph topologically"""
+        # Edge input -> output for every recipe (Kahn's algorithm)
+        dependents = defaultdict(set)
+        in_degree = {item_id: 0 for item_id in self.item_names}
+        for recipe in self.recipes:
+            inputs = {item_id for item_id, _ in recipe['fixed_inputs'] + recipe['variable_inputs']}
+            for output_id in recipe['outputs']:
+                for input_id in inputs:
+                    if output_id not in dependents[input_id]:
+                        dependents[input_id].add(output_id)
+                        in_degree[output_id] += 1
+
+        queue = deque(item_id for item_id, degree in in_degree.items() if degree == 0)
+        order = []
+        while queue:
+            item_id = queue.popleft()
+            order.append(item_id)
+            for dependent in dependents[item_id]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    queue.append(dependent)
+
+        # Items left over sit on a cycle; they are priced last, using whatever is known
+        self.cyclic_items = {item_id for item_id, degree in in_degree.items() if degree > 0}
+        self.order = order + [item_id for item_id in self.item_names if item_id in self.cyclic_items]
+        self._cost_cache.clear()
+
+    def resolve_prices(self, prices):
+        """Map a price dict keyed by item name or item id onto item ids"""
+        resolved = {}
+        for key, price in prices.items():
+            key = str(key)
+            if key in self.item_names:
+                resolved[key] = price
+            for item_id in self.name_to_ids.get(key, []):
+                resolved.setdefault(item_id, price)
+        return resolved
+
+    def _recipe_cost(self, recipe, costs, focus_value):
+        """Cost of one craft of a recipe given the current per-item costs"""
+        total = recipe['focus_cost'] * focus_value
+        for item_id, amount in recipe['fixed_inputs']:
+            total += amount * costs.get(item_id, float('inf'))
+        if recipe['variable_inputs']:
+            total += min(amount * costs.get(item_id, float('inf'))
+                         for item_id, amount in recipe['variable_inputs'])
+        return total
+
+    def compute_costs(self, prices, focus_value=0.0):
+        """Cheapest make-vs-buy cost for every item in one bottom-up pass
+
+        Returns a dict item id -> (unit cost, recipe id or None when buying is
+        cheapest). Items with neither a price nor a priced recipe cost inf.
+        ``focus_value`` charges each point of crafting focus at that many Luno.
+        """
+        resolved = self.resolve_prices(prices)
+        cache_key = (frozenset(resolved.items()), focus_value)
+        if cache_key in self._cost_cache:
+            return self._cost_cache[cache_key]
+
+        costs = {}
+        best = {}
+        for item_id in self.order:
+            unit_cost = resolved.get(item_id, float('inf'))
+            source = None
+            for index in self.producers.get(item_id, []):
+                recipe = self.recipes[index]
+                made = self._recipe_cost(recipe, costs, focus_value) / recipe['outputs'][item_id]
+                if made < unit_cost:
+                    unit_cost = made
+                    source = recipe['id']
+            costs[item_id] = unit_cost
+            best[item_id] = (unit_cost, source)
+
+        self._cost_cache = {cache_key: best}
+        return best
+
+    def recipe_input_costs(self, prices, focus_value=0.0):
+        """Per-craft input cost of every recipe (aligned with self.recipes) at best make-vs-buy cost"""
+        best = self.compute_costs(prices, focus_value)
+        costs = {item_id: cost for item_id, (cost, _) in best.items()}
+        return [self._recipe_cost(recipe, costs, 0.0) for recipe in self.recipes]
+
+    def cost_table(self, prices, focus_value=0.0):
+        """Return the make-vs-buy decision for every item as a DataFrame"""
+        import pandas as pd
+        resolved = self.resolve_prices(prices)
+        best = self.compute_costs(prices, focus_value)
+        rows = []
+        for item_id in self.order:
+            unit_cost, source = best[item_id]
+            rows.append({
+                'Item ID': item_id,
+                'Item': self.item_names[item_id],
+                'Buy Price': resolved.get(item_id, float('inf')),
+                'Best Cost': unit_cost,
+                'Decision': 'Make' if source else ('Buy' if unit_cost < float('inf') else 'Unpriced'),
+                'Recipe ID': source
+            })
+        return pd.DataFrame(rows)
+
+    def recipe_profits(self, prices, focus_value=0.0):
+        """Profit per craft of every recipe, valuing outputs at market price and inputs at best cost"""
+        import pandas as pd
+        resolved = self.resolve_prices(prices)
+        best = self.compute_costs(prices, focus_value)
+        costs = {item_id: cost for item_id, (cost, _) in best.items()}
+        rows = []
+        for recipe in self.recipes:
+            revenue = sum(qty * resolved[item_id] for item_id, qty in recipe['outputs'].items()
+                          if item_id in resolved)
+            if not revenue:
+                continue
+            input_cost = self._recipe_cost(recipe, costs, 0.0)
+            if input_cost == float('inf'):
+                continue
+            profit = revenue - input_cost
+            rows.append({
+                'Recipe ID': recipe['id'],
+                'Recipe': recipe['name'],
+                'Focus Cost': recipe['focus_cost'],
+                'Revenue/Craft': revenue,
+                'Input Cost/Craft': input_cost,
+                'Profit/Craft': profit,
+                'Luno/Focus': profit / recipe['focus_cost'] if recipe['focus_cost'] > 0 else float('inf')
+            })
+        df = pd.DataFrame(rows)
+        if not df.empty:
+            df = df.sort_values(by='Profit/Craft', ascending=False)
+        return df
+
+    def crafting_tree(self, item, prices, quantity=1, focus_value=0.0):
+        """Expand the cheapest way to obtain ``quantity`` of an item (name or id) into a nested dict"""
+        best = self.compute_costs(prices, focus_value)
+        item_id = item if item in self.item_names else (self.name_to_ids.get(item) or [None])[0]
+        if item_id is None:
+            return None
+        costs = {key: cost for key, (cost, _) in best.items()}
+        return self._expand(item_id, quantity, best, costs)
+
+    def _expand(self, item_id, quantity, best, costs):
+        unit_cost, source = best[item_id]
+        node = {
+            'item': self.item_names[item_id],
+            'quantity': quantity,
+            'unit_cost': unit_cost,
+            'action': 'make' if source else 'buy',
+            'inputs': []
+        }
+        if source is None:
+            return node
+
+        recipe = next(r for r in self.recipes if r['id'] == source and item_id in r['outputs'])
+        crafts = quantity / recipe['outputs'][item_id]
+        node['recipe'] = recipe['name']
+        node['crafts'] = crafts
+        inputs = list(recipe['fixed_inputs'])
+        if recipe['variable_inputs']:
+            inputs.append(min(recipe['variable_inputs'],
+                              key=lambda entry: entry[1] * costs.get(entry[0], float('inf'))))
+        for input_id, amount in inputs:
+            node['inputs'].append(self._expand(input_id, amount * crafts, best, costs))
+        return node
+
+
+if __name__ == "__main__":
+    with open("config/market_prices.json") as f:
+        prices = json.load(f)
+
+    graph = RecipeGraph()
+    print(f"Recipes: {len(graph.recipes)}  Items: {len(graph.item_names)}  Cyclic: {len(graph.cyclic_items)}")
+
+    profits = graph.recipe_profits(prices)
+    if not profits.empty:
+        print(profits.head(10).to_string(index=False))
@@ -1,91 +1,341 @@
-import requests
-import pandas as pd
+import argparse
 import json
+import os
+import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-recipes_id = pd.read_csv('config/all_recipes.csv')
-idrow = recipes_id['id'].tolist()
+import pandas as pd
+import requests
 
-def get_all_recipes():
-    all_recipes = []
+BASE_URL = 'https://questlog.gg/blue-protocol/api/trpc/database.getRecipe'
+RECIPES_CSV = 'config/all_recipes.csv'
+CATALOG_PATH = 'config/RecipesData.json'
+STREAM_PATH = 'config/RecipesData.jsonl'
+MANIFEST_PATH = 'config/RecipesData.manifest.json'
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
 
-    for i, row in enumerate(idrow, start=1):
-        params = {"id": str(row), "language": "en"}
 
-        base_url = 'https://questlog.gg/blue-protocol/api/trpc/database.getRecipe'
-        try:
-            r = requests.get(base_url, params={'input': json.dumps(params)}, timeout=10)
-            r.raise_for_status()
-            data = r.json()
-        except (requests.RequestException, ValueError) as e:
-            print(f"Request/JSON error for id {row} (index {i}): {e}")
-            time.sleep(1)
-            continue
+class TokenBucket:
+    """Thread-safe token bucket: allows `rate` requests per second with bursts up to `capacity`"""
 
-        recipe_data = data.get('result', {}).get('data')
-        if not recipe_data:
-            print(f"No recipe data for id {row} (index {i})")
-            time.sleep(1)
-            continue
-
-        # Process INPUT data
-        Recipesinfoinput = recipe_data.get('recipeInputItems', [])
-        input_items_flat = []
-        for item_group in Recipesinfoinput:
-            for item_data in item_group:
-                item = item_data.get('item', {})
-                input_items_flat.append({
-                    'input_id': item.get('id'),
-                    'item_name': item.get('name'),
-                    'amount': item_data.get('amount'),
-                    'isVariable': item_data.get('isVariable', False),
-                    'grade': item.get('grade'),
-                    'mainCategory': item.get('mainCategory'),
-                    'subCategory': item.get('subCategory')
-                })
-
-        # Process OUTPUT data
-        RecipesInfoOutput = recipe_data.get('recipeOutputItems', [])
-        output_items_flat = []
-        for output_item in RecipesInfoOutput:
-            item = output_item.get('item', {})
-            output_items_flat.append({
-                'output_id': item.get('id'),
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def load_recipe_listing(path=RECIPES_CSV):
+    """Recipe id -> createdAt from all_recipes.csv, in catalog order"""
+    listing = pd.read_csv(path, dtype=str)
+    return dict(zip(listing['id'], listing['createdAt'].fillna('')))
+
+
+def load_recipe_ids(path=RECIPES_CSV):
+    """Recipe IDs to download, in catalog order"""
+    return list(load_recipe_listing(path))
+
+
+def iter_stream(path):
+    """Yield the records of an append-only JSONL stream (later lines win for the same id)"""
+    if not path or not os.path.exists(path):
+        return
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A crash mid-write can leave a truncated last line; that id is simply fetched again
+                continue
+
+
+def repair_stream(path):
+    """Cut a truncated last line left by a crash mid-write, so the next append starts on a fresh line"""
+    if not path or not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+
+def load_streamed_ids(path):
+    """IDs already streamed by an earlier (possibly interrupted) run"""
+    return {str(record['id']) for record in iter_stream(path)}
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """Recipe id -> createdAt of the version currently compacted into the catalog"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_json_atomic(path, payload):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def seed_manifest(listing, catalog_path=CATALOG_PATH, manifest_path=MANIFEST_PATH):
+    """Create a manifest for a catalog scraped before manifests existed"""
+    if os.path.exists(manifest_path) or not os.path.exists(catalog_path):
+        return load_manifest(manifest_path)
+    with open(catalog_path, encoding='utf-8') as f:
+        known = {str(record['id']) for record in json.load(f)}
+    manifest = {recipe_id: created for recipe_id, created in listing.items() if recipe_id in known}
+    _write_json_atomic(manifest_path, manifest)
+    print(f"Seeded manifest with {len(manifest)} recipes from {catalog_path}")
+    return manifest
+
+
+def changed_ids(listing, manifest):
+    """IDs that are new or whose createdAt differs from the compacted version"""
+    return [recipe_id for recipe_id, created in listing.items() if manifest.get(recipe_id) != created]
+
+
+def compact_stream(listing, stream_path=STREAM_PATH, catalog_path=CATALOG_PATH, manifest_path=MANIFEST_PATH):
+    """Merge the streamed records into the catalog, update the manifest and truncate the stream"""
+    streamed = {str(record['id']): record for record in iter_stream(stream_path)}
+    if not streamed:
+        return 0
+
+    catalog = {}
+    if os.path.exists(catalog_path):
+        with open(catalog_path, encoding='utf-8') as f:
+            catalog = {str(record['id']): record for record in json.load(f)}
+    catalog.update(streamed)
+
+    # Keep all_recipes.csv order, then anything no longer listed
+    ordered = [catalog[recipe_id] for recipe_id in listing if recipe_id in catalog]
+    ordered += [record for recipe_id, record in catalog.items() if recipe_id not in listing]
+    tmp_path = f"{catalog_path}.tmp"
+    pd.DataFrame(ordered).to_json(tmp_path, orient='records', indent=2)
+    os.replace(tmp_path, catalog_path)
+
+    manifest = load_manifest(manifest_path)
+    manifest.update({recipe_id: listing.get(recipe_id, '') for recipe_id in streamed})
+    _write_json_atomic(manifest_path, manifest)
+
+    os.remove(stream_path)
+    return len(streamed)
+
+
+def parse_recipe(recipe_data):
+    """Flatten one getRecipe payload into the RecipesData.json record shape"""
+    # Process INPUT data
+    Recipesinfoinput = recipe_data.get('recipeInputItems', [])
+    input_items_flat = []
+    for item_group in Recipesinfoinput:
+        for item_data in item_group:
+            item = item_data.get('item', {})
+            input_items_flat.append({
+                'input_id': item.get('id'),
                 'item_name': item.get('name'),
-                'rate': output_item.get('rate'),
-                'isVariable': output_item.get('isVariable', False),
+                'amount': item_data.get('amount'),
+                'isVariable': item_data.get('isVariable', False),
                 'grade': item.get('grade'),
-                'maxAmount': item.get('maxAmount'),
-                'minAmount': item.get('minAmount'),
                 'mainCategory': item.get('mainCategory'),
-                'subCategory': item.get('subCategory'),
-                'amount': output_item.get('amount')
+                'subCategory': item.get('subCategory')
             })
 
-        final_input = {
-            'id': recipe_data.get('id'),
-            'name': recipe_data.get('name'),
-            'icon': recipe_data.get('icon'),
-            'grade': recipe_data.get('grade'),
-            'dbType': recipe_data.get('dbType'),
-            'mainCategory': recipe_data.get('mainCategory'),
-            'description': recipe_data.get('description'),
-            'FocusCost': recipe_data.get('cost', {}).get('amount'),
-            'input_data': input_items_flat,
-            'output_data': output_items_flat
-        }
-
-        all_recipes.append(final_input)
-        print(f"Processed recipe {i}/{len(idrow)}: {final_input['name']} (ID: {final_input['id']})")
-        time.sleep(1)
-        
-    return all_recipes
+    # Process OUTPUT data
+    RecipesInfoOutput = recipe_data.get('recipeOutputItems', [])
+    output_items_flat = []
+    for output_item in RecipesInfoOutput:
+        item = output_item.get('item', {})
+        output_items_flat.append({
+            'output_id': item.get('id'),
+            'item_name': item.get('name'),
+            'rate': output_item.get('rate'),
+            'isVariable': output_item.get('isVariable', False),
+            'grade': item.get('grade'),
+            'maxAmount': item.get('maxAmount'),
+            'minAmount': item.get('minAmount'),
+            'mainCategory': item.get('mainCategory'),
+            'subCategory': item.get('subCategory'),
+            'amount': output_item.get('amount')
+        })
+
+    return {
+        'id': recipe_data.get('id'),
+        'name': recipe_data.get('name'),
+        'icon': recipe_data.get('icon'),
+        'grade': recipe_data.get('grade'),
+        'dbType': recipe_data.get('dbType'),
+        'mainCategory': recipe_data.get('mainCategory'),
+        'description': recipe_data.get('description'),
+        'FocusCost': recipe_data.get('cost', {}).get('amount'),
+        'input_data': input_items_flat,
+        'output_data': output_items_flat
+    }
+
+
+class RecipeScraper:
+    """Concurrent getRecipe client with rate limiting, retries and an append-only JSONL stream"""
+
+    def __init__(self, base_url=BASE_URL, workers=8, rate=4.0, max_retries=4, backoff=1.0,
+                 timeout=10, stream_path=STREAM_PATH):
+        self.base_url = base_url
+        self.workers = workers
+        self.bucket = TokenBucket(rate)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.stream_path = stream_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _session(self):
+        # One pooled session per worker thread keeps connections alive between requests
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def fetch(self, recipe_id):
+        """Fetch one recipe payload, retrying transient errors with exponential backoff"""
+        params = {"id": str(recipe_id), "language": "en"}
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                r = self._session().get(self.base_url, params={'input': json.dumps(params)}, timeout=self.timeout)
+                if r.status_code in RETRYABLE_STATUS and attempt < self.max_retries:
+                    raise requests.HTTPError(f"{r.status_code} from server", response=r)
+                r.raise_for_status()
+                return r.json()
+            except (requests.RequestException, ValueError) as e:
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                if attempt >= self.max_retries or (status is not None and status not in RETRYABLE_STATUS):
+                    raise
+                delay = self.backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+                time.sleep(delay)
+
+    def _append(self, record):
+        # Each record is streamed to disk as soon as it is parsed and then dropped from memory
+        if not self.stream_path:
+            return
+        with self._write_lock:
+            with open(self.stream_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+
+    def _process(self, recipe_id):
+        data = self.fetch(recipe_id)
+        recipe_data = data.get('result', {}).get('data')
+        if not recipe_data:
+            return None
+        record = parse_recipe(recipe_data)
+        self._append(record)
+        return record['id'], record['name']
+
+    def scrape(self, ids, resume=True):
+        """Fetch every id concurrently, streaming records to disk; returns the set of streamed ids"""
+        if resume:
+            repair_stream(self.stream_path)
+        done = load_streamed_ids(self.stream_path) if resume else set()
+        if not resume and self.stream_path and os.path.exists(self.stream_path):
+            os.remove(self.stream_path)
+        pending = [recipe_id for recipe_id in ids if str(recipe_id) not in done]
+        if done:
+            print(f"Resuming: {len(ids) - len(pending)} recipes already streamed")
+
+        total = len(ids)
+        completed = total - len(pending)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._process, recipe_id): recipe_id for recipe_id in pending}
+            for future in as_completed(futures):
+                recipe_id = futures[future]
+                completed += 1
+                try:
+                    processed = future.result()
+                except (requests.RequestException, ValueError) as e:
+                    print(f"Request/JSON error for id {recipe_id}: {e}")
+                    continue
+                if processed is None:
+                    print(f"No recipe data for id {recipe_id}")
+                    continue
+                done.add(str(recipe_id))
+                print(f"Processed recipe {completed}/{total}: {processed[1]} (ID: {processed[0]})")
+
+        return done
+
+
+def refresh_catalog(listing, scraper, incremental=False, resume=True, compact=True,
+                    catalog_path=CATALOG_PATH, manifest_path=MANIFEST_PATH):
+    """Fetch the listed recipes (only the new or changed ones when ``incremental``) and compact them into the
+    catalog; returns (ids fetched, recipes compacted)"""
+    if incremental:
+        manifest = seed_manifest(listing, catalog_path, manifest_path)
+        ids = changed_ids(listing, manifest)
+        print(f"Incremental refresh: {len(ids)} of {len(listing)} recipes are new or changed")
+    else:
+        ids = list(listing)
+        print("Downloading all recipes...")
+
+    streamed = scraper.scrape(ids, resume=resume)
+    print(f"Streamed recipes: {len(streamed)} to {scraper.stream_path}")
+
+    merged = 0
+    if compact:
+        merged = compact_stream(listing, scraper.stream_path, catalog_path, manifest_path)
+        print(f"Compacted {merged} recipes into {catalog_path}")
+    return ids, merged
+
+
+def get_all_recipes(ids=None, resume=True, **scraper_options):
+    """Download every recipe listed in all_recipes.csv and return the streamed records"""
+    if ids is None:
+        ids = load_recipe_ids()
+    scraper = RecipeScraper(**scraper_options)
+    scraper.scrape(ids, resume=resume)
+    records = {str(record['id']): record for record in iter_stream(scraper.stream_path)}
+    return [records[str(recipe_id)] for recipe_id in ids if str(recipe_id) in records]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Download all Blue Protocol recipes")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--ids', default=RECIPES_CSV, help="CSV with 'id' and 'createdAt' columns")
+    parser.add_argument('--output', default=CATALOG_PATH)
+    parser.add_argument('--stream', default=STREAM_PATH, help="Append-only JSONL the records are streamed to")
+    parser.add_argument('--manifest', default=MANIFEST_PATH)
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only fetch recipes that are new or changed since the last compaction")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=4.0, help="Maximum requests per second")
+    parser.add_argument('--retries', type=int, default=4)
+    parser.add_argument('--backoff', type=float, default=1.0, help="Initial retry delay in seconds")
+    parser.add_argument('--fresh', action='store_true', help="Discard records streamed by an interrupted run")
+    parser.add_argument('--no-compact', action='store_true', help="Leave the streamed records uncompacted")
+    return parser.parse_args()
 
 
 if __name__ == '__main__':
-    print("Downloading all recipes...")
-    all_recipes = get_all_recipes()
-    df = pd.DataFrame(all_recipes)
-    print(f"Total recipes: {len(df)}")
-    df.to_json('RecipesData.json', orient='records', indent=2)
-    print("Saved to RecipesData.json")
\ No newline at end of file
+    args = parse_args()
+    scraper = RecipeScraper(
+        base_url=args.base_url, workers=args.workers, rate=args.rate, max_retries=args.retries,
+        backoff=args.backoff, stream_path=args.stream
+    )
+    refresh_catalog(load_recipe_listing(args.ids), scraper, incremental=args.incremental, resume=not args.fresh,
+                    compact=not args.no_compact, catalog_path=args.output, manifest_path=args.manifest)
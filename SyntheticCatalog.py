@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+BLUE PROTOCOL - SYNTHETIC CATALOG GENERATOR
+
+Writes a config directory in the same shapes as the real one (gatherable,
+craftable, recipes, market_prices, RecipesData and the two listing CSVs)
+with any number of recipes arranged in tiers: tier 1 is crafted from
+gathered ores and bought reagents, every later tier from items of the tiers
+below it, so recipe chains are ``depth`` levels deep.
+"""
+
+import csv
+import json
+import os
+
+import numpy as np
+
+LISTING_COLUMNS = ['compoundId', 'id', 'name', 'icon', 'grade', 'language', 'dbType',
+                   'mainCategory', 'createdAt', 'isDisabled']
+CREATED_AT = '2025-10-16'
+
+
+def _write_json(path, payload):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2)
+
+
+def _write_listing(path, rows, prefix, db_type, category):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(LISTING_COLUMNS)
+        for item_id, name in rows:
+            writer.writerow([f"{prefix}-{item_id}", item_id, name, '/assets/synthetic', 1, 'en',
+                             db_type, category, CREATED_AT, False])
+
+
+def generate_catalog(config_path, n_recipes=1000, n_gatherables=None, depth=4, n_reagents=None, seed=0):
+    """Write a synthetic config directory and return a summary of what was generated"""
+    rng = np.random.default_rng(seed)
+    n_gatherables = n_gatherables or max(3, n_recipes // 10)
+    n_reagents = n_reagents or max(2, n_gatherables // 5)
+    os.makedirs(config_path, exist_ok=True)
+
+    gatherable = {}
+    prices = {}
+    for i in range(n_gatherables):
+        name = f"Synthetic Ore {i}"
+        gatherable[name] = {'focus_cost': int(rng.choice([10, 20, 30])), 'yield': int(rng.integers(5, 16)),
+                            'Job': 'Mineralogy'}
+        prices[name] = int(rng.integers(50, 400))
+    reagents = [f"Synthetic Powder {i}" for i in range(n_reagents)]
+    for name in reagents:
+        prices[name] = int(rng.integers(80, 500))
+
+    # Spread the recipes over the tiers; each tier only consumes items of lower tiers
+    tier_sizes = np.full(depth, n_recipes // depth)
+    tier_sizes[:n_recipes % depth] += 1
+    craftable = {}
+    recipes = {}
+    tiers = [list(gatherable)]
+    for tier, size in enumerate(tier_sizes, start=1):
+        lower = [item for level in tiers for item in level]
+        products = []
+        for _ in range(size):
+            name = f"Synthetic T{tier} Product {len(craftable)}"
+            n_inputs = int(rng.integers(1, 4))
+            pool = tiers[0] if tier == 1 else lower
+            picks = rng.choice(len(pool), size=min(n_inputs, len(pool)), replace=False)
+            ingredients = {pool[p]: int(rng.integers(1, 10)) for p in picks}
+            ingredients[reagents[int(rng.integers(len(reagents)))]] = 1
+            recipes[name] = ingredients
+            craftable[name] = {'focus_cost': int(rng.choice([10, 20])), 'yield': int(rng.integers(1, 4)),
+                               'Job': 'Mineralogy'}
+            material_cost = sum(qty * prices[i] for i, qty in ingredients.items())
+            # Most products sell for a margin over their materials, some at a loss
+            prices[name] = int(material_cost * rng.uniform(0.8, 1.6)) + 1
+            products.append(name)
+        tiers.append(products)
+
+    item_ids = {name: 1_000_000 + i for i, name in enumerate(prices)}
+    records = []
+    listing = []
+    for i, (product, ingredients) in enumerate(recipes.items()):
+        recipe_id = 9_000_000 + i
+        amount = craftable[product]['yield']
+        records.append({
+            'id': str(recipe_id),
+            'name': product,
+            'icon': '/assets/synthetic',
+            'grade': 1,
+            'dbType': 'recipe',
+            'mainCategory': 'smelting',
+            'description': f"Synthetic recipe {i}",
+            'FocusCost': float(craftable[product]['focus_cost']),
+            'input_data': [{
+                'input_id': str(item_ids[item]), 'item_name': item, 'amount': qty, 'isVariable': False,
+                'grade': 1, 'mainCategory': 'materials', 'subCategory': 'materials'
+            } for item, qty in ingredients.items()],
+            'output_data': [{
+                'output_id': str(item_ids[product]), 'item_name': product, 'rate': 1, 'isVariable': False,
+                'grade': 1, 'maxAmount': amount + 2, 'minAmount': amount,
+                'mainCategory': 'materials', 'subCategory': 'materials', 'amount': amount
+            }]
+        })
+        listing.append((recipe_id, product))
+
+    _write_json(os.path.join(config_path, 'gatherable.json'), gatherable)
+    _write_json(os.path.join(config_path, 'craftable.json'), craftable)
+    _write_json(os.path.join(config_path, 'recipes.json'), recipes)
+    _write_json(os.path.join(config_path, 'market_prices.json'), prices)
+    _write_json(os.path.join(config_path, 'RecipesData.json'), records)
+    _write_listing(os.path.join(config_path, 'all_recipes.csv'), listing, 'recipe', 'recipe', 'smelting')
+    _write_listing(os.path.join(config_path, 'all_collectable.csv'),
+                   [(item_ids[name], name) for name in gatherable], 'collectable', 'collectable', 'mineralogy')
+
+    return {'recipes': len(recipes), 'gatherables': len(gatherable), 'reagents': len(reagents),
+            'items': len(prices), 'depth': depth}
+
+
+if __name__ == "__main__":
+    import sys
+
+    target = sys.argv[1] if len(sys.argv) > 1 else "config_synthetic"
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    summary = generate_catalog(target, size)
+    print(f"Generated {summary['recipes']} recipes, {summary['gatherables']} gatherables "
+          f"and {summary['items']} priced items in {target}")
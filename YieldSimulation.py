@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+BLUE PROTOCOL - MONTE CARLO YIELD SIMULATION
+"""
+
+import numpy as np
+
+
+class StreamingHistogram:
+    """Per-strategy fixed-range histograms: percentiles and tail means in bounded memory
+
+    Every strategy's profit range is known up front (all sessions at minimum
+    or maximum yield), so batches are folded into ``bins`` counts per
+    strategy instead of keeping the samples.
+    """
+
+    def __init__(self, low, high, bins=2048):
+        self.low = np.asarray(low, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.bins = bins
+        self.width = np.where(self.high > self.low, (self.high - self.low) / bins, 1.0)
+        self.counts = np.zeros((len(self.low), bins), dtype=np.int64)
+        self.sums = np.zeros((len(self.low), bins))
+
+    def add(self, samples):
+        """Fold a (strategy x trials) batch into the histograms"""
+        n_strategies = samples.shape[0]
+        index = np.floor((samples - self.low[:, None]) / self.width[:, None]).astype(np.int64)
+        index = np.clip(index, 0, self.bins - 1) + np.arange(n_strategies)[:, None] * self.bins
+        size = n_strategies * self.bins
+        self.counts += np.bincount(index.ravel(), minlength=size).reshape(n_strategies, self.bins)
+        self.sums += np.bincount(index.ravel(), weights=samples.ravel(), minlength=size).reshape(n_strategies, self.bins)
+
+    def percentile(self, q):
+        """Approximate q-th percentile (0-100) per strategy, interpolated inside the bin"""
+        cumulative = np.cumsum(self.counts, axis=1)
+        target = cumulative[:, -1] * q / 100.0
+        bin_index = np.minimum((cumulative < target[:, None]).sum(axis=1), self.bins - 1)
+        rows = np.arange(len(self.low))
+        before = np.where(bin_index > 0, cumulative[rows, np.maximum(bin_index - 1, 0)], 0)
+        inside = self.counts[rows, bin_index]
+        fraction = np.where(inside > 0, (target - before) / np.maximum(inside, 1), 0.0)
+        return self.low + (bin_index + np.clip(fraction, 0, 1)) * self.width
+
+    def tail_mean(self, q):
+        """Mean of the worst q percent of outcomes per strategy (expected shortfall)"""
+        total = self.counts.sum(axis=1)
+        cutoff = total * q / 100.0
+        cumulative = np.cumsum(self.counts, axis=1)
+        before = cumulative - self.counts
+        # Whole bins below the cutoff count fully; the boundary bin counts pro rata
+        share = np.clip((cutoff[:, None] - before) / np.maximum(self.counts, 1), 0, 1)
+        share = np.where(self.counts > 0, share, 0)
+        weight = (share * self.counts).sum(axis=1)
+        return np.where(weight > 0, (share * self.sums).sum(axis=1) / np.maximum(weight, 1e-12), np.nan)
+
+
+class YieldSimulator:
+    def __init__(self, graph, prices, daily_focus=400, focus_value=0.0):
+        self.graph = graph
+        self.daily_focus = daily_focus
+        self.strategies = []
+        self._build_strategies(prices, focus_value)
+
+    def _build_strategies(self, prices, focus_value):
+        """One strategy per recipe: spend the whole daily focus crafting it, buying inputs at best cost"""
+        resolved = self.graph.resolve_prices(prices)
+        input_costs = self.graph.recipe_input_costs(prices)
+        for recipe, input_cost in zip(self.graph.recipes, input_costs):
+            if recipe['focus_cost'] <= 0 or not np.isfinite(input_cost):
+                continue
+            sessions = int(self.daily_focus // recipe['focus_cost'])
+            entries = [(rate, int(low), int(high), resolved.get(item_id, 0))
+                       for item_id, rate, low, high in recipe['output_entries']]
+            if sessions <= 0 or not any(value for *_, value in entries):
+                continue
+            self.strategies.append({
+                'recipe': recipe,
+                'sessions': sessions,
+                'cost': sessions * (input_cost + recipe['focus_cost'] * focus_value),
+                'rates': np.array([rate for rate, *_ in entries], dtype=float),
+                'entries': entries
+            })
+
+    def expected_profit(self):
+        return np.array([
+            s['sessions'] * sum(rate * (low + high) / 2 * value for rate, low, high, value in s['entries']) - s['cost']
+            for s in self.strategies
+        ])
+
+    def profit_bounds(self):
+        low = [s['sessions'] * min(low * value for _, low, _, value in s['entries']) - s['cost']
+               for s in self.strategies]
+        high = [s['sessions'] * max(high * value for _, _, high, value in s['entries']) - s['cost']
+                for s in self.strategies]
+        return np.array(low, dtype=float), np.array(high, dtype=float)
+
+    def sample(self, rng, trials):
+        """(strategy x trials) daily profits for one batch; loops over strategies, never over trials"""
+        profits = np.empty((len(self.strategies), trials))
+        for row, strategy in enumerate(self.strategies):
+            rates = strategy['rates'] / strategy['rates'].sum()
+            # Which output each session lands on, then the amount rolled within [min, max]
+            counts = rng.multinomial(strategy['sessions'], rates, size=trials)
+            revenue = np.zeros(trials)
+            for column, (_, low, high, value) in enumerate(strategy['entries']):
+                amount = counts[:, column] * low
+                spread = high - low
+                if spread > 0:
+                    rolls = rng.multinomial(counts[:, column], np.full(spread + 1, 1.0 / (spread + 1)))
+                    amount = amount + rolls @ np.arange(spread + 1)
+                revenue += amount * value
+            profits[row] = revenue - strategy['cost']
+        return profits
+
+    def run(self, trials=100_000, batch_size=10_000, seed=None, bins=2048):
+        """Simulate ``trials`` days per strategy in batches and summarize the profit distribution"""
+        import pandas as pd
+        rng = np.random.default_rng(seed)
+        n = len(self.strategies)
+        if n == 0:
+            return pd.DataFrame()
+
+        low, high = self.profit_bounds()
+        histogram = StreamingHistogram(low, high, bins)
+        count = 0
+        mean = np.zeros(n)
+        m2 = np.zeros(n)
+        losses = np.zeros(n, dtype=np.int64)
+
+        done = 0
+        while done < trials:
+            size = min(batch_size, trials - done)
+            batch = self.sample(rng, size)
+            histogram.add(batch)
+            losses += (batch < 0).sum(axis=1)
+
+            # Chan et al. merge of running mean/variance with the batch
+            batch_mean = batch.mean(axis=1)
+            batch_m2 = ((batch - batch_mean[:, None]) ** 2).sum(axis=1)
+            delta = batch_mean - mean
+            total = count + size
+            mean += delta * size / total
+            m2 += batch_m2 + delta ** 2 * count * size / total
+            count = total
+            done += size
+
+        df = pd.DataFrame({
+            'Recipe': [s['recipe']['name'] for s in self.strategies],
+            'Sessions/Day': [s['sessions'] for s in self.strategies],
+            'Expected Profit': self.expected_profit(),
+            'Mean Profit': mean,
+            'Std Dev': np.sqrt(m2 / max(count - 1, 1)),
+            'P5': histogram.percentile(5),
+            'P50': histogram.percentile(50),
+            'P95': histogram.percentile(95),
+            'P(Loss)': losses / count,
+            'CVaR 5%': histogram.tail_mean(5)
+        })
+        return df.sort_values(by='Mean Profit', ascending=False)
+
+
+if __name__ == "__main__":
+    import json
+    import time
+
+    from RecipeGraph import RecipeGraph
+
+    with open("config/market_prices.json") as f:
+        prices = json.load(f)
+
+    start = time.perf_counter()
+    simulator = YieldSimulator(RecipeGraph(), prices)
+    summary = simulator.run(seed=0)
+    print(f"Simulated {len(simulator.strategies)} strategies x 100,000 days in {time.perf_counter() - start:.2f}s")
+    if not summary.empty:
+        print(summary.head(10).to_string(index=False))
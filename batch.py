@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+BLUE PROTOCOL - HEADLESS BATCH ANALYSIS
+
+Runs the analysis (or a subset of its stages) without any prompt and writes
+machine-readable results:
+
+    python batch.py                                  # run_analysis stages as JSON on stdout
+    python batch.py --format csv --output out/       # one CSV per stage
+    python batch.py --stages gathering focus_allocation --format parquet --output out/
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from Calculator import ProfitCalculatorOptimized
+
+DEFAULT_STAGES = ['gathering', 'optimal_strategies', 'comprehensive']
+
+
+def _optimal_strategies(calculator, results):
+    optimal_df = calculator.find_optimal_strategies()
+    calculator.add_sensitivity(optimal_df)
+    return optimal_df
+
+
+def _add_details(results, calculator):
+    """Render the material text columns of the optimal strategies (numeric columns only by default)"""
+    if 'optimal_strategies' in results:
+        results['optimal_strategies'] = calculator.format_strategy_details(results['optimal_strategies'])
+
+
+# stage -> (stages it needs first, function(calculator, results) -> DataFrame)
+STAGES = {
+    'gathering': ([], lambda calculator, results: calculator.calculate_only_gathering()),
+    'optimal_strategies': ([], _optimal_strategies),
+    'comprehensive': (['gathering', 'optimal_strategies'],
+                      lambda calculator, results: calculator.build_comprehensive(results)),
+    'robustness': (['gathering', 'optimal_strategies'],
+                   lambda calculator, results: calculator.rank_by_robustness(results)),
+    'crafting_trees': ([], lambda calculator, results: calculator.price_crafting_trees()),
+    'focus_allocation': ([], lambda calculator, results: calculator.optimize_focus_allocation()[1]),
+}
+
+
+def run_stages(calculator, stages):
+    """Run the requested stages (plus whatever they depend on) and return stage -> DataFrame"""
+    results = {}
+
+    def run(stage):
+        if stage in results:
+            return
+        requires, compute = STAGES[stage]
+        for required in requires:
+            run(required)
+        results[stage] = compute(calculator, results)
+
+    for stage in stages:
+        run(stage)
+    if 'gathering' in results and 'optimal_strategies' in results:
+        calculator.last_results = {key: results[key] for key in DEFAULT_STAGES if key in results}
+    return {stage: results[stage] for stage in stages}
+
+
+def flatten_frame(df):
+    """Move the item/product index into a 'Name' column; positional indexes are dropped"""
+    if df.index.dtype.kind in 'iu':
+        return df.reset_index(drop=True)
+    return df.rename_axis(df.index.name or 'Name').reset_index()
+
+
+def frame_records(df):
+    """DataFrame -> list of JSON-safe row dicts"""
+    return json.loads(flatten_frame(df).to_json(orient='records'))
+
+
+def write_results(results, output, fmt, metadata):
+    """Write every stage to ``output`` (a directory, or '-' for one JSON document on stdout)"""
+    if output == '-':
+        if fmt != 'json':
+            print("Error: only --format json can be written to stdout; pass --output DIR", file=sys.stderr)
+            return False
+        json.dump({**metadata, 'results': {stage: frame_records(df) for stage, df in results.items()}},
+                  sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return True
+
+    os.makedirs(output, exist_ok=True)
+    for stage, df in results.items():
+        path = os.path.join(output, f"{stage}.{fmt}")
+        frame = flatten_frame(df)
+        if fmt == 'json':
+            with open(path, 'w') as f:
+                json.dump(frame_records(df), f, indent=2)
+        elif fmt == 'csv':
+            frame.to_csv(path, index=False)
+        else:
+            try:
+                frame.to_parquet(path, index=False)
+            except ImportError as e:
+                print(f"Error: Parquet output needs pyarrow or fastparquet ({e})", file=sys.stderr)
+                return False
+        print(f"Wrote {stage}: {len(df)} rows -> {path}", file=sys.stderr)
+    with open(os.path.join(output, 'metadata.json'), 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return True
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the profit analysis headless and write JSON/CSV/Parquet")
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=DEFAULT_STAGES)
+    parser.add_argument('--format', choices=['json', 'csv', 'parquet'], default='json')
+    parser.add_argument('--output', default='-', help="Output directory, or '-' for JSON on stdout")
+    parser.add_argument('--daily-focus', type=int, default=400)
+    parser.add_argument('--config', default='config', help="Directory with the JSON config files")
+    parser.add_argument('--derived', action='store_true',
+                        help="Derive the mechanics tables from the scraped catalog (hand-written JSON on top)")
+    parser.add_argument('--assumed-gatherables', action='store_true',
+                        help="With --derived, also gather the catalog items whose node mechanics are assumed")
+    parser.add_argument('--workers', type=int, help="Search products in parallel with this many processes")
+    parser.add_argument('--details', action='store_true',
+                        help="Include the human-readable material/allocation text of optimal strategies")
+    parser.add_argument('--stats', help="Write stage timings, counters and skip reasons to this JSON file")
+    parser.add_argument('--profile', help="Write a cProfile dump of the run to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        calculator = ProfitCalculatorOptimized(config_path=args.config, daily_focus=args.daily_focus,
+                                               derived=args.derived,
+                                               assumed_gatherables=args.assumed_gatherables)
+        calculator.workers = args.workers
+        if args.stats or args.profile:
+            stats = calculator.enable_instrumentation(profile=bool(args.profile))
+            with stats.profiling():
+                results = run_stages(calculator, args.stages)
+        else:
+            results = run_stages(calculator, args.stages)
+        if args.details:
+            _add_details(results, calculator)
+    except Exception as e:
+        print(f"An error occurred during analysis: {e}", file=sys.stderr)
+        return 1
+    if args.stats:
+        with open(args.stats, 'w') as f:
+            json.dump(calculator.stats.to_dict(), f, indent=2)
+        print(calculator.stats.report(), file=sys.stderr)
+    if args.profile:
+        calculator.stats.dump_profile(args.profile)
+    metadata = {
+        'daily_focus': args.daily_focus,
+        'data_version': calculator.data_version,
+        'stages': args.stages
+    }
+    return 0 if write_results(results, args.output, args.format, metadata) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+BLUE PROTOCOL - BENCHMARK SUITE
+
+Times the main calculator stages on synthetic catalogs of several sizes and
+stores the results as JSON so later runs can be compared against a baseline:
+
+    python benchmark.py --sizes 100 1000 5000 --save benchmarks/main.json
+    python benchmark.py --baseline benchmarks/main.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from Calculator import ProfitCalculatorOptimized
+from SyntheticCatalog import generate_catalog
+
+
+def _time(function, repeat, setup=None):
+    """Run ``function`` ``repeat`` times (``setup`` before each, untimed); returns seconds per run"""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def benchmark_size(config_path, repeat=3, sensitivity_rows=200):
+    """Time every stage against the catalog in ``config_path``; returns stage -> timing summary
+
+    calculate_sensitivity is a per-row call, so it is timed over the first
+    ``sensitivity_rows`` optimal strategies only.
+    """
+    calculator = ProfitCalculatorOptimized(config_path)
+    optimal_df = calculator.find_optimal_strategies().head(sensitivity_rows)
+
+    def sensitivity():
+        for _, row in optimal_df.iterrows():
+            calculator.calculate_sensitivity(row)
+
+    def fresh_graph():
+        calculator._recipe_graph = None
+
+    # mark_data_changed drops the buy-all baseline cache, so every repeat is a cold run
+    stages = {
+        'load_data': (lambda: ProfitCalculatorOptimized(config_path), None),
+        'calculate_only_gathering': (calculator.calculate_only_gathering, calculator.mark_data_changed),
+        'find_optimal_strategies': (calculator.find_optimal_strategies, calculator.mark_data_changed),
+        'top_k_strategies': (lambda: calculator.top_k_strategies(10), calculator.mark_data_changed),
+        'plan_production': (lambda: calculator.plan_production(30), None),
+        'calculate_sensitivity': (sensitivity, None),
+        'run_analysis': (calculator.run_analysis, calculator.mark_data_changed),
+        'recipe_graph': (calculator.get_recipe_graph, fresh_graph),
+    }
+    results = {}
+    for stage, (function, setup) in stages.items():
+        timings = _time(function, repeat, setup)
+        results[stage] = {'min': min(timings), 'median': statistics.median(timings), 'runs': len(timings)}
+    return results
+
+
+def run_benchmarks(sizes, repeat=3, depth=4, seed=0, workdir=None):
+    """Generate one synthetic catalog per size and benchmark it"""
+    own_workdir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="bp_benchmark_")
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'sizes': {}
+    }
+    try:
+        for size in sizes:
+            config_path = os.path.join(workdir, f"catalog_{size}")
+            catalog = generate_catalog(config_path, size, depth=depth, seed=seed)
+            print(f"Benchmarking {catalog['recipes']} recipes / {catalog['gatherables']} gatherables...",
+                  file=sys.stderr)
+            report['sizes'][str(size)] = {'catalog': catalog, 'stages': benchmark_size(config_path, repeat)}
+    finally:
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+def compare(report, baseline, threshold=1.25):
+    """Print current vs baseline best times; returns the (size, stage) pairs slower than ``threshold``"""
+    regressions = []
+    print(f"\n{'Size':>6}  {'Stage':<26}{'Baseline':>12}{'Current':>12}{'Ratio':>8}")
+    print("-" * 66)
+    for size, entry in report['sizes'].items():
+        previous = baseline.get('sizes', {}).get(size)
+        if previous is None:
+            continue
+        for stage, timing in entry['stages'].items():
+            if stage not in previous['stages']:
+                continue
+            before = previous['stages'][stage]['min']
+            after = timing['min']
+            ratio = after / before if before > 0 else float('inf')
+            flag = "  <-- slower" if ratio > threshold else ""
+            print(f"{size:>6}  {stage:<26}{before * 1000:>10.2f}ms{after * 1000:>10.2f}ms{ratio:>7.2f}x{flag}")
+            if ratio > threshold:
+                regressions.append((size, stage))
+    return regressions
+
+
+def print_report(report):
+    print(f"\n{'Size':>6}  {'Stage':<26}{'Median':>12}{'Min':>12}")
+    print("-" * 58)
+    for size, entry in report['sizes'].items():
+        for stage, timing in entry['stages'].items():
+            print(f"{size:>6}  {stage:<26}{timing['median'] * 1000:>10.2f}ms{timing['min'] * 1000:>10.2f}ms")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the profit calculator on synthetic catalogs")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000], help="Recipe counts")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--depth', type=int, default=4, help="Recipe chain depth (tiers)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="Compare against a saved results file")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="Slowdown ratio reported as a regression")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    report = run_benchmarks(args.sizes, args.repeat, args.depth, args.seed)
+    print_report(report)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or '.', exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than {args.threshold:.2f}x the baseline")
+            sys.exit(1)
@@ -3,13 +3,204 @@
 BLUE PROTOCOL - INTERACTIVE MENU
 """
 
+import io
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
 from Calculator import ProfitCalculatorOptimized
 
+
+class _ThreadOutput:
+    """sys.stdout/stderr stand-in that sends the writes of registered threads to their own buffers"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffers = {}
+
+    def _target(self):
+        return self.buffers.get(threading.get_ident(), self.stream)
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+_thread_output_lock = threading.Lock()
+
+
+def _capture_thread_output(buffer):
+    """Send everything the calling thread prints (stdout and stderr) to ``buffer``
+
+    The process streams are only wrapped while at least one thread is
+    captured; other threads keep writing to the original streams.
+    """
+    with _thread_output_lock:
+        for name in ('stdout', 'stderr'):
+            stream = getattr(sys, name)
+            if not isinstance(stream, _ThreadOutput):
+                stream = _ThreadOutput(stream)
+                setattr(sys, name, stream)
+            stream.buffers[threading.get_ident()] = buffer
+
+
+def _release_thread_output():
+    """Stop capturing the calling thread; the original streams are restored once no thread is captured"""
+    with _thread_output_lock:
+        for name in ('stdout', 'stderr'):
+            stream = getattr(sys, name)
+            if isinstance(stream, _ThreadOutput):
+                stream.buffers.pop(threading.get_ident(), None)
+                if not stream.buffers:
+                    setattr(sys, name, stream.stream)
+
+
+def _usable(result):
+    """run_analysis returns {} when it fails; such results are never cached"""
+    return result is not None and not (isinstance(result, dict) and not result)
+
+
+class MenuSession:
+    """Calculator results for the menu, cached per (daily focus, data version)
+
+    Results live in a small LRU (``max_entries`` results, oldest dropped
+    first), so repeated selections never recompute until the focus or the
+    data changes; failed (empty) analyses are not kept. The lock only guards
+    the cache: results are computed outside it, and a selection made while
+    the same result is being computed waits for that computation instead of
+    starting another. warm_up runs on its own copy of the calculator, so
+    the menu never waits for it unless it asks for the result being warmed.
+    """
+
+    def __init__(self, calculator, max_entries=8):
+        self.calculator = calculator
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.warm_up_error = None
+        self._results = OrderedDict()
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def _key(self, key, calculator=None):
+        calculator = calculator or self.calculator
+        return (*key, calculator.daily_focus, calculator.data_version)
+
+    def _cached(self, key, compute):
+        with self._lock:
+            if key in self._results:
+                self.hits += 1
+                self._results.move_to_end(key)
+                return self._results[key]
+            running = self._running.get(key)
+            if running is None:
+                self.misses += 1
+                running = self._running[key] = Future()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            result = running.result()
+            # The other computation failed: compute it again here
+            return result if _usable(result) else self._cached(key, compute)
+
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._running[key]
+            running.set_exception(e)
+            raise
+        with self._lock:
+            del self._running[key]
+            if _usable(result):
+                self._results[key] = result
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+        running.set_result(result)
+        return result
+
+    def _cached_analysis(self):
+        with self._lock:
+            analysis = self._results.get(self._key(('analysis',)))
+        return analysis if _usable(analysis) else None
+
+    def analysis(self):
+        return self._cached(self._key(('analysis',)), self.calculator.run_analysis)
+
+    def gathering(self):
+        def compute():
+            # A full analysis already holds the gathering table
+            analysis = self._cached_analysis()
+            if analysis is not None and 'gathering' in analysis:
+                return analysis['gathering']
+            return self.calculator.calculate_only_gathering()
+        return self._cached(self._key(('gathering',)), compute)
+
+    def top_strategies(self, k=10):
+        def compute():
+            analysis = self._cached_analysis()
+            if analysis is not None and 'optimal_strategies' in analysis:
+                return analysis['optimal_strategies'].head(k)
+            # Only the top k are shown, so products that cannot reach them are never optimized
+            return self.calculator.top_k_strategies(k)
+        return self._cached(self._key(('top_strategies', k)), compute)
+
+    def single_product(self, product_name):
+        # Not cached: the analysis prints its breakdown as it goes
+        return self.calculator.analyze_single_product(product_name)
+
+    def format_strategy_details(self, optimal_df):
+        return self.calculator.format_strategy_details(optimal_df)
+
+    def set_daily_focus(self, daily_focus):
+        self.calculator.daily_focus = daily_focus
+
+    def warm_up(self):
+        """Start the full analysis for the current focus in a background thread
+
+        The thread works on a snapshot of the calculator's tables and keeps
+        what it prints to itself; a failure is left in ``warm_up_error``.
+        """
+        snapshot = ProfitCalculatorOptimized(self.calculator.config_path, self.calculator.daily_focus,
+                                             tables=self.calculator.get_tables())
+        key = self._key(('analysis',))
+        self.warm_up_error = None
+
+        def run():
+            output = io.StringIO()
+            _capture_thread_output(output)
+            try:
+                if not _usable(self._cached(key, snapshot.run_analysis)):
+                    lines = output.getvalue().strip().splitlines()
+                    self.warm_up_error = lines[0] if lines else "no results"
+            except Exception as e:
+                self.warm_up_error = str(e)
+            finally:
+                _release_thread_output()
+
+        thread = threading.Thread(target=run, name="menu-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+
 def interactive_menu():
     """Interactive menu for the profit calculator"""
     calculator = ProfitCalculatorOptimized()
-    
+    session = MenuSession(calculator)
+    session.warm_up()
+
     while True:
+        if session.warm_up_error:
+            print(f"\n⚠️ Background analysis failed ({session.warm_up_error}); it runs again when selected")
+            session.warm_up_error = None
         print("\n" + "="*60)
         print("💰 BLUE PROTOCOL - PROFIT CALCULATOR")
         print("="*60)
@@ -18,7 +209,7 @@ def interactive_menu():
         print("3. ⛏️ Only Gathering Analysis")
         print("4. 🛠️ Only Optimal Strategies")
         print("5. 📦 Show Available Products")
-        print("6. ⚙️ Change Daily Focus (Current: 400)")
+        print(f"6. ⚙️ Change Daily Focus (Current: {calculator.daily_focus})")
         print("7. 🚪 Exit")
         print("-" * 60)
         
@@ -26,7 +217,7 @@ def interactive_menu():
         
         if choice == '1':
             print("\n🔄 Running FULL analysis...")
-            results = calculator.run_analysis()
+            results = session.analysis()
             
             print("\n" + "="*60)
             print("FULL ANALYSIS RESULTS:")
@@ -38,10 +229,14 @@ def interactive_menu():
                     print("-" * 40)
                     
                     if key == 'optimal_strategies':
+                        # Material text is only rendered for the rows shown
+                        shown = session.format_strategy_details(df.head(10))
                         important_cols = ['Method', 'Crafted Units', 'Daily Profit', 'Luno/Focus', 
                                         'Focus Allocation', 'Total Materials Needed']
-                        available_cols = [col for col in important_cols if col in df.columns]
-                        print(df[available_cols].to_string(index=False))
+                        available_cols = [col for col in important_cols if col in shown.columns]
+                        print(shown[available_cols].to_string(index=False))
+                        if len(df) > 10:
+                            print(f"\n💡 Showing top 10 of {len(df)} strategies by Daily Profit")
                     
                     elif key == 'comprehensive':
                         print("TOP STRATEGIES:")
@@ -71,7 +266,7 @@ def interactive_menu():
                 
                 if 1 <= selection <= len(available_products):
                     product_name = available_products[selection - 1]
-                    result = calculator.analyze_single_product(product_name)
+                    result = session.single_product(product_name)
                     
                     if result:
                         print(f"\n✅ Analysis complete!")
@@ -92,7 +287,7 @@ def interactive_menu():
         elif choice == '3':
             print("\n⛏️ GATHERING ANALYSIS:")
             print("-" * 40)
-            gathering_df = calculator.calculate_only_gathering()
+            gathering_df = session.gathering()
             if not gathering_df.empty:
                 print(gathering_df.to_string(index=False))
             else:
@@ -102,11 +297,14 @@ def interactive_menu():
         elif choice == '4':
             print("\n🛠️ OPTIMAL STRATEGIES:")
             print("-" * 40)
-            optimal_df = calculator.find_optimal_strategies()
+            optimal_df = session.top_strategies(10)
             if not optimal_df.empty:
+                shown = session.format_strategy_details(optimal_df)
                 important_cols = ['Method', 'Daily Profit', 'Luno/Focus', 'Focus Allocation']
-                available_cols = [col for col in important_cols if col in optimal_df.columns]
-                print(optimal_df[available_cols].to_string(index=False))
+                available_cols = [col for col in important_cols if col in shown.columns]
+                print(shown[available_cols].to_string(index=False))
+                if len(optimal_df) == 10:
+                    print("\n💡 Showing the top 10 strategies by Daily Profit")
             else:
                 print("No optimal strategies found")
             input("\nPress Enter to continue...")
@@ -119,7 +317,8 @@ def interactive_menu():
             try:
                 new_focus = int(input("Enter new daily focus amount: "))
                 if new_focus > 0:
-                    calculator.daily_focus = new_focus
+                    session.set_daily_focus(new_focus)
+                    session.warm_up()
                     print(f"✅ Daily focus updated to: {new_focus}")
                 else:
                     print("❌ Focus must be positive")
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+BLUE PROTOCOL - ANALYSIS SERVICE
+
+Local HTTP/JSON service around a warm ProfitCalculatorOptimized:
+
+    GET /health                          config signature, data version, cache size
+    GET /products                        craftable products
+    GET /analysis?daily_focus=400        gathering, optimal strategies, comprehensive
+    GET /gathering?daily_focus=400       gathering only
+    GET /product?name=Mistery%20Metal    optimal strategy of one product
+    GET /sweep?focus=100,200,400         best profit per strategy and daily focus
+
+Responses are cached per query for the current config (the most recent
+MAX_RESPONSES of them, and calculators for at most MAX_CALCULATORS daily
+focus values); daily focus values are capped at MAX_DAILY_FOCUS and a sweep
+at MAX_SWEEP_POINTS values, so no query can grow the process without
+bound. A watcher thread
+polls the config files; when one changes, a fresh calculator is loaded and
+warmed in the background and then swapped in as a whole, so every request
+sees either the old or the new config, never a mix.
+"""
+
+import argparse
+import glob
+import json
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from batch import frame_records
+from Calculator import ProfitCalculatorOptimized
+
+WATCHED_PATTERNS = ('*.json', '*.csv')
+MAX_DAILY_FOCUS = 10_000
+MAX_SWEEP_POINTS = 100
+MAX_CALCULATORS = 4
+MAX_RESPONSES = 256
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class NotFound(LookupError):
+    pass
+
+
+class ComputeFailed(RuntimeError):
+    pass
+
+
+class _ConfigState:
+    """One loaded config: calculators per daily focus plus the responses computed from them
+
+    Both are LRU caches; the calculator of the service's default focus is
+    never evicted. Calculators for other focus values are built from the
+    tables loaded with the state, never re-read from disk, so all of them see
+    the same config.
+    """
+
+    def __init__(self, config_path, signature, calculator):
+        self.config_path = config_path
+        self.signature = signature
+        self.default_focus = calculator.daily_focus
+        self.calculators = OrderedDict([(calculator.daily_focus, calculator)])
+        self.tables = calculator.get_tables()
+        self.responses = OrderedDict()
+        self.compute_lock = threading.Lock()
+        self.cache_lock = threading.Lock()
+
+    def calculator(self, daily_focus):
+        """Calculator for ``daily_focus`` (only called with compute_lock held)"""
+        if daily_focus in self.calculators:
+            self.calculators.move_to_end(daily_focus)
+            return self.calculators[daily_focus]
+        calculator = ProfitCalculatorOptimized(self.config_path, daily_focus, tables=self.tables)
+        self.calculators[daily_focus] = calculator
+        for focus in list(self.calculators):
+            if len(self.calculators) <= MAX_CALCULATORS:
+                break
+            if focus != self.default_focus:
+                del self.calculators[focus]
+        return calculator
+
+    def cached_response(self, key):
+        with self.cache_lock:
+            body = self.responses.get(key)
+            if body is not None:
+                self.responses.move_to_end(key)
+            return body
+
+    def store_response(self, key, body):
+        with self.cache_lock:
+            self.responses[key] = body
+            while len(self.responses) > MAX_RESPONSES:
+                self.responses.popitem(last=False)
+
+
+class AnalysisService:
+    def __init__(self, config_path="config", daily_focus=400, poll_interval=2.0, derived=False,
+                 assumed_gatherables=False):
+        self.config_path = config_path
+        self.daily_focus = daily_focus
+        self.derived = derived
+        self.assumed_gatherables = assumed_gatherables
+        self.poll_interval = poll_interval
+        self.reloads = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.counter_lock = threading.Lock()
+        self._state = self._load_state(self.config_signature())
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def config_signature(self):
+        """(file, size, mtime) of every watched config file; changes whenever a file is rewritten"""
+        paths = sorted(path for pattern in WATCHED_PATTERNS
+                       for path in glob.glob(os.path.join(self.config_path, pattern)))
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signature.append((os.path.basename(path), stat.st_size, stat.st_mtime_ns))
+        return tuple(signature)
+
+    def _load_state(self, signature):
+        """Load and warm a complete new state; the live state is untouched until it is swapped in"""
+        state = _ConfigState(self.config_path, signature,
+                             ProfitCalculatorOptimized(self.config_path, self.daily_focus, derived=self.derived,
+                                                       assumed_gatherables=self.assumed_gatherables))
+        self._respond(state, 'analysis', (self.daily_focus,))
+        return state
+
+    def reload_if_changed(self):
+        """Swap in a freshly loaded config when any watched file changed; returns True on reload"""
+        signature = self.config_signature()
+        if signature == self._state.signature:
+            return False
+        try:
+            state = self._load_state(signature)
+        except Exception as e:
+            # Usually a file caught mid-write; the next poll retries with the finished file
+            print(f"Config reload failed, keeping the previous config: {e}")
+            return False
+        self._state = state
+        self.reloads += 1
+        print(f"Reloaded config from {self.config_path} (reload #{self.reloads})")
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.reload_if_changed()
+
+    def start_watching(self):
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="config-watcher", daemon=True)
+            self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+
+    # ------------------------------------------------------------------ queries
+
+    def _respond(self, state, endpoint, args):
+        """Cached JSON body for one query against ``state``"""
+        key = (endpoint, args)
+        body = state.cached_response(key)
+        if body is not None:
+            with self.counter_lock:
+                self.cache_hits += 1
+            return body
+        # The calculator caches are not thread-safe, so misses are computed one at a time
+        with state.compute_lock:
+            body = state.cached_response(key)
+            if body is None:
+                with self.counter_lock:
+                    self.cache_misses += 1
+                # A failed computation raises, so only good responses are cached
+                payload = getattr(self, f"_compute_{endpoint}")(state, *args)
+                body = json.dumps(payload).encode('utf-8')
+                state.store_response(key, body)
+            return body
+
+    def query(self, endpoint, params):
+        """JSON body for ``endpoint`` with query-string ``params`` (dict of lists)"""
+        state = self._state
+        if endpoint == 'health':
+            return json.dumps(self._health(state)).encode('utf-8')
+        if endpoint == 'products':
+            return self._respond(state, 'products', ())
+        if endpoint in ('analysis', 'gathering'):
+            return self._respond(state, endpoint, (self._int_param(params, 'daily_focus', self.daily_focus),))
+        if endpoint == 'product':
+            name = params.get('name', [None])[0]
+            if not name:
+                raise BadRequest("Missing 'name' parameter")
+            return self._respond(state, 'product', (name, self._int_param(params, 'daily_focus', self.daily_focus)))
+        if endpoint == 'sweep':
+            raw = params.get('focus', [None])[0]
+            try:
+                focus = tuple(sorted({int(value) for value in raw.split(',')})) if raw else \
+                    tuple(range(50, self.daily_focus * 2 + 1, 50))
+            except ValueError:
+                raise BadRequest("'focus' must be a comma-separated list of integers")
+            if not focus or focus[0] < 0 or focus[-1] > MAX_DAILY_FOCUS:
+                raise BadRequest(f"'focus' values must be between 0 and {MAX_DAILY_FOCUS}")
+            if len(focus) > MAX_SWEEP_POINTS:
+                raise BadRequest(f"'focus' takes at most {MAX_SWEEP_POINTS} values")
+            return self._respond(state, 'sweep', (focus,))
+        raise NotFound(endpoint)
+
+    @staticmethod
+    def _int_param(params, name, default, maximum=MAX_DAILY_FOCUS):
+        try:
+            value = int(params.get(name, [default])[0])
+        except ValueError:
+            raise BadRequest(f"'{name}' must be an integer")
+        if value <= 0 or value > maximum:
+            raise BadRequest(f"'{name}' must be between 1 and {maximum}")
+        return value
+
+    def _health(self, state):
+        calculator = state.calculators[state.default_focus]
+        return {
+            'config_path': self.config_path,
+            'config_files': [name for name, _, _ in state.signature],
+            'data_version': calculator.data_version,
+            'reloads': self.reloads,
+            'cached_responses': len(state.responses),
+            'cached_calculators': len(state.calculators),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses
+        }
+
+    def _compute_products(self, state):
+        return {'products': state.calculator(self.daily_focus).get_available_products()}
+
+    def _compute_analysis(self, state, daily_focus):
+        results = state.calculator(daily_focus).run_analysis()
+        if not results:
+            # run_analysis prints the error and returns {} when it fails
+            raise ComputeFailed(f"analysis failed for daily_focus={daily_focus}")
+        return {'daily_focus': daily_focus, 'results': {key: frame_records(df) for key, df in results.items()}}
+
+    def _compute_gathering(self, state, daily_focus):
+        gathering = state.calculator(daily_focus).calculate_only_gathering()
+        return {'daily_focus': daily_focus, 'gathering': frame_records(gathering)}
+
+    def _compute_product(self, state, name, daily_focus):
+        calculator = state.calculator(daily_focus)
+        if name not in calculator.get_available_products():
+            raise NotFound(name)
+        optimal = calculator.format_strategy_details(calculator.find_optimal_strategies(products=[name]))
+        return {'daily_focus': daily_focus, 'product': name, 'strategy': frame_records(optimal)}
+
+    def _compute_sweep(self, state, focus):
+        sweep = state.calculator(self.daily_focus).sweep_daily_focus(focus)
+        best = sweep.best_profit()
+        allocation = sweep.best_allocation()
+        return {
+            'focus_values': [int(f) for f in sweep.focus_values],
+            'strategies': [
+                {
+                    'Method': strategy,
+                    'Type': strategy_type,
+                    'Daily Profit': [None if value != value else float(value) for value in best[row]],
+                    'Gather Focus': [int(value) for value in allocation[row]]
+                }
+                for row, (strategy, strategy_type) in enumerate(zip(sweep.strategies, sweep.strategy_types))
+            ]
+        }
+
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send(status, json.dumps({'error': message}).encode('utf-8'))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        endpoint = url.path.strip('/') or 'health'
+        try:
+            self._send(200, self.service.query(endpoint, parse_qs(url.query)))
+        except BadRequest as e:
+            self._error(400, str(e))
+        except NotFound as e:
+            self._error(404, f"Not found: {e.args[0]}")
+        except Exception as e:
+            print(f"An error occurred while answering {self.path}: {e}")
+            self._error(500, str(e))
+
+    def log_message(self, format, *args):
+        print(f"{self.address_string()} - {format % args}")
+
+
+def serve(host="127.0.0.1", port=8765, config_path="config", daily_focus=400, poll_interval=2.0, derived=False,
+          assumed_gatherables=False):
+    service = AnalysisService(config_path, daily_focus, poll_interval, derived, assumed_gatherables)
+    handler = type('Handler', (AnalysisRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    service.start_watching()
+    print(f"Serving analysis on http://{host}:{server.server_address[1]} (config: {config_path})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop_watching()
+        server.server_close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve the profit analysis over HTTP/JSON")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--config', default='config', help="Directory with the JSON config files")
+    parser.add_argument('--daily-focus', type=int, default=400)
+    parser.add_argument('--poll', type=float, default=2.0, help="Seconds between config change checks")
+    parser.add_argument('--derived', action='store_true',
+                        help="Derive the mechanics tables from the scraped catalog (hand-written JSON on top)")
+    parser.add_argument('--assumed-gatherables', action='store_true',
+                        help="With --derived, also gather the catalog items whose node mechanics are assumed")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    serve(args.host, args.port, args.config, args.daily_focus, args.poll, args.derived, args.assumed_gatherables)
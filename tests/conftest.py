@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# The modules live flat at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def repo_root():
+    return ROOT
+
+
+@pytest.fixture
+def config_path():
+    """The shipped config directory"""
+    return os.path.join(ROOT, 'config')
@@ -0,0 +1,87 @@
+import random
+
+import numpy as np
+import pytest
+
+from Calculator import ProfitCalculatorOptimized
+
+
+def random_tables(rng, products=3):
+    prices = {'Ore': rng.randint(1, 40), 'Dust': rng.randint(1, 40)}
+    gatherable = {'Ore': {'focus_cost': rng.choice([5, 10, 20]), 'yield': rng.randint(1, 12)}}
+    craftable = {}
+    recipes = {}
+    for index in range(products):
+        product = f"Product {index}"
+        prices[product] = rng.randint(50, 900)
+        craftable[product] = {'focus_cost': rng.choice([5, 15, 30, 50]), 'yield': rng.randint(1, 3)}
+        recipes[product] = {'Ore': rng.randint(1, 8), **({'Dust': rng.randint(1, 4)} if rng.random() < 0.5 else {})}
+    return {'prices': prices, 'gatherable': gatherable, 'craftable': craftable, 'recipes': recipes}
+
+
+def brute_force(tables, budget, product, item):
+    """Best profit over every whole gather focus that leaves room for at least one session of each
+
+    As in calculate_profit_for_allocation, gather focus is floored to whole
+    sessions and everything left over is spent crafting.
+    """
+    gather = tables['gatherable'][item]
+    craft = tables['craftable'][product]
+    prices = tables['prices']
+    best = -np.inf
+    for gather_focus in range(budget + 1):
+        gather_sessions = gather_focus // gather['focus_cost']
+        craft_sessions = (budget - gather_sessions * gather['focus_cost']) // craft['focus_cost']
+        if gather_sessions < 1 or craft_sessions < 1:
+            continue
+        crafted = craft_sessions * craft['yield']
+        gathered = gather_sessions * gather['yield']
+        bought = sum(prices[name] * (max(0, qty * crafted - gathered) if name == item else qty * crafted)
+                     for name, qty in tables['recipes'][product].items())
+        best = max(best, crafted * prices[product] - bought)
+    return best
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_exact_solver_matches_brute_force(seed):
+    rng = random.Random(seed)
+    tables = random_tables(rng)
+    budget = rng.randint(0, 160)
+    calculator = ProfitCalculatorOptimized(daily_focus=budget, tables=tables)
+    pairs = [(product, 'Ore') for product in tables['recipes']]
+
+    best_focus, best_profit = calculator.solve_allocations_exact(pairs)
+    for (product, item), focus, profit in zip(pairs, best_focus, best_profit):
+        expected = brute_force(tables, budget, product, item)
+        assert profit == pytest.approx(expected)
+        if np.isfinite(profit):
+            # The reported split is a whole number of gather sessions within the budget
+            assert 0 < focus <= budget and focus % tables['gatherable'][item]['focus_cost'] == 0
+        else:
+            assert focus == 0
+
+
+def test_zero_budget_has_no_feasible_split():
+    tables = random_tables(random.Random(0))
+    calculator = ProfitCalculatorOptimized(daily_focus=0, tables=tables)
+    best_focus, best_profit = calculator.solve_allocations_exact([(product, 'Ore') for product in tables['recipes']])
+    assert best_focus.tolist() == [0] * len(tables['recipes'])
+    assert np.isneginf(best_profit).all()
+    assert calculator.solve_allocations_exact([])[1].size == 0
+
+
+def test_single_activity():
+    tables = {
+        'prices': {'Ore': 10, 'Ingot': 200},
+        'gatherable': {'Ore': {'focus_cost': 10, 'yield': 5}},
+        'craftable': {'Ingot': {'focus_cost': 30, 'yield': 1}},
+        'recipes': {'Ingot': {'Ore': 4}},
+    }
+    for budget in range(0, 101):
+        calculator = ProfitCalculatorOptimized(daily_focus=budget, tables=tables)
+        _, profit = calculator.solve_allocations_exact([('Ingot', 'Ore')])
+        assert profit[0] == pytest.approx(brute_force(tables, budget, 'Ingot', 'Ore'))
+    # 40 focus fits one gather session and one craft: 200 - 10 * (4 - 5 capped at 0)
+    calculator = ProfitCalculatorOptimized(daily_focus=40, tables=tables)
+    best_focus, best_profit = calculator.solve_allocations_exact([('Ingot', 'Ore')])
+    assert (best_focus.tolist(), best_profit.tolist()) == ([10], [200.0])
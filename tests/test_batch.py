@@ -0,0 +1,45 @@
+import json
+
+import pandas as pd
+
+import batch
+from Calculator import ProfitCalculatorOptimized
+
+
+def test_json_on_stdout_matches_run_analysis(capsys, config_path):
+    assert batch.main(['--config', config_path, '--daily-focus', '600']) == 0
+    document = json.loads(capsys.readouterr().out)
+    assert document['daily_focus'] == 600
+    assert document['stages'] == batch.DEFAULT_STAGES
+
+    expected = ProfitCalculatorOptimized(config_path=config_path, daily_focus=600).run_analysis()
+    for stage in batch.DEFAULT_STAGES:
+        assert batch.frame_records(expected[stage]) == document['results'][stage]
+
+
+def test_csv_stages_and_stats_files(tmp_path, config_path):
+    output = tmp_path / 'out'
+    stats = tmp_path / 'stats.json'
+    argv = ['--config', config_path, '--format', 'csv', '--output', str(output),
+            '--stages', 'robustness', 'focus_allocation', '--stats', str(stats)]
+    assert batch.main(argv) == 0
+
+    # Only the requested stages are written, not the ones they depend on
+    assert sorted(path.name for path in output.iterdir()) == ['focus_allocation.csv', 'metadata.json',
+                                                                'robustness.csv']
+    assert json.loads((output / 'metadata.json').read_text())['stages'] == ['robustness', 'focus_allocation']
+    assert not pd.read_csv(output / 'robustness.csv').empty
+    assert json.loads(stats.read_text())['stages']
+
+
+def test_details_add_the_material_text(capsys, config_path):
+    assert batch.main(['--config', config_path, '--stages', 'optimal_strategies', '--details']) == 0
+    rows = json.loads(capsys.readouterr().out)['results']['optimal_strategies']
+    assert rows and all(row['Total Materials Needed'] for row in rows)
+
+
+def test_errors_exit_non_zero(capsys, tmp_path, config_path):
+    assert batch.main(['--config', str(tmp_path / 'missing')]) == 1
+    assert "error occurred" in capsys.readouterr().err
+    # Only JSON can go to stdout
+    assert batch.main(['--config', config_path, '--format', 'csv']) == 1
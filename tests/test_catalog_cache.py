@@ -0,0 +1,75 @@
+import os
+import shutil
+
+import pytest
+
+import CatalogCache
+from CatalogCache import CATALOG_SOURCES, load_catalog
+
+
+@pytest.fixture
+def sources(tmp_path, config_path):
+    """A config directory holding a copy of the catalog sources only"""
+    for name in CATALOG_SOURCES:
+        shutil.copy(os.path.join(config_path, name), tmp_path / name)
+    return tmp_path
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Count the source parses (catalog compilations) and file hashes"""
+    counts = {'build': 0, 'hash': 0}
+    build_columns, file_hash = CatalogCache._build_columns, CatalogCache._file_hash
+
+    def counting_build(config_path):
+        counts['build'] += 1
+        return build_columns(config_path)
+
+    def counting_hash(path):
+        counts['hash'] += 1
+        return file_hash(path)
+
+    monkeypatch.setattr(CatalogCache, '_build_columns', counting_build)
+    monkeypatch.setattr(CatalogCache, '_file_hash', counting_hash)
+    return counts
+
+
+def touch(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_unchanged_sources_are_not_recompiled_or_rehashed(sources, builds):
+    load_catalog(str(sources))
+    assert builds == {'build': 1, 'hash': len(CATALOG_SOURCES)}
+    load_catalog(str(sources))
+    assert builds == {'build': 1, 'hash': len(CATALOG_SOURCES)}
+
+
+def test_a_touched_source_is_rehashed_once_and_not_recompiled(sources, builds):
+    load_catalog(str(sources))
+    touch(sources / 'RecipesData.json')
+    load_catalog(str(sources))
+    assert builds == {'build': 1, 'hash': len(CATALOG_SOURCES) + 1}
+    # The refreshed stamp spares the next load the hash
+    load_catalog(str(sources))
+    assert builds['hash'] == len(CATALOG_SOURCES) + 1
+
+
+@pytest.mark.parametrize('edit_mtime', [True, False])
+def test_an_edited_source_is_recompiled(sources, builds, edit_mtime):
+    before = load_catalog(str(sources))
+    assert 'Test Pebble' not in before.collectable_name.tolist()
+    collectables = len(before.collectable_id)
+    path = sources / 'all_collectable.csv'
+    stat = os.stat(path)
+    with open(path, 'a') as f:
+        f.write("collectable-29999999,29999999,Test Pebble,/assets/none,0,en,collectable,mineralogy,2025-10-16,False\n")
+    if not edit_mtime:
+        # Same mtime, but the size gives the edit away
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    after = load_catalog(str(sources))
+    assert builds['build'] == 2
+    assert 'Test Pebble' in after.collectable_name.tolist()
+    assert len(after.collectable_id) == collectables + 1
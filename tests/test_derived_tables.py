@@ -0,0 +1,58 @@
+from Calculator import ProfitCalculatorOptimized
+from DerivedTables import drop_assumed, drop_unpriced, gather_defaults
+
+
+def test_gather_defaults_copy_the_hand_written_nodes_of_the_job():
+    hand = {
+        'Luna Ore': {'focus_cost': 20, 'yield': 10, 'Job': 'Mineralogy'},
+        'Azte Ore': {'focus_cost': 20, 'yield': 10, 'Job': 'Mineralogy'},
+        'Wood Branch': {'focus_cost': 15, 'yield': 8, 'Job': 'Forestry'},
+    }
+    defaults = gather_defaults(hand)
+    assert defaults['Forestry'] == {'focus_cost': 15, 'yield': 8}
+    assert defaults['Mineralogy'] == defaults[None] == {'focus_cost': 20, 'yield': 10}
+    assert gather_defaults({})[None] == {'focus_cost': 20, 'yield': 10}
+
+
+def test_unpriced_derived_entries_are_dropped():
+    tables = {
+        'gatherable': {'Luna Ore': {}, 'Slate': {}, 'Hand Ore': {}},
+        'craftable': {'Luna Ingot': {}, 'Slate Brick': {}},
+        'recipes': {'Luna Ingot': {'Luna Ore': 8}, 'Slate Brick': {'Slate': 4}},
+    }
+    hand = {'gatherable': {'Hand Ore': {}}, 'craftable': {}, 'recipes': {}}
+    kept = drop_unpriced(tables, {'Luna Ore': 180, 'Luna Ingot': 2000, 'Slate Brick': 500}, hand)
+    assert kept == {
+        'gatherable': {'Luna Ore': {}, 'Hand Ore': {}},
+        'craftable': {'Luna Ingot': {}},
+        'recipes': {'Luna Ingot': {'Luna Ore': 8}},
+    }
+
+
+def test_assumed_gatherables_are_dropped():
+    tables = {
+        'gatherable': {'Luna Ore': {'yield': 10}, 'Slate': {'yield': 10, 'assumed': True}},
+        'craftable': {'Slate Brick': {}},
+        'recipes': {'Slate Brick': {'Slate': 4}},
+    }
+    assert drop_assumed(tables) == {**tables, 'gatherable': {'Luna Ore': {'yield': 10}}}
+
+
+def test_assumed_gatherables_are_opt_in(config_path):
+    default = ProfitCalculatorOptimized(config_path=config_path, derived=True)
+    assert not any(mech.get('assumed') for mech in default.gatherable.values())
+    gathered = set(default.find_optimal_strategies()['Gather Item'].dropna())
+    assert gathered <= set(default.gatherable)
+
+    assumed = ProfitCalculatorOptimized(config_path=config_path, derived=True, assumed_gatherables=True)
+    assert any(mech.get('assumed') for mech in assumed.gatherable.values())
+    assert set(default.gatherable) < set(assumed.gatherable)
+    assert default.recipes == assumed.recipes
+
+
+def test_derived_analysis_prints_no_missing_price_warnings(capsys, config_path):
+    calculator = ProfitCalculatorOptimized(config_path=config_path, derived=True, assumed_gatherables=True)
+    assert any(mech.get('assumed') for mech in calculator.gatherable.values())
+    results = calculator.run_analysis()
+    assert not results['optimal_strategies'].empty
+    assert "not found" not in capsys.readouterr().out
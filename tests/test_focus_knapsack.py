@@ -0,0 +1,44 @@
+import itertools
+import random
+
+import pytest
+
+from Calculator import ProfitCalculatorOptimized
+from FocusKnapsack import solve_focus_knapsack
+
+
+def exhaustive(costs, values, budget, max_counts):
+    ranges = [range(min(budget // cost, cap if cap is not None else budget) + 1)
+              for cost, cap in zip(costs, max_counts)]
+    best = 0.0
+    for counts in itertools.product(*ranges):
+        if sum(c * n for c, n in zip(costs, counts)) <= budget:
+            best = max(best, sum(v * n for v, n in zip(values, counts)))
+    return best
+
+
+@pytest.mark.parametrize('seed', range(60))
+def test_knapsack_matches_exhaustive_search(seed):
+    rng = random.Random(seed)
+    n = rng.randint(1, 4)
+    costs = [rng.choice([5, 10, 15, 20, 30, 7]) for _ in range(n)]
+    values = [rng.uniform(-50, 200) for _ in range(n)]
+    max_counts = [rng.choice([None, None, 0, 1, 3]) for _ in range(n)]
+    budget = rng.randint(0, 90)
+
+    value, counts = solve_focus_knapsack(costs, values, budget, max_counts)
+    assert value == pytest.approx(exhaustive(costs, values, budget, max_counts))
+    assert sum(c * int(k) for c, k in zip(costs, counts)) <= budget
+    assert all(cap is None or k <= cap for k, cap in zip(counts, max_counts))
+    assert sum(v * int(k) for v, k in zip(values, counts)) == pytest.approx(value)
+
+
+def test_focus_allocation_plan_adds_up(config_path):
+    calculator = ProfitCalculatorOptimized(config_path=config_path)
+    total, plan = calculator.optimize_focus_allocation(budget=400)
+    assert plan['Focus Used'].sum() <= 400
+    assert plan['Daily Profit'].sum() == pytest.approx(total)
+    # Forbidding the chosen activities cannot do better
+    _, alone = calculator.optimize_focus_allocation(budget=400, max_sessions={
+        name.split(' ', 1)[1]: 0 for name in plan['Activity']})
+    assert alone.empty or alone['Daily Profit'].sum() <= total
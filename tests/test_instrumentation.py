@@ -0,0 +1,66 @@
+import json
+import pstats
+
+import pandas as pd
+
+from Calculator import ProfitCalculatorOptimized
+from Instrumentation import NULL_STATS, RunStats
+
+
+def assert_same_results(left, right):
+    assert left.keys() == right.keys()
+    for stage in left:
+        pd.testing.assert_frame_equal(left[stage], right[stage])
+
+
+def test_off_by_default(config_path):
+    calculator = ProfitCalculatorOptimized(config_path=config_path)
+    assert calculator.stats is NULL_STATS
+    assert not calculator.stats.enabled
+    calculator.run_analysis()
+    assert calculator.stats is NULL_STATS
+    assert not vars(NULL_STATS)
+
+
+def test_stage_timings_counters_and_skips(config_path):
+    calculator = ProfitCalculatorOptimized(config_path=config_path)
+    plain = calculator.run_analysis()
+    item = next(iter(calculator.gatherable))
+    calculator.prices.pop(item)
+
+    stats = calculator.enable_instrumentation()
+    assert isinstance(stats, RunStats) and calculator.stats is stats
+    instrumented = calculator.run_analysis()
+    assert calculator.disable_instrumentation() is stats
+    assert calculator.stats is NULL_STATS
+
+    for stage in ('run_analysis', 'run_analysis/gathering', 'run_analysis/optimal_strategies',
+                  'run_analysis/comprehensive', 'run_analysis/sensitivity'):
+        assert stats.stages[stage]['calls'] == 1
+        assert stats.stages[stage]['seconds'] >= 0
+    inner = sum(entry['seconds'] for key, entry in stats.stages.items() if key.count('/') == 1)
+    assert inner <= stats.stages['run_analysis']['seconds']
+    assert stats.counters['allocation_pairs'] > 0
+    assert stats.counters['allocation_evaluations'] <= stats.counters['allocation_grid_cells']
+    assert stats.skipped['gatherable without price'] == 1
+    assert stats.skip_examples['gatherable without price'] == [item]
+
+    report = stats.report()
+    assert 'run_analysis/optimal_strategies' in report and 'allocation_pairs' in report
+    assert "skipped: gatherable without price" in report
+    assert json.loads(json.dumps(stats.to_dict()))['counters'] == stats.counters
+
+    # Instrumentation observes the run without changing it
+    assert_same_results(calculator.run_analysis(), instrumented)
+    assert plain['gathering'].shape[0] == instrumented['gathering'].shape[0] + 1
+
+
+def test_profile_dump(tmp_path, config_path):
+    calculator = ProfitCalculatorOptimized(config_path=config_path)
+    assert not RunStats().dump_profile(str(tmp_path / 'none.prof'))
+    stats = calculator.enable_instrumentation(profile=True)
+    calculator.run_analysis()
+    path = str(tmp_path / 'run.prof')
+    assert stats.dump_profile(path)
+    functions = {name for _, _, name in pstats.Stats(path).stats}
+    assert 'find_optimal_strategies' in functions
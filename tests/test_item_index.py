@@ -0,0 +1,31 @@
+import pytest
+
+from FocusKnapsack import solve_focus_knapsack
+from ItemIndex import DenseTables, ItemIndex
+
+RECIPES = {'Luna Ingot': {'Luna Ore': 8}}
+
+
+def tables(gather_cost=20, craft_yield=1):
+    gatherable = {'Luna Ore': {'focus_cost': gather_cost, 'yield': 10}}
+    craftable = {'Luna Ingot': {'focus_cost': 30, 'yield': craft_yield}}
+    return DenseTables(ItemIndex(['Luna Ore', 'Luna Ingot']), gatherable, craftable, RECIPES)
+
+
+def test_whole_number_mechanics_are_accepted():
+    dense = tables(gather_cost=20.0)
+    assert dense.gather_cost.tolist() == [20, 0]
+    assert dense.craft_yield.tolist() == [0, 1]
+
+
+@pytest.mark.parametrize('options', [{'gather_cost': 20.5}, {'craft_yield': 1.5}, {'craft_yield': True},
+                                     {'gather_cost': '20'}])
+def test_fractional_mechanics_raise(options):
+    with pytest.raises(ValueError):
+        tables(**options)
+
+
+def test_knapsack_rejects_fractional_costs():
+    with pytest.raises(ValueError):
+        solve_focus_knapsack([20, 12.5], [10.0, 7.0], 100)
+    assert solve_focus_knapsack([20.0, 10], [10.0, 4.0], 40)[0] == 20.0
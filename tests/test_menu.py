@@ -0,0 +1,84 @@
+import sys
+import threading
+import time
+
+from Calculator import ProfitCalculatorOptimized
+from menu import MenuSession
+
+
+def test_results_are_cached_per_focus_and_data_version(config_path):
+    session = MenuSession(ProfitCalculatorOptimized(config_path=config_path))
+    first = session.analysis()
+    assert session.analysis() is first
+    session.set_daily_focus(800)
+    assert session.analysis() is not first
+    item = next(iter(session.calculator.prices))
+    session.calculator.prices[item] += 1
+    session.analysis()
+    assert (session.hits, session.misses) == (1, 3)
+
+
+def test_failed_analyses_are_not_cached(config_path):
+    calculator = ProfitCalculatorOptimized(config_path=config_path)
+    session = MenuSession(calculator)
+    run_analysis = calculator.run_analysis
+    calculator.run_analysis = lambda: {}
+    assert session.analysis() == {}
+    calculator.run_analysis = run_analysis
+    assert session.analysis()
+    assert session.misses == 2
+
+
+def test_gathering_and_top_strategies_fall_back_without_the_keys(config_path):
+    calculator = ProfitCalculatorOptimized(config_path=config_path)
+    session = MenuSession(calculator)
+    calculator.run_analysis = lambda: {'comprehensive': None}
+    session.analysis()
+    assert not session.gathering().empty
+    assert len(session.top_strategies(3)) == 3
+
+
+def test_selections_do_not_wait_for_an_unrelated_warm_up(monkeypatch, config_path):
+    calculator = ProfitCalculatorOptimized(config_path=config_path)
+    session = MenuSession(calculator)
+    release = threading.Event()
+    run_analysis = ProfitCalculatorOptimized.run_analysis
+
+    def slow_analysis(self):
+        release.wait(10)
+        return run_analysis(self)
+
+    monkeypatch.setattr(ProfitCalculatorOptimized, 'run_analysis', slow_analysis)
+    thread = session.warm_up()
+    start = time.monotonic()
+    session.set_daily_focus(600)
+    assert not session.gathering().empty
+    assert time.monotonic() - start < 5
+    release.set()
+    thread.join(10)
+    assert session.warm_up_error is None
+
+
+def test_warm_up_output_is_scoped_to_its_thread(monkeypatch, capsys, config_path):
+    stdout, stderr = sys.stdout, sys.stderr
+    session = MenuSession(ProfitCalculatorOptimized(config_path=config_path))
+    started, release = threading.Event(), threading.Event()
+
+    def noisy_analysis(self):
+        print("warm-up chatter")
+        print("warm-up warning", file=sys.stderr)
+        started.set()
+        release.wait(10)
+        return {}
+
+    monkeypatch.setattr(ProfitCalculatorOptimized, 'run_analysis', noisy_analysis)
+    thread = session.warm_up()
+    assert started.wait(10)
+    # Other threads keep printing to the real streams while the warm-up is captured
+    print("menu output")
+    release.set()
+    thread.join(10)
+
+    assert sys.stdout is stdout and sys.stderr is stderr
+    assert capsys.readouterr() == ("menu output\n", "")
+    assert session.warm_up_error == "warm-up chatter"
@@ -0,0 +1,45 @@
+import pandas as pd
+
+from Calculator import ProfitCalculatorOptimized
+
+
+def assert_same(calculator):
+    serial = calculator.find_optimal_strategies(workers=1)
+    parallel = calculator.find_optimal_strategies(workers=2)
+    pd.testing.assert_frame_equal(parallel, serial)
+    assert not serial.empty
+
+
+def test_parallel_search_matches_serial_across_price_and_focus_edits(config_path):
+    calculator = ProfitCalculatorOptimized(config_path=config_path)
+    try:
+        assert_same(calculator)
+        pool = calculator.get_strategy_pool(2)
+
+        # Price and focus edits reach the workers without a new pool
+        for item in list(calculator.prices)[:5]:
+            calculator.prices[item] = calculator.prices[item] * 3 + 7
+        assert_same(calculator)
+        calculator.daily_focus = 1000
+        assert_same(calculator)
+        assert calculator.get_strategy_pool(2) is pool
+
+        # Prices are published to the shared block once per data version, not per task
+        published = pool.state[0]
+        assert_same(calculator)
+        assert pool.state[0] == published
+
+        # A price curve edit rebuilds the pool
+        product = next(iter(calculator.recipes))
+        calculator.price_curves = {product: {'sell': [[0, calculator.prices[product]], [5, 1]]}}
+        assert_same(calculator)
+        assert calculator.get_strategy_pool(2) is not pool
+        pool = calculator.get_strategy_pool(2)
+
+        # A mechanics edit rebuilds it
+        gathered = next(iter(calculator.gatherable))
+        calculator.gatherable[gathered] = {**calculator.gatherable[gathered], 'yield': 1}
+        assert_same(calculator)
+        assert calculator.get_strategy_pool(2) is not pool
+    finally:
+        calculator.close_strategy_pool()
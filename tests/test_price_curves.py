@@ -0,0 +1,63 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Calculator import ProfitCalculatorOptimized
+from PriceCurves import PriceCurve, VolumeMarket
+
+
+def test_total_is_the_integral_of_the_unit_price():
+    curve = PriceCurve([[100, 80], [0, 120], [400, 60]])
+    quantities = np.array([0, 1, 50, 100, 250, 400, 900])
+    fine = np.linspace(0, 900, 90_001)
+    integral = np.concatenate([[0], np.cumsum((curve.unit_price(fine[1:]) + curve.unit_price(fine[:-1])) / 2
+                                              * np.diff(fine))])
+    expected = np.interp(quantities, fine, integral)
+    np.testing.assert_allclose(curve.total(quantities), expected, rtol=1e-9)
+    assert [curve.total(int(q)) for q in quantities] == pytest.approx(curve.total(quantities).tolist())
+
+
+def test_flat_curves_reproduce_the_linear_strategies(config_path):
+    linear = ProfitCalculatorOptimized(config_path=config_path)
+    curved = ProfitCalculatorOptimized(config_path=config_path)
+    curved.price_curves = {item: {'sell': [[0, price]], 'buy': [[0, price]]} for item, price in curved.prices.items()}
+    expected = linear.find_optimal_strategies()
+    found = curved.find_optimal_strategies()
+    columns = ['Method', 'Crafted Units', 'Daily Profit', 'Gather Focus', 'Craft Focus']
+    pd.testing.assert_frame_equal(found[columns], expected[columns], check_dtype=False)
+    for product in linear.get_available_products():
+        assert curved.calculate_profit_buy_all(product)[0] == pytest.approx(linear.calculate_profit_buy_all(product)[0])
+
+
+def brute_force_buy_all(calculator, product):
+    """Best number of buy-all sessions, trying every count the daily focus allows"""
+    market = VolumeMarket(calculator.prices, calculator.price_curves)
+    mech = calculator.craftable[product]
+    best = 0.0
+    for sessions in range(calculator.daily_focus // mech['focus_cost'] + 1):
+        crafted = sessions * mech['yield']
+        value = market.sell_value(product, crafted) - sum(
+            market.buy_cost(item, qty * crafted) for item, qty in calculator.recipes[product].items())
+        best = max(best, value)
+    return best
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_curved_buy_all_matches_brute_force(seed, config_path):
+    rng = random.Random(seed)
+    calculator = ProfitCalculatorOptimized(config_path=config_path, daily_focus=rng.choice([100, 400, 1200]))
+    products = [product for product in calculator.get_available_products()
+                if all(item in calculator.prices for item in calculator.recipes[product])]
+    curves = {}
+    for product in products:
+        price = calculator.prices[product]
+        # Sell prices fall and buy prices rise with volume, so every extra session is worth less
+        curves[product] = {'sell': [[0, price * rng.uniform(1, 1.5)], [rng.randint(5, 60), price * rng.uniform(0.1, 1)]]}
+        for item in calculator.recipes[product]:
+            cost = calculator.prices[item]
+            curves.setdefault(item, {'buy': [[0, cost], [rng.randint(20, 400), cost * rng.uniform(1, 3)]]})
+    calculator.price_curves = curves
+    for product in products:
+        assert calculator.calculate_profit_buy_all(product)[0] == pytest.approx(brute_force_buy_all(calculator, product))
@@ -0,0 +1,69 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from PriceHistory import PriceHistory
+
+
+def direct_stats(rows, window):
+    recent = np.array(rows[-window:])
+    returns = np.log(recent[1:] / recent[:-1])
+    return recent.mean(axis=0), returns.std(axis=0, ddof=1)
+
+
+@pytest.mark.parametrize('drift, noise', [(0.0, 0.05), (0.05, 1e-7)])
+def test_rolling_stats_match_a_direct_computation(tmp_path, drift, noise):
+    # A steady trend with little noise is where sums of squares cancel catastrophically
+    rng = np.random.default_rng(7)
+    history = PriceHistory(str(tmp_path))
+    window = 8
+    rows = []
+    log_price = np.log([180.0, 150.0])
+    for step in range(200):
+        log_price = log_price + drift + noise * rng.standard_normal(2)
+        row = np.exp(log_price)
+        rows.append(row)
+        history.append({'Luna Ore': row[0], 'Azte Ore': row[1]}, timestamp=step)
+        if step >= 2:
+            stats = history.rolling_stats(window)
+            mean, volatility = direct_stats(rows, window)
+            np.testing.assert_allclose(stats['Mean'], mean, rtol=1e-12)
+            np.testing.assert_allclose(stats['Volatility'], volatility, rtol=1e-6)
+            assert stats['Samples'].tolist() == [min(step + 1, window)] * 2
+
+
+def test_constant_prices_have_zero_volatility(tmp_path):
+    history = PriceHistory(str(tmp_path))
+    for step in range(30):
+        history.append({'Luna Ore': 180}, timestamp=step)
+        history.rolling_stats(5)
+    assert history.rolling_stats(5)['Volatility'].tolist() == [0.0]
+
+
+def test_an_interrupted_append_is_dropped_on_open(tmp_path):
+    history = PriceHistory(str(tmp_path))
+    for step in range(3):
+        history.append({'Luna Ore': 180 + step, 'Azte Ore': 150 - step}, timestamp=step)
+    expected = np.array(history.matrix())
+
+    # The price row of a fourth snapshot (and half a timestamp) reached disk, the rest did not
+    with open(tmp_path / 'prices.bin', 'ab') as f:
+        np.full(history.width, 999.0).tofile(f)
+    with open(tmp_path / 'timestamps.bin', 'ab') as f:
+        f.write(b'\0' * 4)
+
+    reopened = PriceHistory(str(tmp_path))
+    assert len(reopened) == 3
+    assert (tmp_path / 'prices.bin').stat().st_size == 3 * reopened.width * 8
+    np.testing.assert_array_equal(reopened.matrix(), expected)
+    reopened.append({'Luna Ore': 200}, timestamp=3)
+    assert reopened.snapshot() == {'Luna Ore': 200.0, 'Azte Ore': 148.0}
+    assert reopened.snapshot(at=2) == {'Luna Ore': 182.0, 'Azte Ore': 148.0}
+
+
+def test_importing_does_not_import_pandas(repo_root):
+    code = "import sys, PriceHistory; print('pandas' in sys.modules)"
+    output = subprocess.run([sys.executable, '-c', code], cwd=repo_root, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == 'False'
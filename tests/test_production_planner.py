@@ -0,0 +1,89 @@
+import functools
+import random
+import time
+
+import pytest
+
+from Calculator import ProfitCalculatorOptimized
+from ProductionPlanner import REST, solve_stock_plan
+
+
+def brute_force(days, focus, gather_cost, gather_yield, gather_price, craft_cost, craft_yield, margin, usage,
+                rest_value, salvage, max_stock):
+    """Every gather/product/craft split on every day, memoized on (day, stock)"""
+    @functools.lru_cache(maxsize=None)
+    def best(day, stock):
+        if day == days:
+            return salvage * gather_price * stock
+        value = rest_value + best(day + 1, stock)
+        for g in range(focus // gather_cost + 1):
+            available = stock + g * gather_yield
+            for p in range(len(craft_cost)):
+                for c in range((focus - g * gather_cost) // craft_cost[p] + 1):
+                    crafted = c * craft_yield[p]
+                    used = min(crafted * usage[p], available)
+                    left = available - used if max_stock is None else min(available - used, max_stock)
+                    value = max(value, crafted * margin[p] + used * gather_price + best(day + 1, left))
+        return value
+    return best(0, 0)
+
+
+def replay(schedule, gather_yield, gather_price, craft_yield, margin, usage, rest_value, salvage, max_stock):
+    stock = 0
+    total = 0.0
+    for g, p, c in schedule:
+        if p == REST:
+            total += rest_value
+            continue
+        available = stock + g * gather_yield
+        crafted = c * craft_yield[p]
+        used = min(crafted * usage[p], available)
+        stock = available - used if max_stock is None else min(available - used, max_stock)
+        total += crafted * margin[p] + used * gather_price
+    return total + salvage * gather_price * stock
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_solve_stock_plan_matches_brute_force(seed):
+    rng = random.Random(seed)
+    products = rng.randint(1, 4)
+    case = dict(
+        days=rng.randint(1, 4), focus=rng.randint(5, 40), gather_cost=rng.randint(3, 12),
+        gather_yield=rng.randint(1, 5), gather_price=rng.uniform(0, 10),
+        craft_cost=[rng.randint(3, 15) for _ in range(products)],
+        craft_yield=[rng.randint(1, 3) for _ in range(products)],
+        margin=[rng.uniform(-20, 30) for _ in range(products)],
+        usage=[rng.choice([0, 0, 1, 2, 3]) for _ in range(products)],
+        rest_value=rng.choice([0.0, rng.uniform(0, 50)]), salvage=rng.choice([0.0, 0.5]),
+        max_stock=rng.choice([None, None, 3]))
+    value, schedule = solve_stock_plan(**case)
+    assert value == pytest.approx(brute_force(**case))
+    assert len(schedule) == case['days']
+    replayed = replay(schedule, *(case[name] for name in ('gather_yield', 'gather_price', 'craft_yield', 'margin',
+                                                           'usage', 'rest_value', 'salvage', 'max_stock')))
+    assert replayed == pytest.approx(value)
+
+
+@pytest.mark.parametrize('daily_focus', [50, 400])
+def test_plan_rows_add_up_and_stateless_days_show_their_sessions(daily_focus, config_path):
+    calculator = ProfitCalculatorOptimized(config_path=config_path, daily_focus=daily_focus)
+    total, plan = calculator.plan_production(10)
+    assert plan['Daily Profit'].sum() == pytest.approx(total)
+    stateless = plan[plan['Used From Stock'] == 0]
+    assert not stateless.empty
+    assert ((stateless['Gather Sessions'] > 0) | (stateless['Craft Sessions'] > 0)).all()
+    focus_used = [
+        sessions * calculator.gatherable[activity.split(' + ')[0][len("Gather "):]]['focus_cost']
+        for activity, sessions in zip(stateless['Activity'], stateless['Gather Sessions']) if sessions
+    ]
+    assert all(0 < used <= daily_focus for used in focus_used)
+
+
+def test_a_month_at_a_high_daily_focus_plans_quickly(config_path):
+    calculator = ProfitCalculatorOptimized(config_path=config_path, daily_focus=2000)
+    start = time.perf_counter()
+    total, plan = calculator.plan_production(30)
+    # Roughly 0.3 s here; the per-split loop over a stock grid in single units took over 10 s
+    assert time.perf_counter() - start < 5.0
+    assert len(plan) == 30
+    assert plan['Daily Profit'].sum() == pytest.approx(total)
@@ -0,0 +1,86 @@
+import functools
+import json
+import os
+import random
+
+import pytest
+
+from CatalogCache import load_catalog
+from RecipeGraph import RecipeGraph
+
+
+def random_records(rng, n_items=9):
+    """Recipes over items 1..n_items that only use lower-numbered items (a DAG), some with variable slots"""
+    records = []
+    for recipe_id in range(rng.randint(3, 12)):
+        output = rng.randint(2, n_items)
+        inputs = [{'input_id': item, 'item_name': f"Item {item}", 'amount': rng.randint(1, 4),
+                   'isVariable': False}
+                  for item in rng.sample(range(1, output), rng.randint(1, min(3, output - 1)))]
+        if output > 2 and rng.random() < 0.4:
+            inputs += [{'input_id': item, 'item_name': f"Item {item}", 'amount': rng.randint(1, 3),
+                        'isVariable': True} for item in rng.sample(range(1, output), 2)]
+        low = rng.randint(1, 3)
+        records.append({'id': recipe_id, 'name': f"Recipe {recipe_id}", 'FocusCost': rng.choice([0, 10, 30]),
+                        'input_data': inputs,
+                        'output_data': [{'output_id': output, 'item_name': f"Item {output}", 'rate': 1,
+                                         'minAmount': low, 'maxAmount': low + rng.randint(0, 2)}]})
+    return records
+
+
+def brute_force_cost(records, prices, focus_value):
+    """Cheapest unit cost by trying every recipe of every item recursively"""
+    @functools.lru_cache(maxsize=None)
+    def cost(item):
+        best = prices.get(f"Item {item}", float('inf'))
+        for record in records:
+            output = record['output_data'][0]
+            if output['output_id'] != item:
+                continue
+            total = record['FocusCost'] * focus_value
+            total += sum(entry['amount'] * cost(entry['input_id'])
+                         for entry in record['input_data'] if not entry['isVariable'])
+            variable = [entry['amount'] * cost(entry['input_id'])
+                        for entry in record['input_data'] if entry['isVariable']]
+            total += min(variable) if variable else 0
+            best = min(best, total / ((output['minAmount'] + output['maxAmount']) / 2))
+        return best
+    return cost
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_costs_match_a_recursive_search(seed):
+    rng = random.Random(seed)
+    records = random_records(rng)
+    prices = {f"Item {item}": rng.randint(5, 200) for item in range(1, 10) if rng.random() < 0.7}
+    focus_value = rng.choice([0.0, 0.5])
+    graph = RecipeGraph(records=records)
+    expected = brute_force_cost(records, prices, focus_value)
+    for item_id, (unit_cost, _) in graph.compute_costs(prices, focus_value).items():
+        assert unit_cost == pytest.approx(expected(int(item_id)))
+
+
+def test_catalog_build_matches_the_json_build(config_path):
+    with open(os.path.join(config_path, 'market_prices.json')) as f:
+        prices = json.load(f)
+    from_json = RecipeGraph(os.path.join(config_path, 'RecipesData.json'))
+    from_catalog = RecipeGraph(catalog=load_catalog(config_path))
+    assert from_catalog.compute_costs(prices) == from_json.compute_costs(prices)
+    assert from_catalog.recipe_input_costs(prices) == from_json.recipe_input_costs(prices)
+
+
+def test_config_spellings_price_their_catalog_items(config_path):
+    from Calculator import ProfitCalculatorOptimized
+    calculator = ProfitCalculatorOptimized(config_path=config_path)
+    table = calculator.price_crafting_trees().set_index('Item')
+    # Config spelling -> catalog spelling (linked through config/item_ids.json)
+    for config_name, catalog_name in [('Mistery Metal', 'Mystery Metal'), ('Bury Mech Shard', 'Buri Mech Shard'),
+                                      ('Fast Burning Powder', 'Fast-burning Powder')]:
+        assert config_name not in table.index
+        assert table.loc[catalog_name, 'Buy Price'] == calculator.prices[config_name]
+
+    # The yield simulation values the outputs through the same mapping
+    graph = calculator.get_recipe_graph()
+    mystery = str(calculator.get_item_index().scraped_ids[calculator.get_item_index().lookup('Mistery Metal')])
+    assert graph.resolve_prices(calculator.catalog_prices())[mystery] == calculator.prices['Mistery Metal']
+    assert mystery not in graph.resolve_prices(calculator.prices)
@@ -0,0 +1,243 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from ScrapAllpages import (RecipeScraper, TokenBucket, changed_ids, compact_stream, iter_stream, load_manifest,
+                           refresh_catalog, seed_manifest)
+
+RECIPE_IDS = [f"{n}" for n in range(101, 113)]
+# id -> statuses served before the real payload
+FAILURES = {'102': [429, 429], '105': [500], '108': [503, 429]}
+
+
+def recipe_payload(recipe_id):
+    return {
+        'id': recipe_id,
+        'name': f"Recipe {recipe_id}",
+        'cost': {'amount': 10},
+        'recipeInputItems': [[{'item': {'id': 900, 'name': 'Luna Ore'}, 'amount': 8}]],
+        'recipeOutputItems': [{'item': {'id': int(recipe_id), 'name': f"Item {recipe_id}",
+                                        'minAmount': 1, 'maxAmount': 1}, 'amount': 1}]
+    }
+
+
+class StubServer:
+    """getRecipe stub on localhost with scripted 429/5xx answers and a per-request delay"""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.requests = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.failures = {recipe_id: list(statuses) for recipe_id, statuses in FAILURES.items()}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                recipe_id = json.loads(parse_qs(urlparse(self.path).query)['input'][0])['id']
+                with stub.lock:
+                    stub.requests[recipe_id] = stub.requests.get(recipe_id, 0) + 1
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    failures = stub.failures.get(recipe_id)
+                    status = failures.pop(0) if failures else 200
+                time.sleep(stub.delay)
+                body = json.dumps({'result': {'data': recipe_payload(recipe_id)}} if status == 200 else {})
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body.encode())
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the killed run's connection
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/getRecipe"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def scraper(url, directory, **options):
+    options = {'workers': 4, 'rate': 200.0, 'backoff': 0.01, 'timeout': 5, **options}
+    return RecipeScraper(base_url=url, stream_path=os.path.join(directory, 'stream.jsonl'), **options)
+
+
+def compact(directory):
+    listing = dict.fromkeys(RECIPE_IDS, '2025-10-19')
+    compact_stream(listing, os.path.join(directory, 'stream.jsonl'), os.path.join(directory, 'catalog.json'),
+                   os.path.join(directory, 'manifest.json'))
+    with open(os.path.join(directory, 'catalog.json')) as f:
+        return json.load(f)
+
+
+def test_scrape_retries_429_and_5xx_concurrently(tmp_path):
+    with StubServer() as stub:
+        done = scraper(stub.url, tmp_path).scrape(RECIPE_IDS)
+    assert done == set(RECIPE_IDS)
+    for recipe_id, statuses in FAILURES.items():
+        assert stub.requests[recipe_id] == len(statuses) + 1
+    assert stub.max_in_flight > 1
+    catalog = compact(tmp_path)
+    assert [record['id'] for record in catalog] == RECIPE_IDS
+    assert not os.path.exists(tmp_path / 'stream.jsonl')
+
+
+def test_gives_up_after_max_retries(tmp_path):
+    with StubServer() as stub:
+        stub.failures['101'] = [500] * 10
+        done = scraper(stub.url, tmp_path, max_retries=2).scrape(RECIPE_IDS[:2])
+    assert done == {'102'}
+    assert stub.requests['101'] == 3
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    assert time.monotonic() - start >= 10 / 50 * 0.9
+
+
+KILLED_RUN = """
+import sys
+sys.path.insert(0, {root!r})
+from ScrapAllpages import RecipeScraper
+RecipeScraper(base_url={url!r}, workers=1, rate=200.0, backoff=0.01,
+              stream_path={stream!r}).scrape({ids!r})
+"""
+
+
+def test_killed_run_resumes_to_the_same_catalog(tmp_path, repo_root):
+    clean = tmp_path / 'clean'
+    resumed = tmp_path / 'resumed'
+    clean.mkdir()
+    resumed.mkdir()
+    stream = str(resumed / 'stream.jsonl')
+
+    with StubServer(delay=0.1) as stub:
+        code = KILLED_RUN.format(root=repo_root, url=stub.url, stream=stream, ids=RECIPE_IDS)
+        process = subprocess.Popen([sys.executable, '-c', code], stdout=subprocess.DEVNULL)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline and len(list(iter_stream(stream))) < 3:
+            time.sleep(0.02)
+        process.kill()
+        process.wait()
+        partial = {record['id'] for record in iter_stream(stream)}
+        assert 3 <= len(partial) < len(RECIPE_IDS)
+
+        # A crash mid-write leaves a truncated last line behind
+        with open(stream, 'a') as f:
+            f.write('{"id": "11')
+        fetched_before = dict(stub.requests)
+        done = scraper(stub.url, resumed).scrape(RECIPE_IDS)
+        assert done == set(RECIPE_IDS)
+        for recipe_id in partial:
+            assert stub.requests[recipe_id] == fetched_before[recipe_id]
+
+        scraper(stub.url, clean).scrape(RECIPE_IDS)
+
+    assert compact(resumed) == compact(clean)
+
+
+def test_fresh_run_discards_the_stream(tmp_path):
+    with open(tmp_path / 'stream.jsonl', 'w') as f:
+        f.write(json.dumps({'id': '101', 'name': 'stale'}) + "\n")
+    with StubServer() as stub:
+        scraper(stub.url, tmp_path).scrape(RECIPE_IDS[:1], resume=False)
+    assert [record['name'] for record in iter_stream(tmp_path / 'stream.jsonl')] == ["Recipe 101"]
+
+
+class FakeScraper(RecipeScraper):
+    """RecipeScraper whose fetch answers from memory; ``versions`` (id -> name suffix) stands in for edits"""
+
+    def __init__(self, directory, versions=None):
+        super().__init__(workers=2, rate=1000.0, stream_path=os.path.join(directory, 'stream.jsonl'))
+        self.versions = versions or {}
+        self.fetched = []
+
+    def fetch(self, recipe_id):
+        with self._write_lock:
+            self.fetched.append(str(recipe_id))
+        payload = recipe_payload(recipe_id)
+        payload['name'] += self.versions.get(str(recipe_id), '')
+        return {'result': {'data': payload}}
+
+
+def test_changed_ids_are_new_or_re_dated():
+    listing = {'101': '2025-10-01', '102': '2025-10-05', '103': '2025-10-01'}
+    manifest = {'101': '2025-10-01', '102': '2025-09-30', '999': '2025-01-01'}
+    assert changed_ids(listing, manifest) == ['102', '103']
+    assert changed_ids(listing, {}) == ['101', '102', '103']
+    assert changed_ids(listing, listing) == []
+
+
+def test_seed_manifest_covers_the_catalog_recipes_still_listed(tmp_path):
+    catalog_path = str(tmp_path / 'catalog.json')
+    manifest_path = str(tmp_path / 'manifest.json')
+    listing = {'101': '2025-10-01', '102': '2025-10-05', '103': '2025-10-01'}
+    # No catalog yet: nothing to seed from
+    assert seed_manifest(listing, catalog_path, manifest_path) == {}
+    assert not os.path.exists(manifest_path)
+
+    with open(catalog_path, 'w') as f:
+        json.dump([{'id': 101}, {'id': '103'}, {'id': 555}], f)
+    assert seed_manifest(listing, catalog_path, manifest_path) == {'101': '2025-10-01', '103': '2025-10-01'}
+    assert load_manifest(manifest_path) == {'101': '2025-10-01', '103': '2025-10-01'}
+
+    # An existing manifest is never re-seeded
+    with open(manifest_path, 'w') as f:
+        json.dump({'101': 'older'}, f)
+    assert seed_manifest(listing, catalog_path, manifest_path) == {'101': 'older'}
+
+
+def test_incremental_refresh_fetches_only_new_and_changed_recipes(tmp_path):
+    paths = {'catalog_path': str(tmp_path / 'catalog.json'), 'manifest_path': str(tmp_path / 'manifest.json')}
+    listing = dict.fromkeys(RECIPE_IDS[:6], '2025-10-01')
+    first = FakeScraper(tmp_path)
+    ids, merged = refresh_catalog(listing, first, incremental=True, **paths)
+    assert ids == sorted(first.fetched) == RECIPE_IDS[:6]
+    assert merged == 6
+    assert load_manifest(paths['manifest_path']) == listing
+
+    # Nothing changed: nothing fetched, the catalog stays
+    unchanged = FakeScraper(tmp_path)
+    assert refresh_catalog(listing, unchanged, incremental=True, **paths) == ([], 0)
+    assert unchanged.fetched == []
+
+    # One recipe re-dated (and edited upstream), one new
+    listing = {**listing, RECIPE_IDS[2]: '2025-10-09', RECIPE_IDS[6]: '2025-10-09'}
+    second = FakeScraper(tmp_path, versions={RECIPE_IDS[2]: ' (v2)'})
+    ids, merged = refresh_catalog(listing, second, incremental=True, **paths)
+    assert sorted(second.fetched) == ids == [RECIPE_IDS[2], RECIPE_IDS[6]]
+    assert merged == 2
+    with open(paths['catalog_path']) as f:
+        catalog = json.load(f)
+    assert [record['id'] for record in catalog] == RECIPE_IDS[:7]
+    assert {record['id']: record['name'] for record in catalog}[RECIPE_IDS[2]] == f"Recipe {RECIPE_IDS[2]} (v2)"
+    assert load_manifest(paths['manifest_path']) == listing
+    assert not os.path.exists(second.stream_path)
+
+    # A full refresh fetches everything regardless of the manifest
+    full = FakeScraper(tmp_path)
+    refresh_catalog(listing, full, **paths)
+    assert sorted(full.fetched) == RECIPE_IDS[:7]
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from Calculator import ProfitCalculatorOptimized
+
+
+def test_single_row_matches_the_vectorized_columns(config_path):
+    calculator = ProfitCalculatorOptimized(config_path=config_path)
+    optimal_df = calculator.run_analysis()['optimal_strategies']
+    for product, row in optimal_df.iterrows():
+        expected = (row['Sensitivity'], row['Robustness'])
+        sensitivity, robustness = calculator.calculate_sensitivity(row)
+        assert (robustness, np.isclose(sensitivity, expected[0])) == (expected[1], True)
+        assert calculator.calculate_sensitivity(row.to_dict(), product) == (sensitivity, robustness)
+
+
+def test_mapping_row_needs_its_product(config_path):
+    calculator = ProfitCalculatorOptimized(config_path=config_path)
+    optimal_df = calculator.find_optimal_strategies()
+    row = optimal_df[optimal_df['Gathered Units'] == 0].iloc[0]
+    with pytest.raises(ValueError):
+        calculator.calculate_sensitivity(row.to_dict())
+    minimal = {'Method': row['Method'], 'Crafted Units': row['Crafted Units'], 'Daily Profit': row['Daily Profit']}
+    assert calculator.calculate_sensitivity(minimal, row.name) == calculator.calculate_sensitivity(row)
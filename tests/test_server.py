@@ -0,0 +1,81 @@
+import json
+import shutil
+
+import pytest
+
+import server
+from server import AnalysisService, BadRequest, ComputeFailed, NotFound
+
+
+@pytest.fixture
+def service(config_path):
+    return AnalysisService(config_path=config_path)
+
+
+@pytest.mark.parametrize('endpoint, params', [
+    ('analysis', {'daily_focus': ['0']}),
+    ('analysis', {'daily_focus': [str(server.MAX_DAILY_FOCUS + 1)]}),
+    ('gathering', {'daily_focus': ['lots']}),
+    ('sweep', {'focus': [f"50,{server.MAX_DAILY_FOCUS + 50}"]}),
+    ('sweep', {'focus': [",".join(str(f) for f in range(1, server.MAX_SWEEP_POINTS + 2))]}),
+    ('product', {}),
+])
+def test_oversized_or_malformed_inputs_are_bad_requests(service, endpoint, params):
+    with pytest.raises(BadRequest):
+        service.query(endpoint, params)
+
+
+def test_unknown_products_and_endpoints_are_not_found(service):
+    with pytest.raises(NotFound):
+        service.query('product', {'name': ['No Such Product']})
+    with pytest.raises(NotFound):
+        service.query('nothing', {})
+
+
+def test_caches_are_bounded_lrus(service, monkeypatch):
+    monkeypatch.setattr(server, 'MAX_CALCULATORS', 2)
+    monkeypatch.setattr(server, 'MAX_RESPONSES', 3)
+    for focus in (100, 200, 300, 400, 500):
+        service.query('gathering', {'daily_focus': [str(focus)]})
+    health = json.loads(service.query('health', {}))
+    assert health['cached_calculators'] == 2
+    assert health['cached_responses'] == 3
+    # The default focus calculator is never evicted
+    assert service.daily_focus in service._state.calculators
+
+
+def test_failed_analyses_are_not_cached(service, monkeypatch):
+    state = service._state
+    calculator = state.calculator(700)
+    monkeypatch.setattr(calculator, 'run_analysis', lambda: {})
+    with pytest.raises(ComputeFailed):
+        service.query('analysis', {'daily_focus': ['700']})
+    assert ('analysis', (700,)) not in state.responses
+    monkeypatch.undo()
+    assert json.loads(service.query('analysis', {'daily_focus': ['700']}))['daily_focus'] == 700
+
+
+def write_prices(config_dir, prices):
+    with open(config_dir / 'market_prices.json', 'w') as f:
+        json.dump(prices, f, indent=2)
+
+
+def test_every_focus_uses_the_loaded_config_until_a_reload(tmp_path, config_path):
+    config_dir = tmp_path / 'config'
+    shutil.copytree(config_path, config_dir)
+    service = AnalysisService(config_path=str(config_dir))
+    prices = service._state.calculators[service.daily_focus].get_tables()['prices']
+
+    # An edit on disk is invisible (also to calculators built afterwards) until the state is reloaded
+    edited = {**prices, 'Luna Ore': prices['Luna Ore'] + 1000}
+    write_prices(config_dir, edited)
+    with service._state.compute_lock:
+        assert service._state.calculator(700).prices == prices
+
+    assert service.reload_if_changed()
+    assert service.reloads == 1
+    with service._state.compute_lock:
+        assert service._state.calculator(700).prices == edited
+    gathering = json.loads(service.query('gathering', {'daily_focus': ['700']}))
+    assert gathering['daily_focus'] == 700
+    assert not service.reload_if_changed()
@@ -0,0 +1,44 @@
+import pytest
+
+from Calculator import ProfitCalculatorOptimized
+
+
+def eager_details(calculator, product, gather_item, gather_focus):
+    """The text columns as find_optimal_strategies used to build them for every row, from the scalar path"""
+    if gather_item is None:
+        _, details = calculator.calculate_profit_buy_all(product)
+        allocation = f"0G/{calculator.daily_focus}C"
+    else:
+        _, details = calculator.calculate_profit_for_allocation(gather_focus, product, gather_item)
+        allocation = f"{gather_focus}G/{calculator.daily_focus - gather_focus}C"
+    requirements = calculator.get_material_requirements(product, details['crafted_units'])
+    needed = ", ".join(f"{qty} {material}" for material, qty in requirements.items())
+    if gather_item is None:
+        return allocation, needed, "None", needed, "None"
+    gathered = details['gathered_units']
+    buy = max(0, requirements.get(gather_item, 0) - gathered)
+    others = [f"{qty} {material}" for material, qty in requirements.items() if material != gather_item]
+    return (allocation, needed, f"{gathered} {gather_item}", f"{buy} {gather_item}" if buy > 0 else "None",
+            ", ".join(others) if others else "None")
+
+
+@pytest.mark.parametrize('daily_focus', [150, 400, 900])
+def test_lazy_details_match_the_eager_strings(config_path, daily_focus):
+    calculator = ProfitCalculatorOptimized(config_path=config_path, daily_focus=daily_focus)
+    optimal = calculator.find_optimal_strategies()
+    assert 'Focus Allocation' not in optimal.columns
+    detailed = calculator.format_strategy_details(optimal)
+    pairs = detailed[detailed['Optimization Method'] == 'Mixed']
+    assert not pairs.empty and len(pairs) < len(detailed)
+
+    columns = ['Focus Allocation', 'Total Materials Needed', 'You Will Gather', 'You Need To Buy',
+               'Other Materials Needed']
+    for product, row in detailed.iterrows():
+        gather_item = row['Gather Item'] if isinstance(row['Gather Item'], str) else None
+        expected = eager_details(calculator, product, gather_item, int(row['Gather Focus']))
+        assert tuple(row[columns]) == expected
+
+    # Rendering a subset renders exactly those rows, and leaves the input alone
+    head = calculator.format_strategy_details(optimal.head(3))
+    assert head.equals(detailed.head(3))
+    assert 'Focus Allocation' not in optimal.columns
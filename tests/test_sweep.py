@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from Calculator import ProfitCalculatorOptimized
+
+FOCUS_VALUES = [60, 150, 400, 730]
+
+
+def test_sweep_slices_match_fresh_analyses(config_path):
+    sweep = ProfitCalculatorOptimized(config_path=config_path).sweep_daily_focus(FOCUS_VALUES)
+    best = sweep.to_frame()
+    assert list(best.columns) == FOCUS_VALUES
+
+    for focus in FOCUS_VALUES:
+        results = ProfitCalculatorOptimized(config_path=config_path, daily_focus=focus).run_analysis()
+
+        gathering = results['gathering']
+        assert not gathering.empty
+        for method, profit in zip(gathering['Method'], gathering['Daily Profit']):
+            assert best.loc[method, focus] == pytest.approx(profit)
+
+        # A product's optimal strategy is the best of buying everything and every gather split
+        optimal = results['optimal_strategies']
+        for product, profit in zip(optimal.index, optimal['Daily Profit']):
+            candidates = [strategy for strategy in sweep.strategies
+                          if strategy == f"Craft {product}" or strategy.endswith(f" + Craft {product}")]
+            assert np.nanmax(best.loc[candidates, focus]) == pytest.approx(profit)
+
+        # Products left out are not profitable at this focus
+        listed = set(optimal.index)
+        for strategy, profit in best[focus].items():
+            if strategy.startswith("Craft ") and strategy[len("Craft "):] not in listed:
+                assert not profit > 0
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from Calculator import ProfitCalculatorOptimized
+from SyntheticCatalog import generate_catalog
+
+
+def assert_top_k_matches(calculator, k):
+    top = calculator.top_k_strategies(k)
+    expected = calculator.find_optimal_strategies().head(k)
+    assert len(top) == len(expected)
+    # Same profits in the same order; rows only differ among equal profits
+    np.testing.assert_allclose(top['Daily Profit'], expected['Daily Profit'])
+    tied = expected['Daily Profit'].iloc[-1] if len(expected) else None
+    assert set(top.index[top['Daily Profit'] != tied]) == set(expected.index[expected['Daily Profit'] != tied])
+
+
+@pytest.mark.parametrize('k', [1, 3, 10, 1000])
+def test_top_k_matches_the_full_search(k, config_path):
+    assert_top_k_matches(ProfitCalculatorOptimized(config_path=config_path), k)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+@pytest.mark.parametrize('daily_focus', [60, 400, 2000])
+def test_top_k_matches_the_full_search_on_a_synthetic_catalog(tmp_path, seed, daily_focus):
+    generate_catalog(str(tmp_path), n_recipes=300, seed=seed)
+    calculator = ProfitCalculatorOptimized(config_path=str(tmp_path), daily_focus=daily_focus)
+    for k in (1, 10, 50):
+        assert_top_k_matches(calculator, k)
+
+
+def test_top_k_with_price_curves(tmp_path):
+    generate_catalog(str(tmp_path), n_recipes=200, seed=3)
+    calculator = ProfitCalculatorOptimized(config_path=str(tmp_path))
+    expected = calculator.find_optimal_strategies()
+    # Curve the best products so their buy-all profit is no longer linear in volume
+    calculator.price_curves = {product: {'sell': [[0, calculator.prices[product]],
+                                                  [50, calculator.prices[product] * 0.2]]}
+                               for product in expected.index[:5]}
+    assert_top_k_matches(calculator, 10)
@@ -0,0 +1,46 @@
+import random
+
+import pandas as pd
+import pytest
+
+from Calculator import ProfitCalculatorOptimized
+
+
+def canonical(frame):
+    """Row order only differs between equal sort keys, so compare by method; missing text is None either way"""
+    frame = frame.sort_values(by='Method', kind='stable').reset_index(drop=True).astype(object)
+    return frame.where(frame.notna(), None)
+
+
+def assert_same_results(patched, fresh):
+    assert set(patched) == set(fresh)
+    for key in fresh:
+        pd.testing.assert_frame_equal(canonical(patched[key]), canonical(fresh[key]), check_dtype=False)
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_update_prices_matches_a_fresh_analysis(seed, config_path):
+    rng = random.Random(seed)
+    calculator = ProfitCalculatorOptimized(config_path=config_path)
+    calculator.run_analysis()
+    items = sorted(calculator.get_dependency_index())
+    for _ in range(3):
+        delta = {}
+        for item in rng.sample(items, 4):
+            price = calculator.prices.get(item)
+            if price is not None and rng.random() < 0.2:
+                delta[item] = None  # removed
+            else:
+                delta[item] = rng.randint(1, 3 * (price or 500))
+        patched = calculator.update_prices(delta)
+
+        fresh = ProfitCalculatorOptimized(config_path=config_path, tables=calculator.get_tables())
+        assert_same_results(patched, fresh.run_analysis())
+
+
+def test_update_prices_without_cached_results_runs_the_analysis(config_path):
+    calculator = ProfitCalculatorOptimized(config_path=config_path)
+    item = next(iter(calculator.prices))
+    results = calculator.update_prices({item: calculator.prices[item] + 1})
+    fresh = ProfitCalculatorOptimized(config_path=config_path, tables=calculator.get_tables())
+    assert_same_results(results, fresh.run_analysis())
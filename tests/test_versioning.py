@@ -0,0 +1,50 @@
+import pytest
+
+from Calculator import ProfitCalculatorOptimized
+
+
+@pytest.fixture
+def calculator(config_path):
+    return ProfitCalculatorOptimized(config_path=config_path)
+
+
+def test_nested_mechanics_edits_invalidate_the_buy_all_cache(calculator):
+    profit, details = calculator.calculate_profit_buy_all('Mistery Metal')
+    version = calculator.data_version
+    calculator.craftable['Mistery Metal']['yield'] *= 2
+    assert calculator.data_version > version
+    assert calculator.calculate_profit_buy_all('Mistery Metal')[0] == 2 * profit
+    assert calculator.baseline_cache_misses == 2
+
+
+def test_price_edits_invalidate_the_buy_all_cache(calculator):
+    profit, details = calculator.calculate_profit_buy_all('Mistery Metal')
+    calculator.prices['Mistery Metal'] += 100
+    assert calculator.calculate_profit_buy_all('Mistery Metal')[0] == profit + 100 * details['crafted_units']
+    calculator.recipes['Mistery Metal']['Baru Ore'] -= 1
+    assert calculator.calculate_profit_buy_all('Mistery Metal')[0] == \
+        profit + (100 + calculator.prices['Baru Ore']) * details['crafted_units']
+
+
+def test_calculators_built_from_another_ones_tables_do_not_share_its_dicts(calculator):
+    copy = ProfitCalculatorOptimized(tables=calculator.get_tables())
+    profit = copy.calculate_profit_buy_all('Mistery Metal')[0]
+    version = calculator.data_version
+    copy.craftable['Mistery Metal']['yield'] = 2
+    assert copy.calculate_profit_buy_all('Mistery Metal')[0] == 2 * profit
+    assert calculator.data_version == version
+    assert calculator.craftable['Mistery Metal']['yield'] == 1
+
+
+def test_get_tables_returns_detached_copies(calculator):
+    results = calculator.run_analysis()
+    expected = results['optimal_strategies'].copy()
+    version = calculator.data_version
+    tables = calculator.get_tables()
+    tables['craftable']['Mistery Metal']['yield'] = 5
+    tables['recipes']['Mistery Metal']['Baru Ore'] = 1
+    tables['prices']['Mistery Metal'] = 1
+    assert calculator.data_version == version
+    assert calculator.craftable['Mistery Metal']['yield'] == 1
+    assert calculator.run_analysis()['optimal_strategies'].equals(expected)
+    assert type(tables['craftable']['Mistery Metal']) is dict
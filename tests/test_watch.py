@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from Calculator import ProfitCalculatorOptimized
+from watch import MarketWatch, PriceFeed, parse_tick_line
+
+
+def append(path, text):
+    with open(path, 'a') as f:
+        f.write(text)
+
+
+def test_partial_line_waits_for_its_end(tmp_path):
+    path = str(tmp_path / 'feed.jsonl')
+    feed = PriceFeed(path, from_start=True)
+    append(path, '{"item": "Luna Ore", "price": 180}\n{"item": "Azte')
+    assert feed.read_ticks() == [{'Luna Ore': 180}]
+    assert feed.read_ticks() == []
+    append(path, ' Ore", "price": 150}\n')
+    assert feed.read_ticks() == [{'Azte Ore': 150}]
+
+
+def test_rotation_reads_the_new_file_from_the_start(tmp_path):
+    path = str(tmp_path / 'feed.csv')
+    append(path, 'item,price\nLuna Ore,180\nAzte Ore,150\n')
+    feed = PriceFeed(path)
+    assert feed.read_ticks() == []
+
+    # Truncated in place
+    with open(path, 'w') as f:
+        f.write('Luna Ore,170\n')
+    assert feed.read_ticks() == [{'Luna Ore': 170}]
+
+    # Replaced by a new file (new inode), even one that is larger than the offset
+    os.rename(path, path + '.1')
+    append(path, 'item,price\nLuna Ore,160\nAzte Ore,140\nBaru Ore,120\n')
+    assert feed.read_ticks() == [{'Luna Ore': 160}, {'Azte Ore': 140}, {'Baru Ore': 120}]
+
+
+@pytest.mark.parametrize('line, fmt', [
+    ('{"item": "Luna Ore", "price": NaN}', 'jsonl'),
+    ('{"Luna Ore": Infinity}', 'jsonl'),
+    ('{"Luna Ore": -5}', 'jsonl'),
+    ('{"Luna Ore": true}', 'jsonl'),
+    ('Luna Ore,nan', 'csv'),
+    ('Luna Ore,-1', 'csv'),
+])
+def test_non_prices_are_malformed(line, fmt):
+    with pytest.raises(ValueError):
+        parse_tick_line(line, fmt)
+
+
+def test_malformed_lines_are_skipped(tmp_path):
+    path = str(tmp_path / 'feed.jsonl')
+    feed = PriceFeed(path, from_start=True)
+    append(path, '{"Luna Ore": NaN}\nnot json\n{"Luna Ore": null}\n')
+    assert feed.read_ticks() == [{'Luna Ore': None}]
+    assert feed.malformed == 2
+
+
+def test_batches_count_their_own_ticks(tmp_path, config_path):
+    path = str(tmp_path / 'feed.jsonl')
+    calculator = ProfitCalculatorOptimized(config_path=config_path)
+    calculator.run_analysis()
+    price = calculator.prices['Baru Ore']
+    batches = []
+    watch = MarketWatch(calculator, PriceFeed(path, from_start=True), debounce=1.0,
+                        on_batch=lambda results, delta, elapsed, ticks: batches.append((dict(delta), ticks)))
+
+    append(path, f'{{"Baru Ore": {price + 1}}}\n{{"Baru Ore": {price + 2}}}\n{{"Baru Ore": {price + 3}}}\n')
+    assert watch.poll(now=0.0) is None
+    assert watch.poll(now=1.5) is not None
+    append(path, f'{{"Baru Ore": {price + 4}}}\n')
+    watch.poll(now=2.0)
+    watch.poll(now=3.5)
+
+    assert batches == [({'Baru Ore': price + 3}, 3), ({'Baru Ore': price + 4}, 1)]
+    assert watch.ticks == 4
+    assert calculator.prices['Baru Ore'] == price + 4
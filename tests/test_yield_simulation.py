@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from RecipeGraph import RecipeGraph
+from YieldSimulation import StreamingHistogram, YieldSimulator
+
+OUTPUTS = [  # (item id, rate, min, max, price)
+    (10, 0.7, 1, 3, 100),
+    (11, 0.3, 2, 2, 250),
+]
+RECORDS = [{
+    'id': 1, 'name': "Mixed Craft", 'FocusCost': 40,
+    'input_data': [{'input_id': 1, 'item_name': "Ore", 'amount': 2, 'isVariable': False}],
+    'output_data': [{'output_id': item, 'item_name': f"Item {item}", 'rate': rate, 'minAmount': low,
+                     'maxAmount': high} for item, rate, low, high, _ in OUTPUTS],
+}]
+PRICES = {'Ore': 30, **{f"Item {item}": price for item, *_, price in OUTPUTS}}
+
+
+def session_moments():
+    """Mean and variance of one session's revenue: pick an output by rate, then a uniform amount"""
+    mean = second = 0.0
+    for _, rate, low, high, price in OUTPUTS:
+        amounts = np.arange(low, high + 1)
+        mean += rate * price * amounts.mean()
+        second += rate * price ** 2 * (amounts ** 2).mean()
+    return mean, second - mean ** 2
+
+
+def test_simulated_moments_match_the_analytic_ones():
+    simulator = YieldSimulator(RecipeGraph(records=RECORDS), PRICES, daily_focus=400)
+    sessions = simulator.strategies[0]['sessions']
+    mean, variance = session_moments()
+    expected_mean = sessions * (mean - 2 * 30)
+    expected_std = np.sqrt(sessions * variance)
+    trials = 200_000
+
+    summary = simulator.run(trials=trials, batch_size=30_000, seed=1).iloc[0]
+    assert summary['Expected Profit'] == pytest.approx(expected_mean)
+    assert abs(summary['Mean Profit'] - expected_mean) < 5 * expected_std / np.sqrt(trials)
+    assert summary['Std Dev'] == pytest.approx(expected_std, rel=0.01)
+    low, high = simulator.profit_bounds()
+    assert low[0] <= summary['P5'] <= summary['P50'] <= summary['P95'] <= high[0]
+
+
+def test_histogram_percentiles_and_tail_means_match_the_samples():
+    rng = np.random.default_rng(3)
+    samples = np.vstack([rng.normal(0, 1, 50_000), rng.exponential(2, 50_000)])
+    low, high = samples.min(axis=1), samples.max(axis=1)
+    histogram = StreamingHistogram(low, high, bins=4096)
+    for batch in np.array_split(samples, 7, axis=1):
+        histogram.add(batch)
+    width = (high - low) / 4096
+    for q in (5, 50, 95):
+        assert np.all(np.abs(histogram.percentile(q) - np.percentile(samples, q, axis=1)) <= 2 * width)
+    worst = np.sort(samples, axis=1)[:, :2500].mean(axis=1)
+    np.testing.assert_allclose(histogram.tail_mean(5), worst, atol=2 * width.max())
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+BLUE PROTOCOL - MARKET WATCH
+
+Tails a local price feed that a collector appends to and keeps a warm
+ProfitCalculatorOptimized in step with it:
+
+    python watch.py feed.jsonl                 # {"item": "Luna Ore", "price": 180} per line
+    python watch.py feed.csv --top 5           # item,price[,timestamp] per line
+
+JSONL lines may also carry a whole snapshot ({"Luna Ore": 180, "Azte Ore": 150}).
+Ticks are coalesced (the last price of an item wins) and applied in debounced
+batches through update_prices, which only recomputes the strategies that
+depend on the changed items; the refreshed top strategies are printed after
+every batch.
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+
+from Calculator import ProfitCalculatorOptimized
+
+
+def _number(text):
+    if text is None:
+        return None  # a null price removes the item's price
+    if isinstance(text, bool):
+        raise ValueError(f"expected a price, got {text!r}")
+    value = float(text)
+    if not math.isfinite(value) or value < 0:
+        raise ValueError(f"expected a finite, non-negative price, got {text!r}")
+    return int(value) if value.is_integer() else value
+
+
+def parse_tick_line(line, fmt):
+    """{item: price} of one feed line ({} for a blank line or a CSV header); ValueError when malformed"""
+    line = line.strip()
+    if not line:
+        return {}
+    if fmt == 'jsonl':
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError(f"expected an object, got {type(record).__name__}")
+        if 'item' in record and 'price' in record:
+            record = {record['item']: record['price']}
+        return {str(item): _number(price) for item, price in record.items()}
+    fields = next(csv.reader([line]))
+    if len(fields) < 2:
+        raise ValueError(f"expected item,price[,timestamp], got {line!r}")
+    try:
+        return {fields[0].strip(): _number(fields[1])}
+    except ValueError:
+        if fields[0].strip().lower() == 'item':
+            return {}  # header
+        raise
+
+
+class PriceFeed:
+    """Reads the complete lines appended to a feed file since the last read
+
+    A trailing partial line is kept until the collector finishes it; a file
+    that shrinks or is replaced (log rotation) is read again from the start.
+    """
+
+    def __init__(self, path, fmt=None, from_start=False):
+        self.path = path
+        self.format = fmt or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        self.offset = 0
+        self.inode = None
+        self.pending = b''
+        self.malformed = 0
+        if not from_start and os.path.exists(path):
+            stat = os.stat(path)
+            self.offset, self.inode = stat.st_size, stat.st_ino
+
+    def read_ticks(self):
+        """Ticks of the new complete lines, in file order, as a list of {item: price} dicts"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.offset, self.inode, self.pending = 0, stat.st_ino, b''
+        if stat.st_size == self.offset:
+            return []
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+        self.offset += len(data)
+        lines = (self.pending + data).split(b'\n')
+        self.pending = lines.pop()
+
+        ticks = []
+        for line in lines:
+            try:
+                tick = parse_tick_line(line.decode('utf-8'), self.format)
+            except (ValueError, TypeError, UnicodeDecodeError) as e:
+                self.malformed += 1
+                print(f"Warning: skipping malformed feed line ({e})")
+                continue
+            if tick:
+                ticks.append(tick)
+        return ticks
+
+
+class MarketWatch:
+    """Applies a price feed to a calculator in debounced batches
+
+    A batch is applied once the feed has been quiet for ``debounce`` seconds,
+    or at the latest ``max_delay`` seconds after its first tick, so a feed
+    that never pauses still refreshes. Prices equal to the current ones and
+    items the calculator does not know are dropped before update_prices.
+    """
+
+    def __init__(self, calculator, feed, debounce=1.0, max_delay=5.0, top=10, on_batch=None):
+        self.calculator = calculator
+        self.feed = feed
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.top = top
+        self.on_batch = on_batch or self.print_top
+        self.pending = {}
+        self.first_tick = None
+        self.last_tick = None
+        self.ticks = 0
+        self.batch_ticks = 0
+        self.batches = 0
+        self.ignored = set()
+        self._stopped = False
+
+    def poll(self, now=None):
+        """Read the feed and apply the pending batch when it is due; returns the results when applied"""
+        now = time.monotonic() if now is None else now
+        ticks = self.feed.read_ticks()
+        if ticks:
+            for tick in ticks:
+                self.pending.update(tick)
+            self.ticks += len(ticks)
+            self.batch_ticks += len(ticks)
+            self.first_tick = now if self.first_tick is None else self.first_tick
+            self.last_tick = now
+        if self.first_tick is None:
+            return None
+        if now - self.last_tick >= self.debounce or now - self.first_tick >= self.max_delay:
+            return self.flush()
+        return None
+
+    def flush(self):
+        """Apply every pending tick at once (None when nothing changed)"""
+        pending, self.pending = self.pending, {}
+        self.batch_ticks, ticks = 0, self.batch_ticks
+        self.first_tick = self.last_tick = None
+        index = self.calculator.get_item_index()
+        prices = self.calculator.prices
+        delta = {}
+        for item, price in pending.items():
+            if item not in index:
+                if item not in self.ignored:
+                    self.ignored.add(item)
+                    print(f"Warning: feed item '{item}' is not used by any table. Ignoring its prices.")
+            elif prices.get(item) != price:
+                delta[item] = price
+        if not delta:
+            return None
+
+        start = time.perf_counter()
+        results = self.calculator.update_prices(delta)
+        self.batches += 1
+        self.on_batch(results, delta, time.perf_counter() - start, ticks)
+        return results
+
+    def print_top(self, results, delta, elapsed, ticks):
+        optimal_df = results.get('optimal_strategies')
+        print(f"\n📈 Batch #{self.batches}: {len(delta)} price(s) updated from {ticks} tick(s) "
+              f"({elapsed * 1000:.1f} ms) - {time.strftime('%H:%M:%S')}")
+        if optimal_df is None or optimal_df.empty:
+            print("No optimal strategies found")
+            return
+        columns = [col for col in ['Method', 'Daily Profit', 'Luno/Focus', 'Gather Focus', 'Craft Focus']
+                   if col in optimal_df.columns]
+        print(optimal_df.head(self.top)[columns].to_string(index=False))
+
+    def run(self, poll_interval=0.2):
+        """Poll the feed until stop() or Ctrl+C"""
+        self.calculator.run_analysis()
+        print(f"👀 Watching {self.feed.path} ({self.feed.format}); Ctrl+C to stop")
+        try:
+            while not self._stopped:
+                self.poll()
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.flush()
+
+    def stop(self):
+        self._stopped = True
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tail a price feed and keep the top strategies up to date")
+    parser.add_argument('feed', help="JSONL or CSV file a price collector appends to")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help="Feed format (default: from the extension)")
+    parser.add_argument('--from-start', action='store_true', help="Apply the lines already in the feed first")
+    parser.add_argument('--debounce', type=float, default=1.0, help="Quiet seconds before a batch is applied")
+    parser.add_argument('--max-delay', type=float, default=5.0, help="Longest a tick waits for its batch")
+    parser.add_argument('--poll', type=float, default=0.2, help="Seconds between feed reads")
+    parser.add_argument('--top', type=int, default=10, help="Strategies shown after every batch")
+    parser.add_argument('--daily-focus', type=int, default=400)
+    parser.add_argument('--config', default='config', help="Directory with the JSON config files")
+    parser.add_argument('--derived', action='store_true',
+                        help="Derive the mechanics tables from the scraped catalog (hand-written JSON on top)")
+    parser.add_argument('--assumed-gatherables', action='store_true',
+                        help="With --derived, also gather the catalog items whose node mechanics are assumed")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    calculator = ProfitCalculatorOptimized(config_path=args.config, daily_focus=args.daily_focus,
+                                           derived=args.derived, assumed_gatherables=args.assumed_gatherables)
+    feed = PriceFeed(args.feed, args.format, args.from_start)
+    MarketWatch(calculator, feed, args.debounce, args.max_delay, args.top).run(args.poll)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())